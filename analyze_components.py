@@ -2,117 +2,104 @@
 from database import ZeroDivisorDatabase
 
 def analyze_interesting_entries():
-    """Find entries with interesting/non-trivial components"""
+    """Find entries with interesting/non-trivial components (read from the materialized stats tables)"""
     db = ZeroDivisorDatabase()
-    conn = db._get_connection()
-    cursor = conn.cursor()
+    stats = db.get_component_stats(limit=10)
     
     print("INTERESTING ENTRIES ANALYSIS")
     print("=" * 60)
     
     # Find entries with the most components
     print("\n1. Entries with most components:")
-    cursor.execute('''
-        SELECT nvalue, partition_count, exact_components_desc 
-        FROM MyNumber 
-        WHERE partition_count > 0 
-        ORDER BY partition_count DESC 
-        LIMIT 10
-    ''')
-    results = cursor.fetchall()
-    for n, count, comps in results:
-        print(f"  Z_{n}: {count} components - {comps}")
+    for entry in stats['most_components']:
+        print(f"  Z_{entry['n']}: {entry['partition_count']} components - {entry['exact_components']}")
     
     # Find entries with largest bipartite components
     print("\n2. Entries with largest bipartite components:")
-    cursor.execute('''
-        SELECT nvalue, p1, p2, exact_components_desc 
-        FROM MyNumber mn
-        JOIN ExactConnection ec ON mn.entry_id = ec.entry_id
-        WHERE ec.component_type = 'bipartite'
-        ORDER BY (p1 + p2) DESC 
-        LIMIT 10
-    ''')
-    results = cursor.fetchall()
-    for n, p1, p2, comps in results:
-        print(f"  Z_{n}: K_{{{p1},{p2}}} - Full: {comps}")
+    for entry in stats['largest_bipartite']:
+        p1, p2 = entry['max_bipartite']
+        print(f"  Z_{entry['n']}: K_{{{p1},{p2}}} - Full: {entry['exact_components']}")
     
     # Find entries with largest cliques
     print("\n3. Entries with largest cliques:")
-    cursor.execute('''
-        SELECT nvalue, p1, exact_components_desc 
-        FROM MyNumber mn
-        JOIN ExactConnection ec ON mn.entry_id = ec.entry_id
-        WHERE ec.component_type = 'complete' AND ec.p2 IS NULL
-        ORDER BY p1 DESC 
-        LIMIT 10
-    ''')
-    results = cursor.fetchall()
-    for n, p1, comps in results:
-        print(f"  Z_{n}: K_{p1} - Full: {comps}")
+    for entry in stats['largest_cliques']:
+        print(f"  Z_{entry['n']}: K_{entry['max_clique']} - Full: {entry['exact_components']}")
     
     # Find entries with multiple component types
     print("\n4. Entries with diverse components (mix of complete and bipartite):")
-    cursor.execute('''
-        SELECT nvalue, 
-               COUNT(DISTINCT component_type) as type_count,
-               exact_components_desc
-        FROM MyNumber mn
-        JOIN ExactConnection ec ON mn.entry_id = ec.entry_id
-        GROUP BY nvalue
-        HAVING type_count > 1
-        ORDER BY type_count DESC, partition_count DESC
-        LIMIT 10
-    ''')
-    results = cursor.fetchall()
-    for n, type_count, comps in results:
-        print(f"  Z_{n}: {type_count} component types - {comps}")
+    for entry in stats['diverse_components']:
+        print(f"  Z_{entry['n']}: {entry['type_count']} component types - {entry['exact_components']}")
+
+def show_shape_histogram(limit=25):
+    """Print component type totals and the most common component shapes"""
+    db = ZeroDivisorDatabase()
+    stats = db.get_component_stats(shape_limit=limit)
+    
+    print(f"\nCOMPONENT STATISTICS ({stats['entry_count']} entries)")
+    print("=" * 60)
+    for ctype, counts in sorted(stats['component_types'].items()):
+        print(f"  {ctype}: {counts['components']} components, "
+              f"{counts['distinct_shapes']} distinct shapes")
     
-    conn.close()
+    print(f"\nTop {limit} shapes by number of entries:")
+    print(f"  {'Shape':<12} {'Entries':>10} {'Occurrences':>12}")
+    for shape in stats['shape_histogram']:
+        print(f"  {shape['shape']:<12} {shape['entry_count']:>10} {shape['occurrences']:>12}")
 
 def find_by_component_pattern(pattern_type, value):
     """Find entries with specific component patterns"""
     db = ZeroDivisorDatabase()
     
     if pattern_type == "bipartite_sum":
-        # Find bipartite components where a+b = value
-        conn = db._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT DISTINCT nvalue, p1, p2, exact_components_desc
-            FROM MyNumber mn
-            JOIN ExactConnection ec ON mn.entry_id = ec.entry_id
-            WHERE ec.component_type = 'bipartite' AND (p1 + p2) = ?
-            ORDER BY nvalue
-        ''', (value,))
-        results = cursor.fetchall()
-        conn.close()
+        # Find bipartite components where a+b = value (indexed comp_size column)
+        results = db.search_components('bipartite', min_size=value, max_size=value)
         
         print(f"\nBipartite components with sum {value}:")
-        for n, p1, p2, comps in results:
-            print(f"  Z_{n}: K_{{{p1},{p2}}} - {comps}")
+        seen = set()
+        for row in results:
+            if (row['n'], row['p1'], row['p2']) in seen:  # one line per distinct K_{a,b} per n
+                continue
+            seen.add((row['n'], row['p1'], row['p2']))
+            print(f"  Z_{row['n']}: K_{{{row['p1']},{row['p2']}}} - {row['exact_components']}")
     
     elif pattern_type == "clique_size":
         # Find cliques of specific size
-        conn = db._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT DISTINCT nvalue, exact_components_desc
-            FROM MyNumber mn
-            JOIN ExactConnection ec ON mn.entry_id = ec.entry_id
-            WHERE ec.component_type = 'complete' AND ec.p1 = ? AND ec.p2 IS NULL
-            ORDER BY nvalue
-        ''', (value,))
-        results = cursor.fetchall()
-        conn.close()
+        results = db.search_components('complete', min_size=value, max_size=value)
         
         print(f"\nComplete components of size {value}:")
-        for n, comps in results:
-            print(f"  Z_{n}: {comps}")
+        seen = set()
+        for row in results:
+            if row['n'] in seen:
+                continue
+            seen.add(row['n'])
+            print(f"  Z_{row['n']}: {row['exact_components']}")
+
+def find_components_in_range(component_type, min_size, max_size):
+    """Find components whose size (a for K_a, a+b for K_{a,b}) lies in [min_size, max_size]"""
+    db = ZeroDivisorDatabase()
+    results = db.search_components(component_type, min_size=min_size, max_size=max_size)
+    
+    label = "a+b" if component_type == 'bipartite' else "a"
+    print(f"\n{component_type.capitalize()} components with {min_size} <= {label} <= {max_size}:")
+    for row in results:
+        print(f"  Z_{row['n']}: {row['shape']} ({row['edges']} edges) - {row['exact_components']}")
+    return results
 
 if __name__ == "__main__":
-    analyze_interesting_entries()
+    import sys
     
-    # Example pattern searches
-    find_by_component_pattern("bipartite_sum", 10)  # Find K_{a,b} where a+b=10
-    find_by_component_pattern("clique_size", 4)     # Find K_4 components
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "stats":
+        show_shape_histogram(int(sys.argv[2]) if len(sys.argv) > 2 else 25)
+    elif len(sys.argv) > 4 and sys.argv[1] == "range":
+        # python analyze_components.py range bipartite 10 20
+        find_components_in_range(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    elif len(sys.argv) > 1 and sys.argv[1] == "rebuild-stats":
+        print("Rebuilding EntryStats and ShapeFrequency...")
+        ZeroDivisorDatabase().rebuild_stats()
+        print("Done.")
+    else:
+        analyze_interesting_entries()
+        
+        # Example pattern searches
+        find_by_component_pattern("bipartite_sum", 10)  # Find K_{a,b} where a+b=10
+        find_by_component_pattern("clique_size", 4)     # Find K_4 components
\ No newline at end of file
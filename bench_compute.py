@@ -0,0 +1,237 @@
+# bench_compute.py
+"""
+Benchmark harness for the compute pipeline (catalog.py + populate_db.calculate_graph_data).
+
+Each (stage, n) case runs in a fresh child process so peak RSS is attributable to that case.
+Wall time is the best of --repeat runs without tracing; allocations are measured in a
+separate tracemalloc run so tracing overhead does not pollute the timings.
+
+    python bench_compute.py                                  # run the default suite
+    python bench_compute.py --quick --output results.json    # smaller n, write results
+    python bench_compute.py --save-baseline bench_baseline.json
+    python bench_compute.py --compare bench_baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+import time
+import tracemalloc
+from queue import Empty
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak RSS is reported as None
+    resource = None
+
+# Representative n: primes, prime powers, highly composite numbers, squarefree products
+SUITES = {
+    'default': {
+        'prime': [251, 509],
+        'prime_power': [243, 256, 625],
+        'highly_composite': [240, 360, 720],
+        'squarefree': [210, 330, 462],
+    },
+    'quick': {
+        'prime': [61, 97],
+        'prime_power': [64, 81],
+        'highly_composite': [60, 120],
+        'squarefree': [66, 105],
+    },
+}
+
+# Seconds a case may run before its child process is killed and the case reported as an error
+CASE_TIMEOUT = 600
+
+STAGES = ('get_zero_divisors', 'get_exact_zero_divisors', 'get_exact_components',
+          'signature_components', 'crt_exact_graph', 'calculate_graph_data')
+
+def _prepare(stage, n):
+    """Compute the inputs a stage needs (not timed) and return a zero-argument callable"""
+    from catalog import get_zero_divisors, get_exact_zero_divisors, get_exact_components
+    from populate_db import calculate_graph_data
+    from signature_cache import SignatureCache
+
+    if stage == 'get_zero_divisors':
+        return lambda: get_zero_divisors(n)
+    if stage == 'signature_components':
+        # Cold cache: factorization plus building the skeleton
+        return lambda: SignatureCache().components(n)
+    if stage == 'crt_exact_graph':
+        # Cold piece cache, as for signature_components
+        from crt_engine import PieceCache, exact_graph_record
+        return lambda: exact_graph_record(n, PieceCache())
+    if stage == 'calculate_graph_data':
+        return lambda: calculate_graph_data(n)
+
+    zero_divisors = get_zero_divisors(n)
+    if stage == 'get_exact_zero_divisors':
+        return lambda: get_exact_zero_divisors(n, zero_divisors)
+
+    exact_zero_divisors = get_exact_zero_divisors(n, zero_divisors)
+    if stage == 'get_exact_components':
+        return lambda: get_exact_components(n, exact_zero_divisors)
+
+    raise ValueError(f"Unknown stage: {stage}")
+
+def _peak_rss_kb():
+    """Peak resident set size of this process in KiB (ru_maxrss is bytes on macOS)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def _run_case(stage, n, repeat, queue):
+    """Child process body: time the stage, then measure its allocations"""
+    try:
+        func = _prepare(stage, n)
+        rss_before = _peak_rss_kb()
+
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        rss_after = _peak_rss_kb()
+
+        tracemalloc.start()
+        func()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+
+        queue.put({
+            'wall_time_s': min(times),
+            'wall_time_mean_s': sum(times) / len(times),
+            'peak_rss_kb': rss_after,
+            'peak_rss_delta_kb': (rss_after - rss_before) if rss_before is not None else None,
+            'traced_peak_bytes': traced_peak,
+            'live_blocks_after': blocks,
+        })
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+
+def run_case(stage, n, repeat=3, timeout=CASE_TIMEOUT):
+    """
+    Run one benchmark case in a fresh child process. A child that dies without a result
+    (OOM kill, crash in a C extension) or runs past timeout gives an 'error' result.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run_case, args=(stage, n, repeat, queue))
+    process.start()
+    deadline = time.monotonic() + timeout
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=1)
+        except Empty:
+            if not process.is_alive():
+                # The result may still be in flight from a child that has just exited
+                try:
+                    result = queue.get(timeout=1)
+                except Empty:
+                    result = {'error': f"child process exited with code {process.exitcode} without a result"}
+            elif time.monotonic() > deadline:
+                process.kill()
+                result = {'error': f"timed out after {timeout:g}s"}
+    process.join()
+    return result
+
+def run_suite(suite='default', stages=STAGES, repeat=3, ns=None, timeout=CASE_TIMEOUT):
+    """Run every stage over the suite's n values and return a results document"""
+    cases = []
+    groups = {'custom': ns} if ns else SUITES[suite]
+    for category, values in groups.items():
+        for n in values:
+            for stage in stages:
+                result = run_case(stage, n, repeat, timeout)
+                result.update({'stage': stage, 'n': n, 'category': category})
+                cases.append(result)
+                if 'error' in result:
+                    print(f"  {stage:<24} n={n:<6} ERROR {result['error']}")
+                else:
+                    rss = result['peak_rss_kb']
+                    print(f"  {stage:<24} n={n:<6} {result['wall_time_s'] * 1000:10.1f} ms  "
+                          f"peak_rss={rss if rss is not None else 'n/a'} KiB  "
+                          f"traced_peak={result['traced_peak_bytes'] / 1024:10.1f} KiB")
+    return {
+        'suite': 'custom' if ns else suite,
+        'repeat': repeat,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'cases': cases,
+    }
+
+def compare_results(results, baseline, threshold=0.25, metrics=('wall_time_s', 'traced_peak_bytes')):
+    """Return a list of regressions: cases where a metric grew by more than threshold (fraction)"""
+    baseline_cases = {(case['stage'], case['n']): case for case in baseline.get('cases', [])}
+    regressions = []
+    for case in results['cases']:
+        old = baseline_cases.get((case['stage'], case['n']))
+        if old is None or 'error' in case or 'error' in old:
+            continue
+        for metric in metrics:
+            if not old.get(metric) or case.get(metric) is None:
+                continue
+            change = (case[metric] - old[metric]) / old[metric]
+            if change > threshold:
+                regressions.append({
+                    'stage': case['stage'],
+                    'n': case['n'],
+                    'metric': metric,
+                    'baseline': old[metric],
+                    'current': case[metric],
+                    'change': change,
+                })
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the zero divisor compute pipeline")
+    parser.add_argument('--quick', action='store_true', help="Use the small-n suite")
+    parser.add_argument('--n', type=int, nargs='+', help="Benchmark these n instead of a suite")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case (best is reported)")
+    parser.add_argument('--output', help="Write machine-readable results (JSON) to this file")
+    parser.add_argument('--save-baseline', help="Write results as the new baseline file")
+    parser.add_argument('--compare', help="Baseline file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed relative growth before a case counts as a regression")
+    parser.add_argument('--timeout', type=float, default=CASE_TIMEOUT,
+                        help="Seconds per case before it is killed and reported as an error")
+    args = parser.parse_args()
+
+    suite = 'quick' if args.quick else 'default'
+    print(f"Benchmarking {', '.join(args.stages)} ({'n=' + str(args.n) if args.n else suite + ' suite'})")
+    results = run_suite(suite, args.stages, args.repeat, args.n, args.timeout)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold)
+        errors = [case for case in results['cases'] if 'error' in case]
+        if errors:
+            # A crashed or timed-out case has no metrics to compare, so it fails the gate itself
+            print(f"\n{len(errors)} case(s) failed:")
+            for case in errors:
+                print(f"  {case['stage']:<24} n={case['n']:<6} {case['error']}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for r in regressions:
+                print(f"  {r['stage']:<24} n={r['n']:<6} {r['metric']}: "
+                      f"{r['baseline']:.6g} -> {r['current']:.6g} (+{r['change']:.0%})")
+        if regressions or errors:
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold:.0%} against {args.compare}")
+
+if __name__ == "__main__":
+    main()
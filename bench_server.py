@@ -0,0 +1,215 @@
+# bench_server.py
+"""
+Reproducible HTTP load benchmark for server_app.py.
+
+Builds a synthetic catalog database, starts server_app.py against it on a local port,
+and drives /api/entries (several component filters), /api/graph/<n> (several sizes) and
+/api/export/csv at several concurrency levels, reporting throughput and p50/p95/p99.
+
+    python bench_server.py                                   # defaults
+    python bench_server.py --max-n 20000 --graph-sizes 500 2000 5000 --concurrency 1 4 16
+    python bench_server.py --url http://127.0.0.1:5000       # benchmark an already running server
+    python bench_server.py --output server_bench.json
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import quote
+
+from database import ZeroDivisorDatabase
+from load_test import percentile, timed_get
+from number_sieve import divisors, totient
+
+ENTRY_FILTERS = [
+    ('no filter', ''),
+    ('clique 4', '4'),
+    ('bipartite (1,2)', '(1,2)'),
+    ('wildcard (2,)', '(2,)'),
+    ('wildcard (,4)', '(,4)'),
+    ('two components', '(1,2),(2,2)'),
+]
+
+def synthetic_graph_data(n, with_structure):
+    """
+    Graph data for the synthetic catalog. Components use the divisor rule (x, y exact iff
+    gcd(x,n)*gcd(y,n) = n) so they are cheap; structures are only built when requested.
+    """
+    comps = []
+    for d in divisors(n):
+        if d == 1 or d * d > n:
+            continue
+        a, b = totient(n // d), totient(d)
+        if d * d == n:
+            if a > 1:
+                comps.append((a,))
+        elif a * b == 1:
+            comps.append((2,))
+        else:
+            comps.append((min(a, b), max(a, b)))
+    comps.sort(key=lambda t: (len(t), t))
+
+    data = {
+        'complete': sum(1 for c in comps if len(c) == 1),
+        'complete_bipartite': sum(1 for c in comps if len(c) == 2),
+        'exact_components': comps,
+        'partition_count': len(comps),
+        'comp_desc': ','.join(str(c[0]) if len(c) == 1 else f'({c[0]},{c[1]})' for c in comps),
+    }
+    if not with_structure:
+        return data
+
+    gcds = [math.gcd(x, n) for x in range(n)]
+    z_edges, ez_edges = [], []
+    for x in range(1, n):
+        step = n // gcds[x]
+        for y in range(step * ((x + step - 1) // step), n, step):  # y >= x with n | x*y
+            z_edges.append((x, y))
+            if gcds[x] * gcds[y] == n:
+                ez_edges.append((x, y))
+    z_vertices = sorted({v for edge in z_edges for v in edge})
+    ez_vertices = sorted({v for edge in ez_edges for v in edge})
+    data.update({
+        'zvertices': z_vertices,
+        'zedges': z_edges,
+        'zself_loops': [x for x, y in z_edges if x == y],
+        'zvertices_count': len(z_vertices),
+        'zedges_count': len(z_edges),
+        'ez_vertices': ez_vertices,
+        'ez_edges': ez_edges,
+        'ez_self_loops': [x for x, y in ez_edges if x == y],
+        'ez_vertices_count': len(ez_vertices),
+        'ez_edges_count': len(ez_edges),
+    })
+    return data
+
+def build_synthetic_db(db_path, max_n, graph_sizes):
+    """Create a catalog with summary rows for 2..max_n and full structures for graph_sizes"""
+    db = ZeroDivisorDatabase(db_path)
+    structured = set(graph_sizes)
+    start = time.time()
+    for n in range(2, max_n + 1):
+        db.insert_number_data(n, synthetic_graph_data(n, n in structured))
+    for n in structured:
+        if n > max_n:
+            db.insert_number_data(n, synthetic_graph_data(n, True))
+    print(f"Synthetic catalog: {max_n - 1} entries in {time.time() - start:.1f}s -> {db_path}")
+
+def start_server(db_path, port):
+    """Start server_app.py on a local port against db_path and wait until /api/health answers"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server_app.py')
+    env = dict(os.environ, ZDG_DB_PATH=db_path, ZDG_PORT=str(port))
+    process = subprocess.Popen([sys.executable, script], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/api/health", timeout=1):
+                return process, base_url
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("server_app.py did not come up within 30s")
+
+def run_scenario(url, concurrency, requests_per_worker):
+    """Fire requests_per_worker GETs from each of `concurrency` threads"""
+    latencies, statuses, sizes = [], {}, []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(requests_per_worker):
+            elapsed, status, size = timed_get(url, {'Accept-Encoding': 'gzip'})
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(elapsed)
+                    sizes.append(size)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    return {
+        'requests': concurrency * requests_per_worker,
+        'ok': len(latencies),
+        'statuses': statuses,
+        'throughput_rps': len(latencies) / wall if wall else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'mean_bytes': sum(sizes) / len(sizes) if sizes else 0,
+    }
+
+def run_benchmark(base_url, max_n, graph_sizes, concurrency_levels, requests_per_worker):
+    """Run every endpoint scenario at every concurrency level"""
+    scenarios = []
+    for label, components in ENTRY_FILTERS:
+        scenarios.append(('/api/entries', label,
+                          f"{base_url}/api/entries?start_n=1&end_n={max_n}&components={quote(components)}"))
+    for n in graph_sizes:
+        scenarios.append(('/api/graph/<n>', f"n={n}", f"{base_url}/api/graph/{n}"))
+        scenarios.append(('/api/graph/<n>', f"n={n} compact", f"{base_url}/api/graph/{n}?format=compact"))
+    scenarios.append(('/api/export/csv', 'full catalog', f"{base_url}/api/export/csv"))
+
+    results = []
+    print(f"\n{'endpoint':<18} {'scenario':<18} {'conc':>4} {'ok/req':>9} {'req/s':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'bytes':>10}")
+    for endpoint, label, url in scenarios:
+        for concurrency in concurrency_levels:
+            result = run_scenario(url, concurrency, requests_per_worker)
+            result.update({'endpoint': endpoint, 'scenario': label, 'concurrency': concurrency})
+            results.append(result)
+            print(f"{endpoint:<18} {label:<18} {concurrency:>4} "
+                  f"{result['ok']:>4}/{result['requests']:<4} {result['throughput_rps']:>9.1f} "
+                  f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} "
+                  f"{result['mean_bytes']:>10.0f}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load benchmark for server_app.py")
+    parser.add_argument('--url', help="Benchmark an already running server instead of starting one")
+    parser.add_argument('--db', help="Synthetic database path (default: a temporary file)")
+    parser.add_argument('--max-n', type=int, default=5000, help="Synthetic catalog covers 2..max_n")
+    parser.add_argument('--graph-sizes', type=int, nargs='+', default=[500, 1000, 2000])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=20, help="Requests per worker per scenario")
+    parser.add_argument('--port', type=int, default=5077)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.url.rstrip('/') if args.url else None
+    with tempfile.TemporaryDirectory() as tmp:
+        if base_url is None:
+            db_path = args.db or os.path.join(tmp, 'synthetic_catalog.db')
+            if not os.path.exists(db_path):
+                build_synthetic_db(db_path, args.max_n, args.graph_sizes)
+            process, base_url = start_server(db_path, args.port)
+        try:
+            results = run_benchmark(base_url, args.max_n, args.graph_sizes,
+                                    args.concurrency, args.requests)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'max_n': args.max_n, 'graph_sizes': args.graph_sizes,
+                       'concurrency': args.concurrency, 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
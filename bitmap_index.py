@@ -0,0 +1,312 @@
+# bitmap_index.py
+"""
+In-memory index over n for the /api/entries component filters, so that a search does not scan
+ExactConnection: SQLite is only asked for the rows of the n that match.
+
+One compressed bitmap of n per key, built from the catalog (ZeroDivisorDatabase or
+shards.ShardedCatalog):
+    ('complete', p1)               n with a K_p1 component
+    ('bipartite', p1, p2)          n with a K_{p1,p2} component
+    ('bipartite', p1, None)        the (a,) wildcard, ('bipartite', None, p2) the (,b) wildcard,
+    ('bipartite', None, None)      any bipartite component: unions taken once, at load
+    ('partition_count', k)         for exact_match
+    ('has_complete',), ('has_bipartite',)   for component_type
+A search intersects the bitmaps of its filters, smallest first, after cutting the smallest one
+down to start_n..end_n. Results match ZeroDivisorDatabase.search_entries.
+
+Bitmaps are roaring-style: n is split into n >> 16 and its low 16 bits, and each 65536-wide
+chunk is a sorted array('H') of the low bits while it holds at most ARRAY_LIMIT of them, else a
+65536-bit Python int. Most shapes occur for only a handful of n, so most chunks are short arrays.
+
+The index watches the catalog generation (shards.CatalogGeneration: PRAGMA data_version on a
+connection of its own to each database file), which changes whenever another connection commits. While the index is not loaded or is out of date,
+search() returns None (the caller falls back to SQL) and a reload runs in the background.
+
+    python bitmap_index.py [db_path]           # load time, key count and memory
+    python bitmap_index.py verify [db_path]    # compare against search_entries
+"""
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from threading import Lock, Thread
+
+from shards import CatalogGeneration
+
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+CHUNK_MASK = CHUNK_SIZE - 1
+
+# A chunk with more members than this is held as an int (the array would be the larger one)
+ARRAY_LIMIT = 4096
+
+# The bit offsets set in each byte value, for turning an int chunk back into members
+BYTE_OFFSETS = [tuple(i for i in range(8) if byte >> i & 1) for byte in range(256)]
+
+def _size(chunk):
+    return chunk.bit_count() if isinstance(chunk, int) else len(chunk)
+
+def _lows_to_int(lows):
+    bits = bytearray(CHUNK_SIZE // 8)
+    for low in lows:
+        bits[low >> 3] |= 1 << (low & 7)
+    return int.from_bytes(bits, 'little')
+
+def _int_to_lows(bits):
+    # Only the bytes from the lowest to the highest set bit
+    first = ((bits & -bits).bit_length() - 1) >> 3
+    data = (bits >> (first * 8)).to_bytes((bits.bit_length() + 7) // 8 - first, 'little')
+    return array('H', [i * 8 + offset for i, byte in enumerate(data, first) for offset in BYTE_OFFSETS[byte]])
+
+def _and(a, b):
+    """Intersection of two chunks"""
+    if isinstance(a, int) and isinstance(b, int):
+        return a & b
+    if isinstance(a, int):
+        a, b = b, a
+    if isinstance(b, int):
+        bits = b.to_bytes(CHUNK_SIZE // 8, 'little')
+        return array('H', (low for low in a if bits[low >> 3] >> (low & 7) & 1))
+    if len(a) > len(b):
+        a, b = b, a
+    members = set(b)
+    return array('H', (low for low in a if low in members))
+
+class Bitmap:
+    """Set of n as {n >> 16: chunk}, chunks as described in the module docstring"""
+    __slots__ = ('chunks',)
+
+    def __init__(self, chunks=None):
+        self.chunks = chunks if chunks is not None else {}
+
+    @classmethod
+    def from_sorted(cls, ns):
+        """From ascending, distinct n (a list or array)"""
+        chunks = {}
+        i = 0
+        while i < len(ns):
+            high = ns[i] >> CHUNK_BITS
+            j = bisect_left(ns, (high + 1) << CHUNK_BITS, i)
+            lows = array('H', (n & CHUNK_MASK for n in ns[i:j]))
+            chunks[high] = lows if len(lows) <= ARRAY_LIMIT else _lows_to_int(lows)
+            i = j
+        return cls(chunks)
+
+    def __len__(self):
+        return sum(_size(chunk) for chunk in self.chunks.values())
+
+    def __and__(self, other):
+        if len(self.chunks) > len(other.chunks):
+            self, other = other, self
+        chunks = {}
+        for high, chunk in self.chunks.items():
+            if high in other.chunks:
+                both = _and(chunk, other.chunks[high])
+                if _size(both):
+                    chunks[high] = both
+        return Bitmap(chunks)
+
+    def restrict(self, start_n, end_n):
+        """The members with start_n <= n <= end_n"""
+        start_n = max(start_n, 0)
+        first, last = start_n >> CHUNK_BITS, end_n >> CHUNK_BITS
+        chunks = {}
+        for high, chunk in self.chunks.items():
+            if high < first or high > last:
+                continue
+            low = start_n & CHUNK_MASK if high == first else 0
+            top = end_n & CHUNK_MASK if high == last else CHUNK_MASK
+            if isinstance(chunk, int):
+                chunk &= ((1 << (top + 1)) - 1) >> low << low
+            else:
+                chunk = chunk[bisect_left(chunk, low):bisect_right(chunk, top)]
+            if _size(chunk):
+                chunks[high] = chunk
+        return Bitmap(chunks)
+
+    def to_list(self):
+        """The members, ascending"""
+        ns = []
+        for high in sorted(self.chunks):
+            chunk = self.chunks[high]
+            base = high << CHUNK_BITS
+            ns.extend(base + low for low in (_int_to_lows(chunk) if isinstance(chunk, int) else chunk))
+        return ns
+
+    def nbytes(self):
+        return sum(CHUNK_SIZE // 8 if isinstance(chunk, int) else chunk.itemsize * len(chunk)
+                   for chunk in self.chunks.values())
+
+EMPTY = Bitmap()
+
+def _add(lists, key, n):
+    """Append n to the key's list (rows arrive in n order, so a repeat is always the last one)"""
+    ns = lists.get(key)
+    if ns is None:
+        ns = lists[key] = array('I')
+    if not ns or ns[-1] != n:
+        ns.append(n)
+
+def filter_keys(components=(), exact_match=False, component_type=''):
+    """The bitmap keys a search_entries filter intersects (empty when there is nothing to filter)"""
+    keys = []
+    for comp in components:
+        if comp['type'] == 'bipartite':
+            keys.append(('bipartite', comp['p1'], comp['p2']))
+        elif comp['type'] == 'complete':
+            keys.append(('complete', comp['p1']))
+    # As in search_entries: exact_match only applies alongside a component condition
+    if keys and exact_match:
+        keys.append(('partition_count', len(components)))
+    if component_type in ('complete', 'bipartite'):
+        keys.append((f'has_{component_type}',))
+    return keys
+
+class ComponentIndex:
+    """Bitmaps for one catalog, reloaded when its database files change"""
+
+    def __init__(self, db, chunk_size=10000, generation=None):
+        """generation: a shards.CatalogGeneration of db to share (one is made otherwise)"""
+        self.db = db
+        self.chunk_size = chunk_size
+        self.snapshot = None  # (generation, {key: Bitmap}), None until the first load
+        self.load_seconds = None
+        self._generation = generation or CatalogGeneration(db)
+        self._lock = Lock()
+        self._loader = None
+
+    def generation(self):
+        """((path, PRAGMA data_version), ...) over the catalog's files"""
+        return self._generation.current()
+
+    def load(self):
+        """Build every bitmap from the catalog now; returns the number of n indexed"""
+        # Taken first, so a commit during the load shows up as a change afterwards
+        generation = self.generation()
+        start = time.perf_counter()
+        lists = {}
+        columns = ('nvalue', 'partition_count', 'complete', 'complete_bipartite')
+        for row in self.db.iter_range(columns=columns, chunk_size=self.chunk_size):
+            n = row['nvalue']
+            _add(lists, ('stored',), n)
+            _add(lists, ('partition_count', row['partition_count']), n)
+            if row['complete']:
+                _add(lists, ('has_complete',), n)
+            if row['complete_bipartite']:
+                _add(lists, ('has_bipartite',), n)
+        for n, component_type, p1, p2, _, _ in self.db.iter_components(chunk_size=self.chunk_size):
+            if component_type == 'complete':
+                _add(lists, ('complete', p1), n)
+            else:
+                for key in ((p1, p2), (p1, None), (None, p2), (None, None)):
+                    _add(lists, ('bipartite', *key), n)
+        bitmaps = {key: Bitmap.from_sorted(ns) for key, ns in lists.items()}
+        with self._lock:
+            self.snapshot = (generation, bitmaps)
+            self.load_seconds = time.perf_counter() - start
+        return len(bitmaps.get(('stored',), EMPTY))
+
+    def refresh(self):
+        """Reload in a background thread, unless a reload is already running"""
+        with self._lock:
+            if self._loader is None or not self._loader.is_alive():
+                self._loader = Thread(target=self.load, name='component-index', daemon=True)
+                self._loader.start()
+
+    def search(self, start_n, end_n, components=(), exact_match=False, component_type=''):
+        """
+        The n in start_n..end_n that pass search_entries' component filters, ascending. None
+        when there is no filter (a plain range query) or the index is not loaded / out of date;
+        the caller then runs search_entries.
+        """
+        keys = filter_keys(components, exact_match, component_type)
+        if not keys:
+            return None
+        snapshot = self.snapshot
+        if snapshot is None or snapshot[0] != self.generation():
+            self.refresh()
+            return None
+        bitmaps = snapshot[1]
+        operands = sorted((bitmaps.get(key, EMPTY) for key in keys), key=len)
+        result = operands[0].restrict(start_n, end_n)
+        for bitmap in operands[1:]:
+            if not result.chunks:
+                break
+            result &= bitmap
+        return result.to_list()
+
+    def stats(self):
+        """Key count, indexed n and memory of the loaded bitmaps"""
+        bitmaps = self.snapshot[1] if self.snapshot else {}
+        return {
+            'loaded': self.snapshot is not None,
+            'keys': len(bitmaps),
+            'entries': len(bitmaps.get(('stored',), EMPTY)),
+            'bytes': sum(bitmap.nbytes() for bitmap in bitmaps.values()),
+            'load_seconds': self.load_seconds,
+        }
+
+def _component(key):
+    """A parse_component_filter dict for a component key"""
+    if key[0] == 'complete':
+        return {'type': 'complete', 'p1': key[1]}
+    return {'type': 'bipartite', 'p1': key[1], 'p2': key[2]}
+
+def verify(db, max_keys=500):
+    """
+    Compare index searches against search_entries for up to max_keys component keys (spread
+    over all of them), alone, with exact_match and with component_type; returns the mismatches
+    """
+    index = ComponentIndex(db)
+    index.load()
+    n_range = db.get_n_range()
+    if n_range is None:
+        print("Empty catalog")
+        return []
+    start_n, end_n = n_range
+    middle = (start_n + end_n) // 2
+    keys = sorted((key for key in index.snapshot[1] if key[0] in ('complete', 'bipartite')),
+                  key=lambda key: (key[0], *(-1 if part is None else part for part in key[1:])))
+    keys = keys[::max(1, len(keys) // max_keys)]
+    mismatches = []
+    index_time = sql_time = 0.0
+    for key in keys:
+        for components, exact_match, component_type, low, high in (
+                ([_component(key)], False, '', start_n, end_n),
+                ([_component(key)], True, '', start_n, middle),
+                ([_component(key), {'type': 'bipartite', 'p1': None, 'p2': None}], False, 'complete', middle, end_n)):
+            start = time.perf_counter()
+            found = index.search(low, high, components, exact_match, component_type)
+            index_time += time.perf_counter() - start
+            start = time.perf_counter()
+            expected = [row[0] for row in db.search_entries(low, high, components, exact_match, component_type)]
+            sql_time += time.perf_counter() - start
+            if found != expected:
+                mismatches.append((key, exact_match, component_type))
+                print(f"  {key} exact_match={exact_match} component_type={component_type!r}: "
+                      f"{len(found)} vs {len(expected)}")
+    searches = 3 * len(keys)
+    print(f"Checked {searches} searches over {len(keys)} keys: {len(mismatches)} mismatches")
+    if searches:
+        print(f"  index {index_time / searches * 1e6:.0f} µs/search, "
+              f"search_entries {sql_time / searches * 1e6:.0f} µs/search")
+    return mismatches
+
+if __name__ == "__main__":
+    from database import ZeroDivisorDatabase
+
+    if len(sys.argv) >= 2 and sys.argv[1] == 'verify':
+        db = ZeroDivisorDatabase(sys.argv[2]) if len(sys.argv) > 2 else ZeroDivisorDatabase()
+        sys.exit(1 if verify(db) else 0)
+    elif len(sys.argv) <= 2:
+        db = ZeroDivisorDatabase(sys.argv[1]) if len(sys.argv) > 1 else ZeroDivisorDatabase()
+        index = ComponentIndex(db)
+        index.load()
+        stats = index.stats()
+        print(f"Indexed {stats['entries']} entries under {stats['keys']} keys in {stats['load_seconds']:.2f}s, "
+              f"{stats['bytes'] / 1024:.1f} KiB of bitmaps")
+    else:
+        print("Usage:")
+        print("  python bitmap_index.py [db_path]")
+        print("  python bitmap_index.py verify [db_path]")
+        sys.exit(1)
@@ -2,6 +2,9 @@ import networkx as nx
 import matplotlib.pyplot as plt
 import sys
 import math
+import re
+from collections import Counter
+import numpy as np
 import pandas as pd
 
 def get_zero_divisors(n):
@@ -58,6 +61,43 @@ def get_exact_zero_divisors(n, zero_divisors):
                 exact_zero_divisors.append((x, y))
     return exact_zero_divisors
 
+PAIR_CHUNK_SIZE = 65536
+
+def iter_zero_divisors(n, chunk_size=PAIR_CHUNK_SIZE):
+    """
+    Streaming get_zero_divisors: the same (x, y) pairs in the same order, yielded in lists
+    of about chunk_size. x*y ≡ 0 (mod n) iff y is a multiple of n/gcd(x, n), so only the
+    pairs themselves are visited, never all n² candidates.
+    """
+    chunk = []
+    for x in range(n):
+        step = n // math.gcd(x, n)
+        chunk.extend((x, y) for y in range(0, n, step))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_exact_zero_divisors(n, chunk_size=PAIR_CHUNK_SIZE):
+    """
+    Streaming get_exact_zero_divisors: the same (x, y) pairs in the same order, in chunks.
+    ann(x) = ann(ann(y)) iff gcd(x, n) * gcd(y, n) = n (gcd(0, n) = n), so each x pairs
+    with the whole gcd class n/gcd(x, n).
+    """
+    classes = {}
+    for x in range(n):
+        classes.setdefault(math.gcd(x, n), []).append(x)
+
+    chunk = []
+    for x in range(n):
+        chunk.extend((x, y) for y in classes[n // math.gcd(x, n)])
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
 def draw_zero_divisor_graph(n, zero_divisors, save_graph=False):
     """
     Generates a readable and organized zero divisor graph, especially for dense cases.
@@ -242,7 +282,56 @@ def get_exact_components(n, exact_zero_divisors):
     component_descs.sort(key=lambda t: (len(t), t))
     return component_descs
 
-def build_catalog(max_n=100):
+def parse_components(desc):
+    """
+    Inverse of the exact_components description string: "(1,8),(2,4),4" -> [(1, 8), (2, 4), (4,)].
+    "", None, "None" and "0" give [].
+    """
+    if not desc or desc in ('None', '0'):
+        return []
+    return [(int(a), int(b)) if a else (int(single),)
+            for a, b, single in re.findall(r'\((\d+),(\d+)\)|(\d+)', desc)]
+
+def _catalog_from_db(max_n, db):
+    """
+    Catalog rows for 2..max_n read from db. Only n missing from the database are computed
+    (populate_db.calculate_graph_data, components from the signature cache) and written back.
+    """
+    from populate_db import calculate_graph_data
+    from signature_cache import SignatureCache
+    import number_sieve
+
+    stored = {row['nvalue']: row['exact_components_desc'] for row in db.iter_range(2, max_n)}
+    missing = [n for n in range(2, max_n + 1) if n not in stored]
+    if missing:
+        print(f"Computing {len(missing)} n missing from the database...")
+        cache = SignatureCache(db)
+        number_sieve.ensure(max_n)
+        for n in missing:
+            graph_data = calculate_graph_data(n, cache=cache)
+            db.insert_number_data(n, graph_data)
+            stored[n] = graph_data['comp_desc']
+        cache.flush()
+
+    catalog = []
+    for n in range(2, max_n + 1):
+        comp_str = stored[n]
+        catalog.append({
+            'n': n,
+            'exact_components': comp_str if comp_str else 'None',
+            'components': parse_components(comp_str)
+        })
+    return catalog
+
+def build_catalog(max_n=100, db=None):
+    """
+    Catalog of exact components for n = 2..max_n. With db (a ZeroDivisorDatabase) rows are
+    read from the database and only the missing n are computed; without it every n is
+    computed from scratch.
+    """
+    if db is not None:
+        return pd.DataFrame(_catalog_from_db(max_n, db))
+
     catalog = []
     for n in range(2, max_n + 1):
         zero_divisors = get_zero_divisors(n)
@@ -259,30 +348,90 @@ def build_catalog(max_n=100):
     df = pd.DataFrame(catalog)
     return df
 
-def filter_df(df, required_comps):
+def shape_label(comp):
+    """(4,) -> '4', (1, 8) -> '(1,8)', as in the exact_components strings"""
+    return str(comp[0]) if len(comp) == 1 else f'({comp[0]},{comp[1]})'
+
+def to_long(df):
+    """
+    Long, categorical form of a catalog DataFrame: one row per (n, shape) with the shape's
+    multiplicity in 'count'. 'shape' is a Categorical of labels ('4', '(1,8)') ordered like
+    the component lists, so filters work on its integer codes. An n without components keeps
+    one row with a missing shape and count 0.
+    """
+    ns, shapes, counts = [], [], []
+    for n, comps in zip(df['n'], df['components']):
+        if not comps:
+            ns.append(n)
+            shapes.append(None)
+            counts.append(0)
+            continue
+        for comp, count in Counter(comps).items():
+            ns.append(n)
+            shapes.append(comp)
+            counts.append(count)
+    categories = sorted({shape for shape in shapes if shape}, key=lambda t: (len(t), t))
+    labels = [shape_label(shape) if shape else None for shape in shapes]
+    return pd.DataFrame({
+        'n': ns,
+        'shape': pd.Categorical(labels, categories=[shape_label(shape) for shape in categories]),
+        'count': counts
+    })
+
+def filter_df(df, required_comps, exact=False):
     """
-    Filter the DataFrame to include only rows where all required_comps
-    are present in the 'components' list.
-    required_comps: list of tuples, e.g., [(1,8), (2,8)]
+    Filter the DataFrame to include only rows whose n has all required_comps.
+    df: a catalog from build_catalog, or its to_long form (then the long rows are returned).
+    required_comps: list of tuples, e.g., [(1,8), (2,8)]; a repeated shape is a multiplicity,
+    so [(2,4), (2,4)] needs at least two (2,4) components.
+    exact: the components must be exactly required_comps, nothing else.
     """
-    def has_all(row):
-        for req in required_comps:
-            if req not in row['components']:
-                return False
-        return True
-    filtered = df[df.apply(has_all, axis=1)]
-    return filtered
+    long_df = df if 'shape' in df.columns else to_long(df)
+    required = Counter(shape_label(comp) for comp in required_comps)
+    categories = long_df['shape'].cat.categories
+    if any(label not in categories for label in required):
+        return df.iloc[0:0]
+
+    if required:
+        # Required count per shape code; rows of other shapes need 0 and are dropped
+        need = pd.Series(required).reindex(categories, fill_value=0).to_numpy()
+        codes = long_df['shape'].cat.codes.to_numpy()
+        row_need = np.where(codes >= 0, need[codes], 0)
+        hits = long_df[(row_need > 0) & (long_df['count'].to_numpy() >= row_need)]
+        per_n = hits.groupby('n').size()
+        ns = per_n.index[per_n.to_numpy() == len(required)]
+    else:
+        ns = pd.Index(long_df['n'].unique())
+
+    if exact:
+        # Every required shape is there at least as often; equal totals leave no room for more
+        totals = long_df.groupby('n')['count'].sum()
+        ns = ns[totals.reindex(ns).to_numpy() == sum(required.values())]
+    return df[df['n'].isin(ns)]
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python3 catalog.py <mode> [args]")
         print("Modes:")
         print("  graph <n> [-s]: Generate graphs for a specific n (as before)")
-        print("  catalog <max_n>: Build and print catalog up to max_n")
-        print("  filter <max_n> <comp1> <comp2> ...: Build catalog and filter for components")
+        print("  catalog <max_n> [--long]: Build and print catalog up to max_n")
+        print("    --long: CSV with one row per (n, shape, count) instead of one row per n")
+        print("  filter <max_n> <comp1> <comp2> ... [--exact]: Build catalog and filter for components")
         print("    Components format: '4' for cliques, '(1,8)' for bipartite")
+        print("    Repeat a component to require it that many times; --exact: nothing else allowed")
+        print("  --db[=path]: Read catalog/filter from the database, computing only missing n")
         sys.exit(1)
 
+    # Optional flag: --db[=path] reads the catalog from the database (default zero_divisor_catalog.db)
+    # and computes only the n it is missing
+    db = None
+    for arg in sys.argv[2:]:
+        if arg == '--db' or arg.startswith('--db='):
+            from database import ZeroDivisorDatabase
+            db = ZeroDivisorDatabase(arg[5:]) if '=' in arg else ZeroDivisorDatabase()
+            sys.argv.remove(arg)
+            break
+
     mode = sys.argv[1]
 
     if mode == "graph":
@@ -307,15 +456,19 @@ if __name__ == "__main__":
         except:
             max_n = 100
         print(f"Building catalog up to {max_n}...")
-        df = build_catalog(max_n)
+        df = build_catalog(max_n, db)
         print(df[['n', 'exact_components']])
-        df.to_csv(f"catalog_up_to_{max_n}.csv", index=False)
-        print(f"Catalog saved to catalog_up_to_{max_n}.csv")
+        if '--long' in sys.argv:
+            to_long(df).to_csv(f"catalog_up_to_{max_n}_long.csv", index=False)
+            print(f"Catalog saved to catalog_up_to_{max_n}_long.csv")
+        else:
+            df.to_csv(f"catalog_up_to_{max_n}.csv", index=False)
+            print(f"Catalog saved to catalog_up_to_{max_n}.csv")
 
     elif mode == "filter":
         try:
             max_n = int(sys.argv[2])
-            comp_strs = sys.argv[3:]
+            comp_strs = [arg for arg in sys.argv[3:] if arg != '--exact']
         except:
             print("Error: Provide max_n and components.")
             sys.exit(1)
@@ -327,8 +480,8 @@ if __name__ == "__main__":
             else:
                 required_comps.append((int(s),))
         print(f"Building catalog up to {max_n} and filtering for {comp_strs}...")
-        df = build_catalog(max_n)
-        filtered = filter_df(df, required_comps)
+        df = build_catalog(max_n, db)
+        filtered = filter_df(df, required_comps, exact='--exact' in sys.argv)
         print(filtered[['n', 'exact_components']])
 
     else:
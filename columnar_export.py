@@ -0,0 +1,268 @@
+# columnar_export.py
+"""
+Columnar export and import of the catalog (Parquet or Arrow IPC) for analysis notebooks.
+
+An export is two files:
+    <prefix>_entries.<ext>     one row per n: the MyNumber summary and invariant columns, plus the components
+                               as list<struct<component_type, p1, p2>>
+    <prefix>_components.<ext>  the ExactConnection table exploded, one row per component:
+                               n, component_type, p1, p2, size, edges
+The database is streamed and written ROW_GROUP_SIZE entries at a time (a Parquet row group or
+an Arrow record batch each), so memory stays bounded. Vertex/edge lists are not exported.
+
+    python columnar_export.py export catalog [start_n end_n] [--arrow]
+    python columnar_export.py load catalog
+    python columnar_export.py import catalog [db_path]
+
+    entries, components = columnar_export.load_catalog('catalog')   # pandas DataFrames
+
+Requires pyarrow (pip install pyarrow).
+"""
+import os
+import sys
+import time
+import pandas as pd
+
+from database import INVARIANT_COLUMNS
+from graph_invariants import backfill
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; only this module needs it
+    pa = pq = None
+
+ROW_GROUP_SIZE = 100_000
+
+SUMMARY_COLUMNS = (
+    'nvalue', 'exact_components_desc', 'partition_count',
+    'zvertices_count', 'zedges_count', 'ezvertices_count', 'ezedges_count',
+    'complete', 'complete_bipartite', *INVARIANT_COLUMNS
+)
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Columnar export needs pyarrow: pip install pyarrow")
+
+def _schemas():
+    component = pa.struct([('component_type', pa.string()), ('p1', pa.int32()), ('p2', pa.int32())])
+    entries = pa.schema([
+        ('n', pa.int64()),
+        ('exact_components', pa.string()),
+        ('partition_count', pa.int32()),
+        ('zvertices_count', pa.int64()),
+        ('zedges_count', pa.int64()),
+        ('ezvertices_count', pa.int64()),
+        ('ezedges_count', pa.int64()),
+        ('complete', pa.int32()),
+        ('complete_bipartite', pa.int32()),
+        # graph_invariants.py columns; degree_distribution stays JSON text
+        *((column, pa.string() if sql_type == 'TEXT' else pa.int32())
+          for column, sql_type in INVARIANT_COLUMNS.items()),
+        ('components', pa.list_(component)),
+    ])
+    components = pa.schema([
+        ('n', pa.int64()),
+        ('component_type', pa.dictionary(pa.int8(), pa.string())),
+        ('p1', pa.int32()),
+        ('p2', pa.int32()),
+        ('size', pa.int32()),
+        ('edges', pa.int64()),
+    ])
+    return entries, components
+
+def export_paths(prefix, fmt='parquet'):
+    """(entries file, components file) for an export prefix"""
+    ext = 'parquet' if fmt == 'parquet' else 'arrow'
+    return f'{prefix}_entries.{ext}', f'{prefix}_components.{ext}'
+
+def _detect_format(prefix):
+    for fmt in ('parquet', 'arrow'):
+        if os.path.exists(export_paths(prefix, fmt)[0]):
+            return fmt
+    raise FileNotFoundError(f"No export found for {prefix}")
+
+class _TableWriter:
+    """Parquet writer or Arrow IPC file writer; each write() becomes one row group / batch"""
+
+    def __init__(self, path, schema, fmt):
+        self.fmt = fmt
+        if fmt == 'parquet':
+            self._writer = pq.ParquetWriter(path, schema, compression='zstd')
+        else:
+            self._writer = pa.ipc.new_file(path, schema)
+
+    def write(self, table):
+        if self.fmt == 'parquet':
+            self._writer.write_table(table, row_group_size=max(len(table), 1))
+        else:
+            self._writer.write_table(table, max_chunksize=max(len(table), 1))
+
+    def close(self):
+        self._writer.close()
+
+def _chunks(db, start_n, end_n, chunk_size):
+    """(summary rows, component rows) for each run of chunk_size entries, both in n order"""
+    components = db.iter_components(start_n, end_n)
+    pending = next(components, None)
+    entries = []
+    for row in db.iter_range(start_n, end_n, columns=SUMMARY_COLUMNS, chunk_size=chunk_size):
+        entries.append(row)
+        if len(entries) < chunk_size:
+            continue
+        chunk_components = []
+        while pending is not None and pending[0] <= row['nvalue']:
+            chunk_components.append(pending)
+            pending = next(components, None)
+        yield entries, chunk_components
+        entries = []
+    if entries:
+        yield entries, [pending, *components] if pending is not None else []
+
+def _entries_table(entries, components, schema):
+    by_n = {}
+    for n, ctype, p1, p2, _, _ in components:
+        by_n.setdefault(n, []).append({'component_type': ctype, 'p1': p1, 'p2': p2})
+    columns = {name: [row[column] for row in entries]
+               for name, column in zip(schema.names, SUMMARY_COLUMNS)}
+    columns['exact_components'] = [desc or '' for desc in columns['exact_components']]
+    columns['components'] = [by_n.get(row['nvalue'], []) for row in entries]
+    return pa.table(columns, schema=schema)
+
+def _components_table(components, schema):
+    columns = list(zip(*components)) if components else [[] for _ in schema.names]
+    return pa.table(dict(zip(schema.names, columns)), schema=schema)
+
+def export_catalog(db, prefix, fmt='parquet', start_n=1, end_n=None, row_group_size=ROW_GROUP_SIZE):
+    """
+    Stream the catalog (a ZeroDivisorDatabase or shards.ShardedCatalog) into the two export
+    files. fmt: 'parquet' or 'arrow'. Returns (entry count, component count).
+    """
+    _require_pyarrow()
+    entries_schema, components_schema = _schemas()
+    entries_path, components_path = export_paths(prefix, fmt)
+    entries_writer = _TableWriter(entries_path, entries_schema, fmt)
+    components_writer = _TableWriter(components_path, components_schema, fmt)
+    entry_count = component_count = 0
+    try:
+        for entries, components in _chunks(db, start_n, end_n, row_group_size):
+            entries_writer.write(_entries_table(entries, components, entries_schema))
+            components_writer.write(_components_table(components, components_schema))
+            entry_count += len(entries)
+            component_count += len(components)
+    finally:
+        entries_writer.close()
+        components_writer.close()
+    return entry_count, component_count
+
+def _read_table(path, fmt):
+    if fmt == 'parquet':
+        return pq.read_table(path)
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all()
+
+def load_catalog(prefix, fmt=None, as_pandas=True):
+    """(entries, components) of an export, as pandas DataFrames or (as_pandas=False) Arrow tables"""
+    _require_pyarrow()
+    fmt = fmt or _detect_format(prefix)
+    entries_path, components_path = export_paths(prefix, fmt)
+    entries = _read_table(entries_path, fmt)
+    components = _read_table(components_path, fmt)
+    if as_pandas:
+        # Arrow-backed columns: no copy into numpy/Python objects, p2 stays a nullable integer
+        # and 'components' a list<struct> column
+        return entries.to_pandas(types_mapper=pd.ArrowDtype), components.to_pandas(types_mapper=pd.ArrowDtype)
+    return entries, components
+
+def _iter_batches(path, fmt):
+    if fmt == 'parquet':
+        yield from pq.ParquetFile(path).iter_batches(batch_size=ROW_GROUP_SIZE)
+        return
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+def import_catalog(db, prefix, fmt=None):
+    """
+    Load an export into a ZeroDivisorDatabase, one batch per transaction; n already stored
+    are replaced. Rows come back summary-only ("0" vertex/edge lists, as for n > 6150).
+    The analytics tables are rebuilt at the end, and invariants missing from the export
+    (files written before those columns existed) are computed. Returns the number of entries imported.
+    """
+    _require_pyarrow()
+    fmt = fmt or _detect_format(prefix)
+    entries_path, _ = export_paths(prefix, fmt)
+    conn = db._get_connection()
+    cursor = conn.cursor()
+    count = 0
+    for batch in _iter_batches(entries_path, fmt):
+        rows = batch.to_pylist()
+        ns = [(row['n'],) for row in rows]
+        cursor.executemany('''
+            DELETE FROM ExactConnection
+            WHERE entry_id IN (SELECT entry_id FROM MyNumber WHERE nvalue = ?)
+        ''', ns)
+        cursor.executemany('DELETE FROM GraphStore WHERE nvalue = ?', ns)
+        cursor.executemany('DELETE FROM MyNumber WHERE nvalue = ?', ns)
+        cursor.executemany(f'''
+            INSERT INTO MyNumber (
+                nvalue,
+                zvertices, zedges, zself_loops, zvertices_count, zedges_count, z_structure,
+                ezvertices, ezedges, ezself_loops, ezvertices_count, ezedges_count, ez_structure,
+                complete, complete_bipartite, exact_components_desc, partition_count,
+                {', '.join(INVARIANT_COLUMNS)}
+            ) VALUES (?, '0', '0', '0', ?, ?, '0', '0', '0', '0', ?, ?, '0', ?, ?, ?, ?,
+                      {', '.join('?' * len(INVARIANT_COLUMNS))})
+        ''', [(
+            row['n'], row['zvertices_count'], row['zedges_count'],
+            row['ezvertices_count'], row['ezedges_count'],
+            row['complete'], row['complete_bipartite'], row['exact_components'], row['partition_count'],
+            *(row.get(column) for column in INVARIANT_COLUMNS)
+        ) for row in rows])
+        cursor.executemany('''
+            INSERT INTO ExactConnection (entry_id, component_type, p1, p2)
+            VALUES ((SELECT entry_id FROM MyNumber WHERE nvalue = ?), ?, ?, ?)
+        ''', [(row['n'], comp['component_type'], comp['p1'], comp['p2'])
+              for row in rows for comp in row['components']])
+        conn.commit()
+        count += len(rows)
+    conn.close()
+    db.rebuild_stats()
+    backfill(db)
+    return count
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != '--arrow']
+    if len(args) < 2 or args[0] not in ('export', 'load', 'import'):
+        print("Usage:")
+        print("  python columnar_export.py export <prefix> [start_n end_n] [--arrow]")
+        print("  python columnar_export.py load <prefix>")
+        print("  python columnar_export.py import <prefix> [db_path]")
+        sys.exit(1)
+    try:
+        _require_pyarrow()
+    except ImportError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    from database import ZeroDivisorDatabase
+
+    command, prefix = args[0], args[1]
+    start = time.perf_counter()
+    if command == 'export':
+        fmt = 'arrow' if '--arrow' in sys.argv else 'parquet'
+        start_n = int(args[2]) if len(args) > 2 else 1
+        end_n = int(args[3]) if len(args) > 3 else None
+        entry_count, component_count = export_catalog(ZeroDivisorDatabase(), prefix, fmt, start_n, end_n)
+        print(f"Exported {entry_count} entries and {component_count} components to "
+              f"{', '.join(export_paths(prefix, fmt))} in {time.perf_counter() - start:.2f}s")
+    elif command == 'load':
+        entries, components = load_catalog(prefix)
+        print(f"Loaded {len(entries)} entries and {len(components)} components "
+              f"in {time.perf_counter() - start:.3f}s")
+        print(entries.drop(columns=['components']).head())
+    else:
+        db = ZeroDivisorDatabase(args[2]) if len(args) > 2 else ZeroDivisorDatabase()
+        count = import_catalog(db, prefix)
+        print(f"Imported {count} entries into {db.db_path} in {time.perf_counter() - start:.2f}s")
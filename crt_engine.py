@@ -0,0 +1,253 @@
+# crt_engine.py
+"""
+Exact zero divisors and exact components of Z_n through the Chinese remainder theorem.
+
+Z_n ≅ Π Z_{p^k}, and annihilators factor across the product: writing v_p(x) for the
+p-adic valuation of x mod p^k (capped at k), ann(x) = ann(ann(y)) in Z_n iff
+v_p(x) + v_p(y) = k in every piece. So everything is assembled from per-piece structures:
+the valuation classes of Z_{p^k} (the residues with v_p = v, φ(p^(k-v)) of them, and 0
+for v = k), which PieceCache computes once and shares between every n containing p^k.
+Populating a range reuses the pieces for 2^k, 3^k, ... across all the n that contain them;
+the cache keeps the PIECE_CACHE_SIZE most recently used, so a run's memory stays bounded.
+
+A class of Z_n is a valuation vector (v_p); its elements are the CRT combinations
+Σ a_p * e_p mod n of piece residues a_p from class v_p, where e_p ≡ 1 (mod p^k) and
+≡ 0 mod the other prime powers. x pairs with the whole class (k_p - v_p).
+
+get_exact_zero_divisors / iter_exact_zero_divisors give the same pairs in the same order as
+the functions of the same name in catalog.py; get_exact_components gives the same list as
+catalog.get_exact_components.
+
+    python crt_engine.py 360                # pieces, classes and components of one n
+    python crt_engine.py verify 2 300       # compare against catalog.py's brute force
+    python crt_engine.py bench 5000 5100    # against catalog.iter_exact_zero_divisors + GraphRecord.from_pairs
+"""
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import chain, product, repeat
+
+from graph_record import GraphRecord
+from number_sieve import factorize
+
+PAIR_CHUNK_SIZE = 65536
+
+# Pieces kept by a PieceCache; the least recently used is dropped beyond this
+PIECE_CACHE_SIZE = 256
+
+class Piece:
+    """
+    Valuation classes of Z_{p^k}: classes[v] holds the residues with v_p = v, ascending.
+    Class k - 1 is every nonzero multiple of p^(k-1), kept as a range (for k = 1 that is the
+    p - 1 units of Z_p, the bulk of a large prime's piece); the others are array('I').
+    """
+    __slots__ = ('p', 'k', 'modulus', 'classes')
+
+    def __init__(self, p, k):
+        self.p = p
+        self.k = k
+        self.modulus = p ** k
+        classes = []
+        for v in range(k - 1):
+            # Multiples of p^v that are not multiples of p^(v+1)
+            step = p ** v
+            classes.append(array('I', (a for a in range(step, self.modulus, step) if a % (step * p))))
+        classes.append(range(p ** (k - 1), self.modulus, p ** (k - 1)))
+        classes.append((0,))
+        self.classes = classes
+
+    def sizes(self):
+        return [len(residues) for residues in self.classes]
+
+class PieceCache:
+    """
+    Pieces by (p, k), shared across n, least recently used first out beyond max_pieces;
+    hits/misses show how much work was reused
+    """
+
+    def __init__(self, max_pieces=PIECE_CACHE_SIZE):
+        self.pieces = OrderedDict()
+        self.max_pieces = max_pieces
+        self.hits = 0
+        self.misses = 0
+
+    def piece(self, p, k):
+        piece = self.pieces.get((p, k))
+        if piece is None:
+            self.misses += 1
+            piece = self.pieces[(p, k)] = Piece(p, k)
+            if len(self.pieces) > self.max_pieces:
+                self.pieces.popitem(last=False)
+        else:
+            self.hits += 1
+            self.pieces.move_to_end((p, k))
+        return piece
+
+    def pieces_of(self, n):
+        """n's pieces, primes ascending"""
+        return [self.piece(p, k) for p, k in factorize(n)]
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+# Shared by the module-level functions
+_cache = PieceCache()
+
+def _idempotents(n, pieces):
+    """e_p for each piece: ≡ 1 mod p^k and ≡ 0 mod n / p^k"""
+    return [(n // piece.modulus) * pow(n // piece.modulus, -1, piece.modulus) % n for piece in pieces]
+
+def _class_members(n, pieces, idempotents, valuations):
+    """Elements of Z_n with the given valuation vector, ascending"""
+    members = [0]
+    for piece, e, v in zip(pieces, idempotents, valuations):
+        members = [(m + a * e) % n for m in members for a in piece.classes[v]]
+    members.sort()
+    return members
+
+def exact_classes(n, cache=None):
+    """{valuation vector: ascending members} for every class of Z_n (units and 0 included)"""
+    pieces = (cache or _cache).pieces_of(n)
+    idempotents = _idempotents(n, pieces)
+    return {
+        valuations: _class_members(n, pieces, idempotents, valuations)
+        for valuations in product(*(range(piece.k + 1) for piece in pieces))
+    }
+
+def _partners(n, cache):
+    """partners[x]: the (shared, ascending) member list of the class x pairs with"""
+    ks = [k for _, k in factorize(n)]
+    classes = exact_classes(n, cache)
+    partners = [None] * n
+    for valuations, members in classes.items():
+        partner = classes[tuple(k - v for k, v in zip(ks, valuations))]
+        for x in members:
+            partners[x] = partner
+    return partners
+
+def iter_exact_zero_divisors(n, chunk_size=PAIR_CHUNK_SIZE, cache=None):
+    """catalog.iter_exact_zero_divisors from the CRT classes: same pairs, same order, in chunks"""
+    partners = _partners(n, cache)
+    chunk = []
+    for x in range(n):
+        ys = partners[x]
+        chunk.extend(zip(repeat(x, len(ys)), ys))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def get_exact_zero_divisors(n, cache=None):
+    """All exact zero divisor pairs (x, y) of Z_n, in catalog.get_exact_zero_divisors order"""
+    return [pair for chunk in iter_exact_zero_divisors(n, cache=cache) for pair in chunk]
+
+def exact_graph_record(n, cache=None):
+    """
+    GraphRecord.from_pairs(n, iter_exact_zero_divisors(n)), built from the classes without
+    streaming the pairs: each x only visits its partners y >= x (a bisect into the class)
+    """
+    partners = _partners(n, cache)
+    edges = array('I')
+    self_loops = array('I')
+    vertices = array('I')
+    for x in range(1, n):
+        ys = partners[x]
+        if ys[0] == 0:
+            continue  # a unit, whose only partner is 0
+        vertices.append(x)
+        start = bisect_left(ys, x)
+        if start == len(ys):
+            continue
+        if ys[start] == x:
+            self_loops.append(x)
+        tail = ys[start:]
+        edges.extend(chain.from_iterable(zip(repeat(x, len(tail)), tail)))
+    return GraphRecord(n, vertices, edges, self_loops)
+
+def get_exact_components(n, cache=None):
+    """
+    Components of Γ_E(Z_n) from the piece class sizes alone: the class v joins the class
+    k - v, giving K_{|v|,|k-v|}, or a clique K_|v| when v = k - v; units and 0 are left out
+    """
+    pieces = (cache or _cache).pieces_of(n)
+    sizes = [piece.sizes() for piece in pieces]
+    ks = [piece.k for piece in pieces]
+    comps = []
+    for valuations in product(*(range(k + 1) for k in ks)):
+        partner = tuple(k - v for k, v in zip(ks, valuations))
+        if not any(valuations) or not any(partner) or partner < valuations:
+            continue
+        a = b = 1
+        for piece_sizes, v, w in zip(sizes, valuations, partner):
+            a *= piece_sizes[v]
+            b *= piece_sizes[w]
+        if partner != valuations:
+            comps.append((2,) if a == b == 1 else (min(a, b), max(a, b)))
+        elif a > 1:
+            comps.append((a,))
+    comps.sort(key=lambda t: (len(t), t))
+    return comps
+
+def verify(start_n, end_n):
+    """Compare pairs and components against catalog.py's brute force; returns the mismatching n"""
+    from catalog import get_zero_divisors, get_exact_zero_divisors as brute_pairs
+    from catalog import get_exact_components as brute_components
+
+    cache = PieceCache()
+    mismatches = []
+    for n in range(start_n, end_n + 1):
+        expected = brute_pairs(n, get_zero_divisors(n))
+        pairs_match = get_exact_zero_divisors(n, cache) == expected
+        record = GraphRecord.from_pairs(n, [expected])
+        built = exact_graph_record(n, cache)
+        pairs_match = pairs_match and (built.vertices, built.edges, built.self_loops) == \
+            (record.vertices, record.edges, record.self_loops)
+        components_match = get_exact_components(n, cache) == brute_components(n, expected)
+        if not (pairs_match and components_match):
+            mismatches.append(n)
+            print(f"  n={n}: pairs {'ok' if pairs_match else 'differ'}, "
+                  f"components {'ok' if components_match else 'differ'}")
+    print(f"Checked n={start_n}..{end_n}: {len(mismatches)} mismatches, "
+          f"{len(cache.pieces)} pieces, hit rate {cache.hit_rate():.1%}")
+    return mismatches
+
+def bench(start_n, end_n):
+    """Time pair generation for a range against catalog.iter_exact_zero_divisors"""
+    import catalog
+
+    for name, generate in (('catalog', catalog.iter_exact_zero_divisors), ('crt', iter_exact_zero_divisors)):
+        start = time.perf_counter()
+        count = sum(len(chunk) for n in range(start_n, end_n + 1) for chunk in generate(n))
+        print(f"{name:>8}: {count} pairs in {time.perf_counter() - start:.2f}s")
+
+    cache = PieceCache()
+    for name, build in (('pairs', lambda n: GraphRecord.from_pairs(n, catalog.iter_exact_zero_divisors(n))),
+                        ('classes', lambda n: exact_graph_record(n, cache))):
+        start = time.perf_counter()
+        count = sum(build(n).edge_count for n in range(start_n, end_n + 1))
+        print(f"{name:>8}: exact GraphRecords ({count} edges) in {time.perf_counter() - start:.2f}s")
+    print(f"Piece cache: {len(cache.pieces)} pieces, hit rate {cache.hit_rate():.1%}")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] in ('verify', 'bench'):
+        start_n, end_n = int(sys.argv[2]), int(sys.argv[3])
+        if sys.argv[1] == 'bench':
+            bench(start_n, end_n)
+        else:
+            sys.exit(1 if verify(start_n, end_n) else 0)
+    elif len(sys.argv) == 2:
+        n = int(sys.argv[1])
+        for piece in _cache.pieces_of(n):
+            print(f"Z_{piece.modulus} (p={piece.p}, k={piece.k}): class sizes {piece.sizes()}")
+        print(f"{len(exact_classes(n))} classes")
+        print(get_exact_components(n))
+    else:
+        print("Usage:")
+        print("  python crt_engine.py <n>")
+        print("  python crt_engine.py verify <start_n> <end_n>")
+        print("  python crt_engine.py bench <start_n> <end_n>")
+        sys.exit(1)
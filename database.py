@@ -2,14 +2,162 @@
 import sqlite3
 import json
 from typing import List, Tuple, Optional
+from query_log import execute_logged
+from graph_record import GraphRecord
+
+def _shape_key(component_type, p1, p2):
+    """Shape key in exact_components_desc notation: '4' for K_4, '(1,8)' for K_{1,8}"""
+    return str(p1) if component_type == 'complete' else f'({p1},{p2})'
+
+def _summarize_components(connections):
+    """Per-entry summary of (component_type, p1, p2) rows for the EntryStats table"""
+    cliques = [p1 for ctype, p1, p2 in connections if ctype == 'complete']
+    bipartites = [(p1, p2) for ctype, p1, p2 in connections if ctype == 'bipartite']
+    largest = max(bipartites, key=lambda pair: (pair[0] + pair[1], pair[1]), default=(None, None))
+    return {
+        'complete_count': len(cliques),
+        'bipartite_count': len(bipartites),
+        'type_count': (1 if cliques else 0) + (1 if bipartites else 0),
+        'max_clique': max(cliques, default=None),
+        'max_bipartite_p1': largest[0],
+        'max_bipartite_p2': largest[1],
+        'max_bipartite_sum': largest[0] + largest[1] if bipartites else None
+    }
+
+# Derived ExactConnection columns (SQLite generated columns, so they can be indexed)
+COMPONENT_GENERATED_COLUMNS = {
+    'comp_size': "INTEGER GENERATED ALWAYS AS "
+                 "(CASE WHEN component_type = 'complete' THEN p1 ELSE p1 + p2 END) VIRTUAL",
+    'comp_edges': "INTEGER GENERATED ALWAYS AS "
+                  "(CASE WHEN component_type = 'complete' THEN p1 * (p1 - 1) / 2 ELSE p1 * p2 END) VIRTUAL",
+    'shape_key': "TEXT GENERATED ALWAYS AS "
+                 "(CASE WHEN component_type = 'complete' THEN CAST(p1 AS TEXT) "
+                 "ELSE '(' || p1 || ',' || p2 || ')' END) VIRTUAL",
+}
+
+# Γ(Z_n) invariants from graph_invariants.py, added to MyNumber in place; NULL until computed
+INVARIANT_COLUMNS = {
+    'diameter': 'INTEGER',
+    'girth': 'INTEGER',  # NULL also for an acyclic graph
+    'clique_number': 'INTEGER',
+    'chromatic_number': 'INTEGER',
+    'min_degree': 'INTEGER',
+    'max_degree': 'INTEGER',
+    'degree_distribution': 'TEXT',  # JSON {degree: vertex count}
+}
+
+# The ones /api/entries can filter on with min_<column> / max_<column>
+INVARIANT_FILTERS = ('diameter', 'girth', 'clique_number', 'chromatic_number', 'min_degree', 'max_degree')
+
+# The /api/entries row: search_entries / get_entries return these columns, in this order
+ENTRY_SUMMARY_COLUMNS = ', '.join([
+    'mn.nvalue', 'mn.exact_components_desc', 'mn.partition_count',
+    'mn.zvertices_count', 'mn.zedges_count', 'mn.ezvertices_count', 'mn.ezedges_count',
+    'mn.complete', 'mn.complete_bipartite', *('mn.' + column for column in INVARIANT_FILTERS)
+])
+
+def _invariant_conditions(invariants):
+    """SQL conditions and parameters for {column: (min, max)} over INVARIANT_FILTERS"""
+    conditions = []
+    params = []
+    for column, (low, high) in (invariants or {}).items():
+        if column not in INVARIANT_FILTERS:
+            raise ValueError(f"Unknown invariant: {column}")
+        if low is not None:
+            conditions.append(f'mn.{column} >= ?')
+            params.append(low)
+        if high is not None:
+            conditions.append(f'mn.{column} <= ?')
+            params.append(high)
+    return conditions, params
+
+def _invariants_from_row(values):
+    invariants = dict(zip(INVARIANT_COLUMNS, values))
+    if invariants.get('degree_distribution'):
+        invariants['degree_distribution'] = json.loads(invariants['degree_distribution'])
+    return invariants
+
+def _json_column(value, empty):
+    """Decode a graph JSON column; "0" (graph not stored as JSON) decodes to empty"""
+    return json.loads(value) if value and value != '0' else empty
+
+def _graph_fields(prefix, columns, record):
+    """<prefix>vertices/edges/self_loops/_structure from the JSON columns, or from a GraphRecord"""
+    if record is not None:
+        structure = record.to_structure()
+        vertices, edges, self_loops = structure['vertices'], structure['edges'], structure['self_loops']
+    else:
+        vertices, edges, self_loops = (_json_column(value, []) for value in columns[:3])
+        structure = _json_column(columns[3], {})
+    return {
+        f'{prefix}vertices': vertices,
+        f'{prefix}edges': edges,
+        f'{prefix}self_loops': self_loops,
+        f'{prefix}_structure': structure,
+    }
+
+def _entry_from_row(result, connections, graphs=None):
+    """
+    Turn a SELECT * FROM MyNumber row plus its ExactConnection rows into an entry dict.
+    graphs: {'z': GraphRecord, 'ez': GraphRecord} read from the edge store, used instead of
+    the JSON columns (which hold "0" for graphs kept there)
+    """
+    graphs = graphs or {}
+    return {
+        'entry_id': result[0],
+        'nvalue': result[1],
+        # Zero divisor graph data
+        **_graph_fields('z', (result[2], result[3], result[4], result[7]), graphs.get('z')),
+        'zvertices_count': result[5],
+        'zedges_count': result[6],
+        # Exact zero divisor graph data
+        **_graph_fields('ez', (result[8], result[9], result[10], result[13]), graphs.get('ez')),
+        'ezvertices_count': result[11],
+        'ezedges_count': result[12],
+        # Component analysis
+        'complete': result[14],
+        'complete_bipartite': result[15],
+        'exact_components_desc': result[16],
+        'partition_count': result[17],
+        'exact_components': connections,
+        # Γ(Z_n) invariants (columns added after the original schema)
+        'invariants': _invariants_from_row(result[18:18 + len(INVARIANT_COLUMNS)])
+    }
+
+def _as_list(value):
+    """Accept graph data either as a list/set or as an already JSON-encoded string"""
+    if isinstance(value, str):
+        # calculate_graph_data pre-encodes lists, and stores "0" when n > 6150
+        decoded = json.loads(value)
+        return decoded if isinstance(decoded, list) else []
+    return list(value)
+
+def _graph_columns(graph_data, record_key, vertices_key, edges_key, self_loops_key):
+    """
+    JSON (vertices, edges, self_loops, structure) column values for one graph. A GraphRecord
+    under record_key is encoded directly; otherwise the separate lists are used.
+    """
+    record = graph_data.get(record_key)
+    if record is not None:
+        return record.json_columns()
+    vertices = _as_list(graph_data.get(vertices_key, []))
+    edges = [list(pair) for pair in _as_list(graph_data.get(edges_key, []))]
+    self_loops = _as_list(graph_data.get(self_loops_key, []))
+    structure = json.dumps({'vertices': vertices, 'edges': edges, 'self_loops': self_loops})
+    return json.dumps(vertices), json.dumps(edges), json.dumps(self_loops), structure
 
 class ZeroDivisorDatabase:
-    def __init__(self, db_path="zero_divisor_catalog.db"):
+    def __init__(self, db_path="zero_divisor_catalog.db", read_only=False):
+        """read_only: open the file as-is (no schema setup) with read-only connections"""
         self.db_path = db_path
-        self.init_database()
-    
+        self.read_only = read_only
+        if not read_only:
+            self.init_database()
+
     def _get_connection(self):
         """Get database connection (for internal use)"""
+        if self.read_only:
+            return sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
         return sqlite3.connect(self.db_path)
     
     def init_database(self):
@@ -59,49 +207,333 @@ class ZeroDivisorDatabase:
             )
         ''')
         
+        # Size (vertices), edge count and shape key of each component, added in place
+        # so existing databases pick them up without a rebuild
+        cursor.execute('PRAGMA table_xinfo(ExactConnection)')
+        existing_columns = {row[1] for row in cursor.fetchall()}
+        for column, definition in COMPONENT_GENERATED_COLUMNS.items():
+            if column not in existing_columns:
+                cursor.execute(f'ALTER TABLE ExactConnection ADD COLUMN {column} {definition}')
+        
+        # Γ(Z_n) invariant columns, likewise added to existing databases
+        cursor.execute('PRAGMA table_info(MyNumber)')
+        existing_columns = {row[1] for row in cursor.fetchall()}
+        for column, definition in INVARIANT_COLUMNS.items():
+            if column not in existing_columns:
+                cursor.execute(f'ALTER TABLE MyNumber ADD COLUMN {column} {definition}')
+        
+        # Materialized analytics: one summary row per entry, maintained by insert_number_data
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS EntryStats (
+                entry_id INTEGER PRIMARY KEY,
+                nvalue INTEGER NOT NULL UNIQUE,
+                partition_count INTEGER,
+                complete_count INTEGER,
+                bipartite_count INTEGER,
+                type_count INTEGER,
+                max_clique INTEGER,
+                max_bipartite_p1 INTEGER,
+                max_bipartite_p2 INTEGER,
+                max_bipartite_sum INTEGER,
+                FOREIGN KEY (entry_id) REFERENCES MyNumber (entry_id)
+            )
+        ''')
+        
+        # Materialized analytics: how many entries contain each component shape
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ShapeFrequency (
+                shape_key TEXT PRIMARY KEY,
+                component_type TEXT NOT NULL,
+                p1 INTEGER NOT NULL,
+                p2 INTEGER,
+                entry_count INTEGER NOT NULL,
+                occurrences INTEGER NOT NULL
+            )
+        ''')
+        
+        # Where each graph lives in the edge store file, when it is kept there (see edge_store.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS GraphStore (
+                nvalue INTEGER NOT NULL,
+                graph TEXT NOT NULL CHECK(graph IN ('z', 'ez')),
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                PRIMARY KEY (nvalue, graph)
+            )
+        ''')
+        
+        # Component skeletons memoized by exponent signature (see signature_cache.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS SignatureSkeleton (
+                signature TEXT PRIMARY KEY,
+                skeleton TEXT NOT NULL
+            )
+        ''')
+        
+        # Adjacency/Laplacian spectra of Γ(Z_n) and Γ_E(Z_n), filled by spectrum.py
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS Spectrum (
+                nvalue INTEGER NOT NULL,
+                graph TEXT NOT NULL CHECK(graph IN ('zero', 'exact')),
+                matrix TEXT NOT NULL CHECK(matrix IN ('adjacency', 'laplacian')),
+                eigenvalues TEXT NOT NULL,
+                spectral_radius REAL,
+                PRIMARY KEY (nvalue, graph, matrix)
+            )
+        ''')
+        
         # Create indexes for better performance
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_nvalue ON MyNumber(nvalue)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_clique_number ON MyNumber(clique_number)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_diameter_girth ON MyNumber(diameter, girth)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_entry_id ON ExactConnection(entry_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_component_type ON ExactConnection(component_type)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_component_size ON ExactConnection(component_type, comp_size)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_component_edges ON ExactConnection(component_type, comp_edges)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_component_shape ON ExactConnection(shape_key)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_stats_partition ON EntryStats(partition_count)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_stats_max_clique ON EntryStats(max_clique)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_stats_max_bipartite ON EntryStats(max_bipartite_sum)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_stats_types ON EntryStats(type_count, partition_count)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_shape_entries ON ShapeFrequency(entry_count)')
+        
+        conn.commit()
+        
+        # Databases created before the analytics tables existed get a one-time backfill
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM EntryStats), EXISTS (SELECT 1 FROM MyNumber)')
+        has_stats, has_entries = cursor.fetchone()
+        conn.close()
+        if has_entries and not has_stats:
+            self.rebuild_stats()
+    
+    def _add_entry_stats(self, cursor, entry_id):
+        """Fold one entry's components into EntryStats and ShapeFrequency"""
+        cursor.execute('SELECT nvalue, partition_count FROM MyNumber WHERE entry_id = ?', (entry_id,))
+        nvalue, partition_count = cursor.fetchone()
+        cursor.execute('SELECT component_type, p1, p2 FROM ExactConnection WHERE entry_id = ?', (entry_id,))
+        connections = cursor.fetchall()
+        
+        summary = _summarize_components(connections)
+        cursor.execute('''
+            INSERT OR REPLACE INTO EntryStats (
+                entry_id, nvalue, partition_count, complete_count, bipartite_count, type_count,
+                max_clique, max_bipartite_p1, max_bipartite_p2, max_bipartite_sum
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            entry_id, nvalue, partition_count,
+            summary['complete_count'], summary['bipartite_count'], summary['type_count'],
+            summary['max_clique'], summary['max_bipartite_p1'], summary['max_bipartite_p2'],
+            summary['max_bipartite_sum']
+        ))
+        
+        shape_counts = {}
+        for ctype, p1, p2 in connections:
+            key = (ctype, p1, p2)
+            shape_counts[key] = shape_counts.get(key, 0) + 1
+        for (ctype, p1, p2), count in shape_counts.items():
+            cursor.execute('''
+                INSERT INTO ShapeFrequency (shape_key, component_type, p1, p2, entry_count, occurrences)
+                VALUES (?, ?, ?, ?, 1, ?)
+                ON CONFLICT(shape_key) DO UPDATE SET
+                    entry_count = entry_count + 1,
+                    occurrences = occurrences + excluded.occurrences
+            ''', (_shape_key(ctype, p1, p2), ctype, p1, p2, count))
+    
+    def _remove_entry_stats(self, cursor, entry_id):
+        """Undo _add_entry_stats for an entry that is about to be replaced or deleted"""
+        cursor.execute('''
+            SELECT component_type, p1, p2, COUNT(*)
+            FROM ExactConnection WHERE entry_id = ?
+            GROUP BY component_type, p1, p2
+        ''', (entry_id,))
+        for ctype, p1, p2, count in cursor.fetchall():
+            cursor.execute('''
+                UPDATE ShapeFrequency
+                SET entry_count = entry_count - 1, occurrences = occurrences - ?
+                WHERE shape_key = ?
+            ''', (count, _shape_key(ctype, p1, p2)))
+        cursor.execute('DELETE FROM ShapeFrequency WHERE entry_count <= 0')
+        cursor.execute('DELETE FROM EntryStats WHERE entry_id = ?', (entry_id,))
+    
+    def rebuild_stats(self):
+        """Recompute EntryStats and ShapeFrequency from scratch (one pass over ExactConnection)"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM EntryStats')
+        cursor.execute('DELETE FROM ShapeFrequency')
+        
+        cursor.execute('''
+            INSERT INTO ShapeFrequency (shape_key, component_type, p1, p2, entry_count, occurrences)
+            SELECT shape_key, component_type, p1, p2, COUNT(DISTINCT entry_id), COUNT(*)
+            FROM ExactConnection
+            WHERE entry_id IN (SELECT entry_id FROM MyNumber)
+            GROUP BY shape_key
+        ''')
+        
+        # Stream entries in entry_id order and summarize each group of connections
+        reader = conn.cursor()
+        reader.execute('''
+            SELECT mn.entry_id, mn.nvalue, mn.partition_count, ec.component_type, ec.p1, ec.p2
+            FROM MyNumber mn
+            LEFT JOIN ExactConnection ec ON ec.entry_id = mn.entry_id
+            ORDER BY mn.entry_id
+        ''')
+        
+        def flush(entry_id, nvalue, partition_count, connections):
+            summary = _summarize_components(connections)
+            cursor.execute('''
+                INSERT INTO EntryStats (
+                    entry_id, nvalue, partition_count, complete_count, bipartite_count, type_count,
+                    max_clique, max_bipartite_p1, max_bipartite_p2, max_bipartite_sum
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                entry_id, nvalue, partition_count,
+                summary['complete_count'], summary['bipartite_count'], summary['type_count'],
+                summary['max_clique'], summary['max_bipartite_p1'], summary['max_bipartite_p2'],
+                summary['max_bipartite_sum']
+            ))
+        
+        current = None
+        connections = []
+        for entry_id, nvalue, partition_count, ctype, p1, p2 in reader:
+            if current is not None and current[0] != entry_id:
+                flush(*current, connections)
+                connections = []
+            current = (entry_id, nvalue, partition_count)
+            if ctype is not None:
+                connections.append((ctype, p1, p2))
+        if current is not None:
+            flush(*current, connections)
         
         conn.commit()
         conn.close()
     
+    def get_component_stats(self, limit=10, shape_limit=25):
+        """Read the materialized analytics tables (no scans over MyNumber/ExactConnection)"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        def top(order_by, where):
+            # Ties broken by n, as ShardedCatalog does when it re-ranks shard results
+            cursor.execute(f'''
+                SELECT es.nvalue, es.partition_count, es.type_count, es.max_clique,
+                       es.max_bipartite_p1, es.max_bipartite_p2, es.max_bipartite_sum,
+                       mn.exact_components_desc
+                FROM EntryStats es
+                JOIN MyNumber mn ON mn.entry_id = es.entry_id
+                WHERE {where}
+                ORDER BY {order_by}, es.nvalue
+                LIMIT ?
+            ''', (limit,))
+            return [{
+                'n': row[0],
+                'partition_count': row[1],
+                'type_count': row[2],
+                'max_clique': row[3],
+                'max_bipartite': [row[4], row[5]] if row[6] is not None else None,
+                'max_bipartite_sum': row[6],
+                'exact_components': row[7] if row[7] else 'None'
+            } for row in cursor.fetchall()]
+        
+        stats = {
+            'most_components': top('es.partition_count DESC', 'es.partition_count > 0'),
+            'largest_bipartite': top('es.max_bipartite_sum DESC', 'es.max_bipartite_sum IS NOT NULL'),
+            'largest_cliques': top('es.max_clique DESC', 'es.max_clique IS NOT NULL'),
+            'diverse_components': top('es.type_count DESC, es.partition_count DESC', 'es.type_count > 1')
+        }
+        
+        cursor.execute('SELECT COUNT(*) FROM EntryStats')
+        stats['entry_count'] = cursor.fetchone()[0]
+        
+        cursor.execute('''
+            SELECT component_type, SUM(occurrences), SUM(entry_count), COUNT(*)
+            FROM ShapeFrequency GROUP BY component_type
+        ''')
+        stats['component_types'] = {
+            ctype: {'components': total, 'entry_occurrences': entries, 'distinct_shapes': shapes}
+            for ctype, total, entries, shapes in cursor.fetchall()
+        }
+        
+        cursor.execute('''
+            SELECT shape_key, component_type, p1, p2, entry_count, occurrences
+            FROM ShapeFrequency
+            ORDER BY entry_count DESC, shape_key
+            LIMIT ?
+        ''', (shape_limit,))
+        stats['shape_histogram'] = [{
+            'shape': row[0],
+            'component_type': row[1],
+            'p1': row[2],
+            'p2': row[3],
+            'entry_count': row[4],
+            'occurrences': row[5]
+        } for row in cursor.fetchall()]
+        
+        conn.close()
+        return stats
+    
     def insert_number_data(self, n, graph_data):
         """Insert data for a specific n value with both graph types INCLUDING SELF-LOOPS"""
         conn = self._get_connection()
         cursor = conn.cursor()
         
+        # Retract the analytics of any existing row for n before it is replaced
+        cursor.execute('SELECT entry_id FROM MyNumber WHERE nvalue = ?', (n,))
+        existing = cursor.fetchone()
+        if existing:
+            self._remove_entry_stats(cursor, existing[0])
+            cursor.execute('DELETE FROM ExactConnection WHERE entry_id = ?', (existing[0],))
+        
         # Component description string (like "(1,8),(2,4),(2,4),(2,8)")
         comp_desc = graph_data.get('comp_desc', '')
         
-        # Zero divisor graph data - INCLUDE SELF-LOOPS
-        zvertices = json.dumps(list(graph_data.get('zvertices', [])))
-        zedges = json.dumps([list(pair) for pair in graph_data.get('zedges', [])])
-        z_self_loops = json.dumps(list(graph_data.get('zself_loops', [])))
-        z_structure = json.dumps({
-            'vertices': list(graph_data.get('zvertices', [])),
-            'edges': [list(pair) for pair in graph_data.get('zedges', [])],
-            'self_loops': list(graph_data.get('zself_loops', []))
-        })
-        
-        # Exact zero divisor graph data - INCLUDE SELF-LOOPS
-        ezvertices = json.dumps(list(graph_data.get('ez_vertices', [])))
-        ezedges = json.dumps([list(pair) for pair in graph_data.get('ez_edges', [])])
-        ez_self_loops = json.dumps(list(graph_data.get('ez_self_loops', [])))
-        ez_structure = json.dumps({
-            'vertices': list(graph_data.get('ez_vertices', [])),
-            'edges': [list(pair) for pair in graph_data.get('ez_edges', [])],
-            'self_loops': list(graph_data.get('ez_self_loops', []))
-        })
+        # Γ(Z_n) invariants from graph_invariants.compute_invariants, if computed
+        invariants = graph_data.get('invariants', {})
         
+        # Graphs kept in the edge store leave only their offsets (and counts) here
+        graph_offsets = graph_data.get('graph_offsets')
+        cursor.execute('DELETE FROM GraphStore WHERE nvalue = ?', (n,))
+        if graph_offsets:
+            cursor.executemany(
+                'INSERT INTO GraphStore (nvalue, graph, offset, length) VALUES (?, ?, ?, ?)',
+                [(n, graph, offset, length) for graph, (offset, length) in graph_offsets.items()]
+            )
+            zvertices = zedges = z_self_loops = z_structure = '0'
+            ezvertices = ezedges = ez_self_loops = ez_structure = '0'
+        else:
+            # Zero divisor graph data - INCLUDE SELF-LOOPS
+            zvertices, zedges, z_self_loops, z_structure = _graph_columns(
+                graph_data, 'z_graph', 'zvertices', 'zedges', 'zself_loops')
+            
+            # Exact zero divisor graph data - INCLUDE SELF-LOOPS
+            ezvertices, ezedges, ez_self_loops, ez_structure = _graph_columns(
+                graph_data, 'ez_graph', 'ez_vertices', 'ez_edges', 'ez_self_loops')
+        
+        # Upsert rather than INSERT OR REPLACE, which deletes the old row and hands out a new
+        # entry_id, leaving anything keyed on the old one behind
         cursor.execute('''
-            INSERT OR REPLACE INTO MyNumber (
+            INSERT INTO MyNumber (
                 nvalue, 
                 zvertices, zedges, zself_loops, zvertices_count, zedges_count, z_structure,
                 ezvertices, ezedges, ezself_loops, ezvertices_count, ezedges_count, ez_structure,
-                complete, complete_bipartite, exact_components_desc, partition_count
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                complete, complete_bipartite, exact_components_desc, partition_count,
+                diameter, girth, clique_number, chromatic_number,
+                min_degree, max_degree, degree_distribution
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(nvalue) DO UPDATE SET
+                zvertices = excluded.zvertices, zedges = excluded.zedges,
+                zself_loops = excluded.zself_loops, zvertices_count = excluded.zvertices_count,
+                zedges_count = excluded.zedges_count, z_structure = excluded.z_structure,
+                ezvertices = excluded.ezvertices, ezedges = excluded.ezedges,
+                ezself_loops = excluded.ezself_loops, ezvertices_count = excluded.ezvertices_count,
+                ezedges_count = excluded.ezedges_count, ez_structure = excluded.ez_structure,
+                complete = excluded.complete, complete_bipartite = excluded.complete_bipartite,
+                exact_components_desc = excluded.exact_components_desc,
+                partition_count = excluded.partition_count,
+                diameter = excluded.diameter, girth = excluded.girth,
+                clique_number = excluded.clique_number, chromatic_number = excluded.chromatic_number,
+                min_degree = excluded.min_degree, max_degree = excluded.max_degree,
+                degree_distribution = excluded.degree_distribution
         ''', (
             n,
             zvertices, zedges, z_self_loops,
@@ -113,10 +545,11 @@ class ZeroDivisorDatabase:
             graph_data.get('complete', 0),
             graph_data.get('complete_bipartite', 0),
             comp_desc,
-            graph_data.get('partition_count', 0)
+            graph_data.get('partition_count', 0),
+            *(invariants.get(column) for column in INVARIANT_COLUMNS)
         ))
         
-        entry_id = cursor.lastrowid
+        entry_id = existing[0] if existing else cursor.lastrowid
         
         # Clear existing connections and insert new ones
         cursor.execute('DELETE FROM ExactConnection WHERE entry_id = ?', (entry_id,))
@@ -134,34 +567,177 @@ class ZeroDivisorDatabase:
                     VALUES (?, 'bipartite', ?, ?)
                 ''', (entry_id, comp[0], comp[1]))
         
+        self._add_entry_stats(cursor, entry_id)
+        
         conn.commit()
         conn.close()
         return entry_id
     
-    def get_catalog_table(self, start_n=1, end_n=100):
-        """Generate the catalog table as requested by research lead"""
+    def load_signature_skeletons(self):
+        """All memoized skeletons as {signature: skeleton}"""
         conn = self._get_connection()
         cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT nvalue, exact_components_desc 
-            FROM MyNumber 
-            WHERE nvalue BETWEEN ? AND ?
-            ORDER BY nvalue
-        ''', (start_n, end_n))
-        
-        results = cursor.fetchall()
+        cursor.execute('SELECT signature, skeleton FROM SignatureSkeleton')
+        skeletons = {signature: json.loads(skeleton) for signature, skeleton in cursor.fetchall()}
         conn.close()
-        
+        return skeletons
+    
+    def save_signature_skeletons(self, skeletons):
+        """Store {signature: skeleton}; signatures already present are left alone"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.executemany(
+            'INSERT OR IGNORE INTO SignatureSkeleton (signature, skeleton) VALUES (?, ?)',
+            [(signature, json.dumps(skeleton)) for signature, skeleton in skeletons.items()]
+        )
+        conn.commit()
+        conn.close()
+    
+    def get_catalog_table(self, start_n=1, end_n=100):
+        """Generate the catalog table as requested by research lead"""
         catalog = []
-        for n, components_desc in results:
+        for row in self.iter_range(start_n, end_n):
             catalog.append({
-                'n': n,
-                'exact_components': components_desc if components_desc else 'None'
+                'n': row['nvalue'],
+                'exact_components': row['exact_components_desc'] if row['exact_components_desc'] else 'None'
             })
         
         return catalog
     
+    def iter_range(self, start_n=1, end_n=None, columns=('nvalue', 'exact_components_desc'), chunk_size=1000):
+        """
+        Stream MyNumber rows with start_n <= nvalue <= end_n (end_n=None: no upper bound)
+        as dicts of the requested columns, fetched from one connection in chunks.
+        """
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('PRAGMA table_info(MyNumber)')
+            known_columns = {row[1] for row in cursor.fetchall()}
+            unknown = [column for column in columns if column not in known_columns]
+            if unknown:
+                raise ValueError(f"Unknown MyNumber columns: {unknown}")
+            
+            query = f"SELECT {', '.join(columns)} FROM MyNumber WHERE nvalue >= ?"
+            params = [start_n]
+            if end_n is not None:
+                query += ' AND nvalue <= ?'
+                params.append(end_n)
+            cursor.execute(query + ' ORDER BY nvalue', params)
+            
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(columns, row))
+        finally:
+            conn.close()
+    
+    def iter_components(self, start_n=1, end_n=None, chunk_size=1000):
+        """
+        Stream (n, component_type, p1, p2, size, edges) for every component of
+        start_n <= n <= end_n, in n order (then insertion order within an n)
+        """
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            query = '''
+                SELECT mn.nvalue, ec.component_type, ec.p1, ec.p2, ec.comp_size, ec.comp_edges
+                FROM MyNumber mn
+                JOIN ExactConnection ec ON ec.entry_id = mn.entry_id
+                WHERE mn.nvalue >= ?
+            '''
+            params = [start_n]
+            if end_n is not None:
+                query += ' AND mn.nvalue <= ?'
+                params.append(end_n)
+            cursor.execute(query + ' ORDER BY mn.nvalue, ec.connection_id', params)
+            
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def iter_structures(self, ns=None, chunk_size=200, edge_store=None):
+        """
+        Stream complete entries (same shape as get_by_n) for the given n values, in the given order.
+        ns may be any iterable of n, a range (read with BETWEEN) or None for the whole catalog.
+        Missing n are skipped. Each chunk costs one MyNumber query and one ExactConnection query
+        (plus one GraphStore query when edge_store is given, for graphs kept in it).
+        """
+        conn = self._get_connection()
+        try:
+            if ns is None or (isinstance(ns, range) and ns.step == 1):
+                # Contiguous range: walk nvalue in chunks without building IN lists
+                reader = conn.cursor()
+                if ns is None:
+                    reader.execute('SELECT * FROM MyNumber ORDER BY nvalue')
+                else:
+                    reader.execute('SELECT * FROM MyNumber WHERE nvalue BETWEEN ? AND ? ORDER BY nvalue',
+                                   (ns.start, ns.stop - 1))
+                while True:
+                    rows = reader.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield from self._attach_connections(conn, rows, edge_store)
+                return
+            
+            chunk = []
+            for n in ns:
+                chunk.append(n)
+                if len(chunk) == chunk_size:
+                    yield from self._load_structure_chunk(conn, chunk, edge_store)
+                    chunk = []
+            if chunk:
+                yield from self._load_structure_chunk(conn, chunk, edge_store)
+        finally:
+            conn.close()
+    
+    def _stored_graphs(self, conn, ns, edge_store):
+        """{n: {'z': GraphRecord, 'ez': GraphRecord}} for the n whose graphs are in edge_store"""
+        if edge_store is None or not ns:
+            return {}
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT nvalue, graph, offset, length FROM GraphStore
+            WHERE nvalue IN ({','.join('?' * len(ns))})
+        ''', list(ns))
+        graphs = {}
+        for n, graph, offset, length in cursor.fetchall():
+            graphs.setdefault(n, {})[graph] = edge_store.read(offset, length)
+        return graphs
+    
+    def _attach_connections(self, conn, rows, edge_store=None):
+        """Batch-fetch ExactConnection rows for a chunk of MyNumber rows with one IN query"""
+        if not rows:
+            return []
+        entry_ids = [row[0] for row in rows]
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT entry_id, component_type, p1, p2
+            FROM ExactConnection
+            WHERE entry_id IN ({','.join('?' * len(entry_ids))})
+            ORDER BY connection_id
+        ''', entry_ids)
+        connections = {}
+        for entry_id, ctype, p1, p2 in cursor.fetchall():
+            connections.setdefault(entry_id, []).append((ctype, p1, p2))
+        graphs = self._stored_graphs(conn, [row[1] for row in rows], edge_store)
+        return [_entry_from_row(row, connections.get(row[0], []), graphs.get(row[1])) for row in rows]
+    
+    def _load_structure_chunk(self, conn, chunk, edge_store=None):
+        """Fetch one IN (...) chunk of n values for iter_structures, preserving the caller's order"""
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM MyNumber WHERE nvalue IN ({','.join('?' * len(chunk))})", chunk)
+        by_n = {entry['nvalue']: entry for entry in self._attach_connections(conn, cursor.fetchall(), edge_store)}
+        for n in chunk:
+            if n in by_n:
+                yield by_n[n]
+    
     def find_by_exact_components(self, required_components):
         """
         Find n values that have all the specified exact components
@@ -169,8 +745,8 @@ class ZeroDivisorDatabase:
         """
         return self.find_by_components(required_components)
     
-    def get_by_n(self, n):
-        """Retrieve complete data for a specific n value"""
+    def get_by_n(self, n, edge_store=None):
+        """Retrieve complete data for a specific n value (graphs kept in edge_store are read from it)"""
         conn = self._get_connection()
         cursor = conn.cursor()
         
@@ -189,32 +765,285 @@ class ZeroDivisorDatabase:
         ''', (result[0],))
         
         connections = cursor.fetchall()
+        graphs = self._stored_graphs(conn, [n], edge_store).get(n)
         conn.close()
         
+        return _entry_from_row(result, connections, graphs)
+    
+    def get_structure_json(self, n):
+        """(z_structure, ez_structure, exact_components_desc) as stored, or None"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT z_structure, ez_structure, exact_components_desc
+            FROM MyNumber WHERE nvalue = ?
+        ''', (n,))
+        result = cursor.fetchone()
+        conn.close()
+        return result
+    
+    def get_graph_records(self, n, edge_store=None):
+        """
+        The two graphs of Z_n as GraphRecords: {'n', 'z_graph', 'ez_graph',
+        'exact_components_desc'}, or None if n is not stored. Graphs kept in edge_store
+        (an edge_store.EdgeStore) are read from it; the rest are parsed from the JSON columns.
+        """
+        result = self.get_structure_json(n)
+        if not result:
+            return None
+        offsets = self.get_graph_offsets(n) if edge_store is not None else None
+        if offsets:
+            z_graph = edge_store.read(*offsets['z'])
+            ez_graph = edge_store.read(*offsets['ez'])
+        else:
+            z_graph = GraphRecord.from_structure(n, result[0])
+            ez_graph = GraphRecord.from_structure(n, result[1])
         return {
-            'entry_id': result[0],
-            'nvalue': result[1],
-            # Zero divisor graph data
-            'zvertices': json.loads(result[2]) if result[2] else [],
-            'zedges': json.loads(result[3]) if result[3] else [],
-            'zself_loops': json.loads(result[4]) if result[4] else [],
-            'zvertices_count': result[5],
-            'zedges_count': result[6],
-            'z_structure': json.loads(result[7]) if result[7] else {},
-            # Exact zero divisor graph data
-            'ezvertices': json.loads(result[8]) if result[8] else [],
-            'ezedges': json.loads(result[9]) if result[9] else [],
-            'ezself_loops': json.loads(result[10]) if result[10] else [],
-            'ezvertices_count': result[11],
-            'ezedges_count': result[12],
-            'ez_structure': json.loads(result[13]) if result[13] else {},
-            # Component analysis
-            'complete': result[14],
-            'complete_bipartite': result[15],
-            'exact_components_desc': result[16],
-            'partition_count': result[17],
-            'exact_components': connections
+            'n': n,
+            'z_graph': z_graph,
+            'ez_graph': ez_graph,
+            'exact_components_desc': result[2]
+        }
+    
+    def get_graph_offsets(self, n):
+        """{'z': (offset, length), 'ez': (offset, length)} in the edge store, or None"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT graph, offset, length FROM GraphStore WHERE nvalue = ?', (n,))
+        offsets = {graph: (offset, length) for graph, offset, length in cursor.fetchall()}
+        conn.close()
+        return offsets or None
+    
+    def iter_graph_offsets(self, start_n=1, end_n=None, graph='ez'):
+        """(n, offset, length) for one graph type over a range, in file order"""
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            query = 'SELECT nvalue, offset, length FROM GraphStore WHERE graph = ? AND nvalue >= ?'
+            params = [graph, start_n]
+            if end_n is not None:
+                query += ' AND nvalue <= ?'
+                params.append(end_n)
+            cursor.execute(query + ' ORDER BY offset', params)
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+    
+    def set_graph_offsets(self, n, offsets, drop_json=False):
+        """Record where n's graphs were appended; drop_json clears the JSON columns"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.executemany(
+            'INSERT OR REPLACE INTO GraphStore (nvalue, graph, offset, length) VALUES (?, ?, ?, ?)',
+            [(n, graph, offset, length) for graph, (offset, length) in offsets.items()]
+        )
+        if drop_json:
+            cursor.execute('''
+                UPDATE MyNumber SET
+                    zvertices = '0', zedges = '0', zself_loops = '0', z_structure = '0',
+                    ezvertices = '0', ezedges = '0', ezself_loops = '0', ez_structure = '0'
+                WHERE nvalue = ?
+            ''', (n,))
+        conn.commit()
+        conn.close()
+    
+    def insert_spectra(self, rows):
+        """Store (nvalue, graph, matrix, eigenvalues JSON, spectral_radius) rows, replacing existing ones"""
+        conn = self._get_connection()
+        conn.executemany('''
+            INSERT OR REPLACE INTO Spectrum (nvalue, graph, matrix, eigenvalues, spectral_radius)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+        conn.close()
+    
+    def get_spectrum(self, n, graph=None, matrix=None):
+        """
+        Stored spectra of n as dicts with 'graph', 'matrix', 'eigenvalues'
+        ([[value, multiplicity], ...], ascending) and 'spectral_radius'; optionally one graph/matrix
+        """
+        query = 'SELECT graph, matrix, eigenvalues, spectral_radius FROM Spectrum WHERE nvalue = ?'
+        params = [n]
+        if graph:
+            query += ' AND graph = ?'
+            params.append(graph)
+        if matrix:
+            query += ' AND matrix = ?'
+            params.append(matrix)
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute(query + ' ORDER BY graph DESC, matrix', params)
+        spectra = [{'graph': graph, 'matrix': matrix, 'eigenvalues': json.loads(eigenvalues),
+                    'spectral_radius': radius}
+                   for graph, matrix, eigenvalues, radius in cursor.fetchall()]
+        conn.close()
+        return spectra
+    
+    def get_spectrum_ns(self, start_n, end_n):
+        """Set of n in start_n..end_n with all four spectra stored"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT nvalue FROM Spectrum WHERE nvalue BETWEEN ? AND ?
+            GROUP BY nvalue HAVING COUNT(*) = 4
+        ''', (start_n, end_n))
+        ns = {row[0] for row in cursor.fetchall()}
+        conn.close()
+        return ns
+    
+    def get_n_range(self):
+        """(smallest n, largest n) stored, or None for an empty catalog"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT MIN(nvalue), MAX(nvalue) FROM MyNumber')
+        result = cursor.fetchone()
+        conn.close()
+        return result if result[0] is not None else None
+
+    def search_entries(self, start_n=1, end_n=100, components=(), exact_match=False, component_type='',
+                       invariants=None):
+        """
+        Summary rows for /api/entries: (nvalue, exact_components_desc, partition_count,
+        zvertices_count, zedges_count, ezvertices_count, ezedges_count, complete,
+        complete_bipartite, *INVARIANT_FILTERS) for start_n <= n <= end_n, in n order.
+        components: parsed component filter, dicts with 'type' ('complete' / 'bipartite'), 'p1', 'p2'
+        (None for a wildcard bipartite side). exact_match: no components beyond those.
+        component_type: 'complete' / 'bipartite' keeps only n with at least one of that type.
+        invariants: {column: (min, max)} over INVARIANT_FILTERS, either bound may be None.
+        """
+        query = f'''
+            SELECT {ENTRY_SUMMARY_COLUMNS}
+            FROM MyNumber mn
+            WHERE mn.nvalue BETWEEN ? AND ?
+        '''
+        params = [start_n, end_n]
+        
+        conditions = []
+        cparams = []
+        for comp in components:
+            if comp['type'] == 'bipartite':
+                if comp['p1'] is None and comp['p2'] is None:
+                    conditions.append("EXISTS (SELECT 1 FROM ExactConnection ec WHERE ec.entry_id = mn.entry_id AND ec.component_type = 'bipartite')")
+                elif comp['p1'] is None:
+                    conditions.append("EXISTS (SELECT 1 FROM ExactConnection ec WHERE ec.entry_id = mn.entry_id AND ec.component_type = 'bipartite' AND ec.p2 = ?)")
+                    cparams.append(comp['p2'])
+                elif comp['p2'] is None:
+                    conditions.append("EXISTS (SELECT 1 FROM ExactConnection ec WHERE ec.entry_id = mn.entry_id AND ec.component_type = 'bipartite' AND ec.p1 = ?)")
+                    cparams.append(comp['p1'])
+                else:
+                    conditions.append("EXISTS (SELECT 1 FROM ExactConnection ec WHERE ec.entry_id = mn.entry_id AND ec.component_type = 'bipartite' AND ec.p1 = ? AND ec.p2 = ?)")
+                    cparams.extend([comp['p1'], comp['p2']])
+            elif comp['type'] == 'complete':
+                conditions.append("EXISTS (SELECT 1 FROM ExactConnection ec WHERE ec.entry_id = mn.entry_id AND ec.component_type = 'complete' AND ec.p1 = ? AND ec.p2 IS NULL)")
+                cparams.append(comp['p1'])
+        if conditions:
+            query += ' AND ' + ' AND '.join(conditions)
+            params.extend(cparams)
+            if exact_match:
+                query += f' AND mn.partition_count = {len(components)}'
+        
+        if component_type == 'complete':
+            query += ' AND mn.complete > 0'
+        elif component_type == 'bipartite':
+            query += ' AND mn.complete_bipartite > 0'
+        
+        conditions, iparams = _invariant_conditions(invariants)
+        query += ''.join(' AND ' + condition for condition in conditions)
+        params.extend(iparams)
+        
+        query += ' ORDER BY mn.nvalue'
+        
+        conn = self._get_connection()
+        results = execute_logged(conn, query, params, label='api/entries')
+        conn.close()
+        return results
+    
+    def get_entries(self, ns, invariants=None, chunk_size=900):
+        """
+        search_entries rows for the given n (ascending; n not stored are skipped), filtered by
+        the same invariant bounds. Used with bitmap_index.ComponentIndex, which picks the n.
+        """
+        conditions, iparams = _invariant_conditions(invariants)
+        conn = self._get_connection()
+        results = []
+        for i in range(0, len(ns), chunk_size):
+            chunk = list(ns[i:i + chunk_size])
+            query = f'''
+                SELECT {ENTRY_SUMMARY_COLUMNS}
+                FROM MyNumber mn
+                WHERE mn.nvalue IN ({', '.join('?' * len(chunk))})
+                {''.join(' AND ' + condition for condition in conditions)}
+                ORDER BY mn.nvalue
+            '''
+            results.extend(execute_logged(conn, query, chunk + iparams, label='api/entries'))
+        conn.close()
+        return results
+
+    def search_components(self, component_type=None, min_size=None, max_size=None,
+                          min_edges=None, max_edges=None, shape=None,
+                          start_n=None, end_n=None, order_by='n', limit=None, offset=0):
+        """
+        Find individual components by range predicates on the indexed generated columns.
+        size is p1 for K_p1 and p1 + p2 for K_{p1,p2}; edges is the component's edge count.
+        Example: search_components('bipartite', min_size=10, max_size=20) finds K_{a,b} with 10 <= a+b <= 20
+        """
+        conditions = []
+        params = []
+        if component_type is not None:
+            if component_type not in ('complete', 'bipartite'):
+                raise ValueError(f"Unknown component type: {component_type}")
+            conditions.append('ec.component_type = ?')
+            params.append(component_type)
+        for column, op, value in (('ec.comp_size', '>=', min_size), ('ec.comp_size', '<=', max_size),
+                                  ('ec.comp_edges', '>=', min_edges), ('ec.comp_edges', '<=', max_edges),
+                                  ('mn.nvalue', '>=', start_n), ('mn.nvalue', '<=', end_n)):
+            if value is not None:
+                conditions.append(f'{column} {op} ?')
+                params.append(value)
+        if shape is not None:
+            conditions.append('ec.shape_key = ?')
+            params.append(shape.replace(' ', ''))
+        
+        orderings = {
+            'n': 'mn.nvalue, ec.comp_size',
+            'size': 'ec.comp_size DESC, mn.nvalue',
+            'edges': 'ec.comp_edges DESC, mn.nvalue'
         }
+        if order_by not in orderings:
+            raise ValueError(f"Unknown ordering: {order_by}")
+        
+        query = f'''
+            SELECT mn.nvalue, ec.component_type, ec.p1, ec.p2, ec.comp_size, ec.comp_edges,
+                   ec.shape_key, mn.exact_components_desc
+            FROM ExactConnection ec
+            JOIN MyNumber mn ON mn.entry_id = ec.entry_id
+            WHERE {' AND '.join(conditions) if conditions else '1=1'}
+            ORDER BY {orderings[order_by]}
+        '''
+        if limit is not None:
+            query += ' LIMIT ? OFFSET ?'
+            params.extend([limit, offset])
+        
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        results = cursor.fetchall()
+        conn.close()
+        
+        return [{
+            'n': row[0],
+            'component_type': row[1],
+            'p1': row[2],
+            'p2': row[3],
+            'size': row[4],
+            'edges': row[5],
+            'shape': row[6],
+            'exact_components': row[7] if row[7] else 'None'
+        } for row in results]
     
     def find_by_components(self, required_components):
         """
@@ -222,7 +1051,6 @@ class ZeroDivisorDatabase:
         required_components: list of tuples, e.g., [(1,8), (2,8)] or [(4,)] for clique
         """
         conn = self._get_connection()
-        cursor = conn.cursor()
         
         # Build dynamic query based on required components
         query = '''
@@ -255,8 +1083,7 @@ class ZeroDivisorDatabase:
                 '''
                 params.extend([comp[0], comp[1]])
         
-        cursor.execute(query, params)
-        results = cursor.fetchall()
+        results = execute_logged(conn, query, params, label='find_by_components')
         conn.close()
         
         return [{'n': row[0], 'exact_components': row[1]} for row in results]
\ No newline at end of file
@@ -15,9 +15,15 @@ def delete_entry(n):
     if result:
         entry_id = result[0]
         
+        # Retract this entry from the materialized analytics tables
+        db._remove_entry_stats(cursor, entry_id)
+        
         # Delete from ExactConnection table first (foreign key constraint)
         cursor.execute('DELETE FROM ExactConnection WHERE entry_id = ?', (entry_id,))
         
+        # Edge store offsets (the appended bytes stay in the file)
+        cursor.execute('DELETE FROM GraphStore WHERE nvalue = ?', (n,))
+        
         # Then delete from MyNumber table
         cursor.execute('DELETE FROM MyNumber WHERE nvalue = ?', (n,))
         
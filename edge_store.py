@@ -0,0 +1,148 @@
+# edge_store.py
+"""
+Append-only, memory-mapped store of packed graphs for the full-storage range (n <= 6150).
+
+Each graph is appended as a binary GraphRecord (uint32 vertices, flat edges, self-loops);
+SQLite keeps only its (offset, length) in the GraphStore table. Readers map the file and
+slice a graph out of it without copying or parsing, and a range of n is one sequential read.
+
+    python populate_db.py 2 6150 --edge-store zero_divisor_edges.bin
+    python edge_store.py migrate zero_divisor_edges.bin [start_n end_n] [--drop-json]
+    python edge_store.py bench zero_divisor_edges.bin <n>
+"""
+import mmap
+import os
+import sys
+import time
+from threading import Lock
+
+from graph_record import GraphRecord
+
+EDGE_STORE_PATH = os.environ.get('ZDG_EDGE_STORE', 'zero_divisor_edges.bin')
+
+class EdgeStore:
+    """One append-only file of GraphRecord blobs"""
+
+    def __init__(self, path=EDGE_STORE_PATH):
+        self.path = path
+        self._writer = None
+        self._map = None
+        self._map_lock = Lock()
+
+    def append(self, record):
+        """Append a record and return its (offset, length); flush() before publishing offsets"""
+        if self._writer is None:
+            self._writer = open(self.path, 'ab')
+        data = record.to_bytes()
+        offset = self._writer.tell()
+        self._writer.write(data)
+        return offset, len(data)
+
+    def flush(self):
+        if self._writer is not None:
+            self._writer.flush()
+
+    def _view(self, end):
+        """
+        Read-only map covering at least [0, end), remapped when the file has grown. The old
+        map is not closed: records handed out earlier still point into it, and it is
+        released once they are gone.
+        """
+        with self._map_lock:
+            if self._map is None or len(self._map) < end:
+                with open(self.path, 'rb') as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                if len(self._map) < end:
+                    raise ValueError(f"{self.path} ends at {len(self._map)}, record needs {end}")
+            return self._map
+
+    def read(self, offset, length):
+        """The record at offset, backed by the page cache (zero-copy)"""
+        view = self._view(offset + length)
+        return GraphRecord.from_buffer(memoryview(view)[offset:offset + length])
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # records still reference the map; it is released with them
+            self._map = None
+
+def open_default_store():
+    """The store at ZDG_EDGE_STORE, or None if it has not been created"""
+    return EdgeStore(EDGE_STORE_PATH) if os.path.exists(EDGE_STORE_PATH) else None
+
+def iter_records(db, store, start_n=1, end_n=None, graph='ez'):
+    """(n, GraphRecord) for every stored n in range, read in file order"""
+    for n, offset, length in db.iter_graph_offsets(start_n, end_n, graph):
+        yield n, store.read(offset, length)
+
+def migrate(db, store, start_n=1, end_n=None, drop_json=False):
+    """Copy graphs already stored as JSON into the edge store; returns the number moved"""
+    # Collect n first: updating rows while a read cursor is open would hit a locked database
+    ns = [row['nvalue'] for row in db.iter_range(start_n, end_n, columns=('nvalue',))]
+    moved = 0
+    for n in ns:
+        z_structure, ez_structure, _ = db.get_structure_json(n)
+        if z_structure in ('0', None) or db.get_graph_offsets(n):
+            continue
+        z_graph = GraphRecord.from_structure(n, z_structure)
+        if z_graph.vertex_count == 0:
+            continue  # "0" storage: nothing to move
+        ez_graph = GraphRecord.from_structure(n, ez_structure)
+        offsets = {'z': store.append(z_graph), 'ez': store.append(ez_graph)}
+        store.flush()
+        db.set_graph_offsets(n, offsets, drop_json)
+        moved += 1
+    return moved
+
+def bench(db, store, n, repeat=20):
+    """Time loading one graph from the JSON column against the edge store"""
+    offsets = db.get_graph_offsets(n)
+    if not offsets:
+        print(f"Z_{n} is not in the edge store")
+        return
+    z_json = db.get_structure_json(n)[0]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        from_store = store.read(*offsets['z'])
+    store_time = (time.perf_counter() - start) / repeat
+
+    print(f"Z_{n}: {from_store.vertex_count} vertices, {from_store.edge_count} edges")
+    if z_json not in ('0', None):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            from_json = GraphRecord.from_structure(n, z_json)
+        json_time = (time.perf_counter() - start) / repeat
+        print(f"  JSON parse : {json_time * 1000:8.3f} ms")
+        if from_json.edges.tolist() != from_store.edges.tolist():
+            print("  WARNING: JSON column and edge store disagree")
+    else:
+        print("  JSON parse :      n/a (JSON columns dropped)")
+    print(f"  edge store : {store_time * 1000:8.3f} ms")
+
+if __name__ == "__main__":
+    from database import ZeroDivisorDatabase
+
+    args = [arg for arg in sys.argv[1:] if arg != '--drop-json']
+    if len(args) < 2 or args[0] not in ('migrate', 'bench'):
+        print("Usage:")
+        print("  python edge_store.py migrate <store> [start_n end_n] [--drop-json]")
+        print("  python edge_store.py bench <store> <n>")
+        sys.exit(1)
+
+    db = ZeroDivisorDatabase()
+    store = EdgeStore(args[1])
+    if args[0] == 'migrate':
+        start_n = int(args[2]) if len(args) > 2 else 1
+        end_n = int(args[3]) if len(args) > 3 else None
+        moved = migrate(db, store, start_n, end_n, '--drop-json' in sys.argv)
+        print(f"Moved {moved} entries into {args[1]}")
+    else:
+        bench(db, store, int(args[2]))
+    store.close()
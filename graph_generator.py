@@ -1,22 +1,21 @@
 # graph_generator.py
 import networkx as nx
 import matplotlib.pyplot as plt
-import json
 import math
 from database import ZeroDivisorDatabase
+from edge_store import open_default_store
 
 def generate_zero_divisor_graph(n, db_path="zero_divisor_catalog.db", save_graph=False):
     """Generate the normal zero divisor graph from stored structure using the original algorithm's layout"""
     db = ZeroDivisorDatabase(db_path)
-    data = db.get_by_n(n)
+    data = db.get_graph_records(n, open_default_store())
     
     if not data:
         print(f"No data found for Z_{n}")
         return
     
-    structure = data['z_structure']
-    _generate_zero_divisor_graph_from_structure(
-        structure, 
+    _generate_zero_divisor_graph_from_record(
+        data['z_graph'], 
         f"Zero Divisor Graph Γ(Z_{n})",
         save_graph
     )
@@ -24,35 +23,34 @@ def generate_zero_divisor_graph(n, db_path="zero_divisor_catalog.db", save_graph
 def generate_exact_zero_divisor_graph(n, db_path="zero_divisor_catalog.db", save_graph=False):
     """Generate the exact zero divisor graph from stored structure using the original algorithm's layout"""
     db = ZeroDivisorDatabase(db_path)
-    data = db.get_by_n(n)
+    data = db.get_graph_records(n, open_default_store())
     
     if not data:
         print(f"No data found for Z_{n}")
         return
     
-    structure = data['ez_structure']
-    _generate_exact_zero_divisor_graph_from_structure(
-        structure, 
+    _generate_exact_zero_divisor_graph_from_record(
+        data['ez_graph'], 
         f"Exact Zero Divisor Graph for Z_{n}\nComponents: {data['exact_components_desc']}",
         save_graph
     )
 
-def _generate_zero_divisor_graph_from_structure(structure_data, title, save_graph=False):
+def _generate_zero_divisor_graph_from_record(graph, title, save_graph=False):
     """
     Generate zero divisor graph using the original algorithm's high-quality layout
     WITH SELF-LOOP COLORING (but no visual loop edges)
     """
     G = nx.Graph()
     
-    # Add vertices and edges from structure, but FILTER OUT SELF-LOOP EDGES for display
-    G.add_nodes_from(structure_data.get('vertices', []))
+    # Add vertices and edges from the record, but FILTER OUT SELF-LOOP EDGES for display
+    G.add_nodes_from(graph.vertices)
     
     # Only add non-self-loop edges to the graph for visualization
-    edges_to_display = [edge for edge in structure_data.get('edges', []) if edge[0] != edge[1]]
+    edges_to_display = [edge for edge in graph.iter_edges() if edge[0] != edge[1]]
     G.add_edges_from(edges_to_display)
     
     # Get self-loop vertices
-    self_loop_vertices = set(structure_data.get('self_loops', []))
+    self_loop_vertices = set(graph.self_loops)
     
     if not G.nodes():
         print("Graph is empty.")
@@ -91,22 +89,22 @@ def _generate_zero_divisor_graph_from_structure(structure_data, title, save_grap
     else:
         plt.show()
 
-def _generate_exact_zero_divisor_graph_from_structure(structure_data, title, save_graph=False):
+def _generate_exact_zero_divisor_graph_from_record(graph, title, save_graph=False):
     """
     Generate exact zero divisor graph using the original algorithm's high-quality layout
     WITH SELF-LOOP COLORING (but no visual loop edges) and separate components in subplots
     """
     G = nx.Graph()
     
-    # Add vertices and edges from structure, but FILTER OUT SELF-LOOP EDGES for display
-    G.add_nodes_from(structure_data.get('vertices', []))
+    # Add vertices and edges from the record, but FILTER OUT SELF-LOOP EDGES for display
+    G.add_nodes_from(graph.vertices)
     
     # Only add non-self-loop edges to the graph for visualization
-    edges_to_display = [edge for edge in structure_data.get('edges', []) if edge[0] != edge[1]]
+    edges_to_display = [edge for edge in graph.iter_edges() if edge[0] != edge[1]]
     G.add_edges_from(edges_to_display)
     
     # Get self-loop vertices
-    self_loop_vertices = set(structure_data.get('self_loops', []))
+    self_loop_vertices = set(graph.self_loops)
     
     if not G.nodes():
         print("Graph is empty.")
@@ -162,7 +160,6 @@ def _generate_exact_zero_divisor_graph_from_structure(structure_data, title, sav
 def display_catalog(start_n=1, end_n=100):
     """Display the catalog table as requested by research lead"""
     db = ZeroDivisorDatabase()
-    catalog = db.get_catalog_table(start_n, end_n)
     
     print("\n" + "="*80)
     print(f"CATALOG: Zero Divisor Graphs and Exact Components (n={start_n} to {end_n})")
@@ -170,11 +167,15 @@ def display_catalog(start_n=1, end_n=100):
     print(f"{'n':<6} {'Exact Components':<40}")
     print("-" * 80)
     
-    for item in catalog:
-        print(f"{item['n']:<6} {item['exact_components']:<40}")
+    # Stream rows so the full catalog can be printed in constant memory
+    count = 0
+    for row in db.iter_range(start_n, end_n):
+        components = row['exact_components_desc'] if row['exact_components_desc'] else 'None'
+        print(f"{row['nvalue']:<6} {components:<40}")
+        count += 1
     
     print("="*80)
-    return catalog
+    return count
 
 def search_by_components(component_list):
     """Search for numbers with specific exact components"""
@@ -199,7 +200,7 @@ if __name__ == "__main__":
         print("Usage:")
         print("  python graph_generator.py zero <n> [-s]    # Generate zero divisor graph")
         print("  python graph_generator.py exact <n> [-s]    # Generate exact zero divisor graph")  
-        print("  python graph_generator.py catalog [end]     # Display catalog (1 to end)")
+        print("  python graph_generator.py catalog [end]     # Display catalog (1 to end, 0 = all)")
         print("  python graph_generator.py search <comp>     # Search by components")
         print("\nExamples:")
         print("  python graph_generator.py zero 6")
@@ -222,6 +223,8 @@ if __name__ == "__main__":
         
     elif command == "catalog":
         end_n = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+        if end_n <= 0:
+            end_n = None  # 0 or negative: whole catalog
         display_catalog(1, end_n)
         
     elif command == "search" and len(sys.argv) > 2:
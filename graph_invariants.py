@@ -0,0 +1,211 @@
+# graph_invariants.py
+"""
+Diameter, girth, clique number, chromatic number and degree distribution of Γ(Z_n), the
+zero divisor graph on the nonzero zero divisors of Z_n (no self-loops), computed from the
+divisors of n instead of its n² pairs.
+
+The vertices with gcd(x, n) = d form a class of φ(n/d) elements (1 < d < n), and
+x*y ≡ 0 (mod n) iff n | gcd(x,n) * gcd(y,n). So two classes d, e are either fully joined
+(n | d*e) or not joined at all, and a class is a clique when n | d² and an independent set
+otherwise. Every invariant below works on this weighted graph of d(n) - 2 classes:
+
+    degree     x in class d is adjacent to every nonzero multiple of n/d except itself:
+               d - 1 - [n | d²]
+    diameter   classes d != e are at distance 1 if n | d*e, 2 if they share a neighbour
+               (lcm(n/d, n/e) < n), else 3; two vertices of one class are at 1 or 2
+    girth      3 if some adjacent pair has a common neighbour, 4 if some pair has two,
+               otherwise the graph is acyclic (Γ(R) never has a shortest cycle above 4)
+    clique     the nilpotent classes (n | d²) are cliques joined to each other, plus one
+               vertex for each prime with an odd exponent
+    chromatic  equals the clique number for Z_n (Beck's conjecture holds for Z_n)
+
+    python graph_invariants.py 360             # invariants of one n
+    python graph_invariants.py verify 2 120    # compare against networkx on the full graph
+    python graph_invariants.py backfill [db_path]
+"""
+import json
+import sys
+from collections import Counter
+from math import gcd
+
+from number_sieve import divisors, factorize, totient
+
+def divisor_classes(n, factors=None):
+    """
+    (d, class size) for the nonzero zero divisors of n, by gcd(x, n) = d. factors: n's
+    factorization, for n the shared sieve should not grow to (number_sieve.factorize_any)
+    """
+    if factors is None:
+        return [(d, totient(n // d)) for d in divisors(n)[1:-1]]
+    classes = [(1, 1)]  # (d, φ(n/d)) over the primes so far
+    for p, k in factors:
+        # p^i in d leaves p^(k-i) in n/d, contributing p^(k-i-1) * (p - 1) to φ(n/d)
+        classes = [(d * p ** i, phi * (p ** (k - i - 1) * (p - 1) if i < k else 1))
+                   for d, phi in classes for i in range(k + 1)]
+    return sorted(classes)[1:-1]
+
+def _common_neighbours(n, d, e):
+    """Common neighbours of two distinct vertices, one in class d and one in class e"""
+    step = n // d * (n // e) // gcd(n // d, n // e)
+    # Nonzero multiples of the lcm, minus the two vertices themselves if they are among them
+    return n // step - 1 - (d % step == 0) - (e % step == 0)
+
+def degree_distribution(n, classes=None):
+    """{degree: number of vertices}, ascending"""
+    counts = Counter()
+    for d, size in classes if classes is not None else divisor_classes(n):
+        counts[d - 1 - (d * d % n == 0)] += size
+    return dict(sorted(counts.items()))
+
+def diameter(n, classes=None):
+    """Diameter of Γ(Z_n); 0 for a single vertex, None when there are no zero divisors"""
+    classes = classes if classes is not None else divisor_classes(n)
+    if not classes:
+        return None
+    result = 0
+    for i, (d, size) in enumerate(classes):
+        if size > 1:
+            result = max(result, 1 if d * d % n == 0 else 2)
+        for e, _ in classes[i + 1:]:
+            if d * e % n == 0:
+                distance = 1
+            elif n // d * (n // e) // gcd(n // d, n // e) < n:
+                distance = 2
+            else:
+                return 3
+            result = max(result, distance)
+    return result
+
+def girth(n, classes=None):
+    """Length of the shortest cycle of Γ(Z_n), or None when it has none"""
+    classes = classes if classes is not None else divisor_classes(n)
+    has_square = False
+    for i, (d, size) in enumerate(classes):
+        # Two vertices of the same class, then one from each of two classes
+        pairs = [(d, d * d % n == 0)] if size > 1 else []
+        pairs.extend((e, d * e % n == 0) for e, _ in classes[i + 1:])
+        for e, adjacent in pairs:
+            common = _common_neighbours(n, d, e)
+            if adjacent and common >= 1:
+                return 3
+            has_square = has_square or common >= 2
+    return 4 if has_square else None
+
+def clique_number(n, classes=None):
+    """
+    Size of the largest clique of Γ(Z_n) (0 when there are no zero divisors), for
+    n = Π p^k: Π p^⌊k/2⌋ - 1 + (number of odd k).
+    The nilpotent classes (n | d²) hold the Π p^⌊k/2⌋ - 1 nonzero multiples of Π p^⌈k/2⌉
+    and are all joined to each other. Any other class in a clique adds one vertex and needs
+    an exponent below k/2 at some p that no other member shares; it keeps every nilpotent
+    class only when that exponent is (k-1)/2 with k odd, i.e. d = n / p^((k+1)/2).
+    """
+    classes = classes if classes is not None else divisor_classes(n)
+    if not classes:
+        return 0
+    nilpotent = sum(size for d, size in classes if d * d % n == 0)
+    return nilpotent + sum(k % 2 for _, k in factorize(n))
+
+def compute_invariants(n):
+    """The MyNumber invariant columns for n (degree_distribution as JSON)"""
+    classes = divisor_classes(n)
+    degrees = degree_distribution(n, classes)
+    clique = clique_number(n, classes)
+    return {
+        'diameter': diameter(n, classes),
+        'girth': girth(n, classes),
+        'clique_number': clique,
+        'chromatic_number': clique,
+        'min_degree': min(degrees, default=None),
+        'max_degree': max(degrees, default=None),
+        'degree_distribution': json.dumps(degrees),
+    }
+
+def backfill(db, start_n=1, end_n=None, chunk_size=10000):
+    """Fill the invariant columns of stored rows that predate them; returns the count"""
+    conn = db._get_connection()
+    cursor = conn.cursor()
+    query = 'SELECT nvalue FROM MyNumber WHERE clique_number IS NULL AND nvalue >= ?'
+    params = [start_n]
+    if end_n is not None:
+        query += ' AND nvalue <= ?'
+        params.append(end_n)
+    ns = [row[0] for row in cursor.execute(query, params)]
+    for i in range(0, len(ns), chunk_size):
+        rows = [compute_invariants(n) | {'nvalue': n} for n in ns[i:i + chunk_size]]
+        cursor.executemany('''
+            UPDATE MyNumber SET
+                diameter = :diameter, girth = :girth, clique_number = :clique_number,
+                chromatic_number = :chromatic_number, min_degree = :min_degree,
+                max_degree = :max_degree, degree_distribution = :degree_distribution
+            WHERE nvalue = :nvalue
+        ''', rows)
+        conn.commit()
+    conn.close()
+    return len(ns)
+
+def verify(start_n, end_n):
+    """Compare against networkx on the full graph (chromatic number by exact search); returns the mismatching n"""
+    import networkx as nx
+
+    mismatches = []
+    for n in range(start_n, end_n + 1):
+        graph = nx.Graph()
+        graph.add_nodes_from(x for x in range(1, n) if gcd(x, n) > 1)
+        graph.add_edges_from((x, y) for x in graph for y in graph if x < y and x * y % n == 0)
+        expected = {
+            'diameter': nx.diameter(graph) if len(graph) else None,
+            'girth': _girth(graph),
+            'clique_number': max((len(c) for c in nx.find_cliques(graph)), default=0),
+            'chromatic_number': _chromatic_number(graph),
+            'degree_distribution': json.dumps(dict(sorted(Counter(d for _, d in graph.degree()).items()))),
+        }
+        actual = compute_invariants(n)
+        wrong = {key: (actual[key], value) for key, value in expected.items() if actual[key] != value}
+        if wrong:
+            mismatches.append(n)
+            print(f"  n={n}: {wrong}")
+    print(f"Checked n={start_n}..{end_n}: {len(mismatches)} mismatches")
+    return mismatches
+
+def _girth(graph):
+    import networkx as nx
+    cycles = nx.minimum_cycle_basis(graph)
+    return min((len(cycle) for cycle in cycles), default=None)
+
+def _chromatic_number(graph):
+    """Smallest k with a proper k-colouring, by backtracking (small graphs only)"""
+    nodes = sorted(graph, key=graph.degree, reverse=True)
+
+    def colourable(k, colours, i):
+        if i == len(nodes):
+            return True
+        used = {colours[v] for v in graph[nodes[i]] if v in colours}
+        for c in range(min(k, max(colours.values(), default=-1) + 2)):
+            if c not in used:
+                colours[nodes[i]] = c
+                if colourable(k, colours, i + 1):
+                    return True
+                del colours[nodes[i]]
+        return False
+
+    return next(k for k in range(len(nodes) + 1) if colourable(k, {}, 0))
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == 'verify':
+        sys.exit(1 if verify(int(sys.argv[2]), int(sys.argv[3])) else 0)
+    elif len(sys.argv) >= 2 and sys.argv[1] == 'backfill':
+        from database import ZeroDivisorDatabase
+        db = ZeroDivisorDatabase(sys.argv[2]) if len(sys.argv) > 2 else ZeroDivisorDatabase()
+        print(f"Filled invariants for {backfill(db)} entries in {db.db_path}")
+    elif len(sys.argv) == 2:
+        n = int(sys.argv[1])
+        print(f"n={n}: {len(divisor_classes(n))} classes")
+        for key, value in compute_invariants(n).items():
+            print(f"  {key}: {value}")
+    else:
+        print("Usage:")
+        print("  python graph_invariants.py <n>")
+        print("  python graph_invariants.py verify <start_n> <end_n>")
+        print("  python graph_invariants.py backfill [db_path]")
+        sys.exit(1)
@@ -0,0 +1,199 @@
+# graph_record.py
+"""
+Compact graph record shared by the compute engine, the database layer, the API server and
+graph_generator.py.
+
+Vertices and self-loops are array('I'); edges are one flat array('I') of x0, y0, x1, y1, ...
+with x <= y, a self-loop being the edge (x, x). That is 8 bytes per edge instead of a tuple
+in a set (~120 bytes), and the JSON stored in SQLite is written straight from the arrays.
+"""
+import base64
+import json
+import struct
+import sys
+from array import array
+from itertools import chain
+
+RECORD_MAGIC = b'ZDGR'
+_HEADER = struct.Struct('<4sIIII')  # magic, n, vertex count, edge count, self-loop count
+
+def _le_bytes(values):
+    """uint32 array as little-endian bytes"""
+    if sys.byteorder == 'big':
+        values = array('I', values)
+        values.byteswap()
+    return values.tobytes()
+
+def _from_le_bytes(data):
+    values = array('I')
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+def _pack_u32(values):
+    """Pack non-negative integers as little-endian uint32 and base64 encode them"""
+    return base64.b64encode(_le_bytes(array('I', values))).decode('ascii')
+
+def _deltas(values):
+    previous = 0
+    for value in values:
+        yield value - previous
+        previous = value
+
+class GraphRecord:
+    """One graph (zero divisor or exact) of Z_n"""
+    __slots__ = ('n', 'vertices', 'edges', 'self_loops')
+
+    def __init__(self, n, vertices=None, edges=None, self_loops=None):
+        self.n = n
+        self.vertices = vertices if vertices is not None else array('I')
+        self.edges = edges if edges is not None else array('I')
+        self.self_loops = self_loops if self_loops is not None else array('I')
+
+    @classmethod
+    def from_pairs(cls, n, pair_chunks):
+        """
+        Build from streamed (x, y) pairs (catalog.iter_zero_divisors and friends). Pairs
+        involving 0 are dropped and each undirected edge is kept once.
+        """
+        edges = array('I')
+        self_loops = array('I')
+        seen = bytearray(n)
+        for chunk in pair_chunks:
+            for x, y in chunk:
+                if x == 0 or y == 0 or x > y:
+                    continue
+                edges.append(x)
+                edges.append(y)
+                seen[x] = seen[y] = 1
+                if x == y:
+                    self_loops.append(x)
+        vertices = array('I', (v for v in range(n) if seen[v]))
+        return cls(n, vertices, edges, self_loops)
+
+    @classmethod
+    def from_structure(cls, n, structure):
+        """Build from a {'vertices', 'edges', 'self_loops'} dict or its JSON text"""
+        if isinstance(structure, str):
+            structure = json.loads(structure) if structure else {}
+        if not isinstance(structure, dict):
+            structure = {}  # "0": structure not stored for this n
+        edges = ((min(x, y), max(x, y)) for x, y in structure.get('edges', []))
+        return cls(
+            n,
+            array('I', sorted(structure.get('vertices', []))),
+            array('I', chain.from_iterable(edges)),
+            array('I', sorted(structure.get('self_loops', []))),
+        )
+
+    @property
+    def vertex_count(self):
+        return len(self.vertices)
+
+    @property
+    def edge_count(self):
+        return len(self.edges) // 2
+
+    def iter_edges(self):
+        """(x, y) pairs, self-loops included"""
+        return zip(self.edges[0::2], self.edges[1::2])
+
+    def nbytes(self):
+        return (len(self.vertices) + len(self.edges) + len(self.self_loops)) * self.edges.itemsize
+
+    # JSON, in the layout stored in MyNumber
+
+    def vertices_json(self):
+        return '[' + ','.join(map(str, self.vertices)) + ']'
+
+    def self_loops_json(self):
+        return '[' + ','.join(map(str, self.self_loops)) + ']'
+
+    def edges_json(self):
+        return '[' + ','.join(f'[{x},{y}]' for x, y in self.iter_edges()) + ']'
+
+    def json_columns(self):
+        """(vertices, edges, self_loops, structure) JSON, each list encoded once"""
+        vertices, edges, self_loops = self.vertices_json(), self.edges_json(), self.self_loops_json()
+        structure = '{"vertices": %s, "edges": %s, "self_loops": %s}' % (vertices, edges, self_loops)
+        return vertices, edges, self_loops, structure
+
+    def to_json(self):
+        """The z_structure / ez_structure column value"""
+        return self.json_columns()[3]
+
+    def to_structure(self):
+        """Plain lists, for callers that want the decoded structure"""
+        return {
+            'vertices': self.vertices.tolist(),
+            'edges': [list(edge) for edge in self.iter_edges()],
+            'self_loops': self.self_loops.tolist(),
+        }
+
+    # Binary
+
+    def to_bytes(self):
+        """Header plus the three arrays as little-endian uint32"""
+        return b''.join((
+            _HEADER.pack(RECORD_MAGIC, self.n, len(self.vertices), self.edge_count, len(self.self_loops)),
+            _le_bytes(self.vertices),
+            _le_bytes(self.edges),
+            _le_bytes(self.self_loops),
+        ))
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, n, vertex_count, edge_count, loop_count = _HEADER.unpack_from(data)
+        if magic != RECORD_MAGIC:
+            raise ValueError("Not a graph record")
+        offset = _HEADER.size
+        arrays = []
+        for count in (vertex_count, 2 * edge_count, loop_count):
+            arrays.append(_from_le_bytes(data[offset:offset + 4 * count]))
+            offset += 4 * count
+        return cls(n, *arrays)
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        """
+        Like from_bytes, but the arrays are uint32 memoryviews into buffer (e.g. an mmap), so
+        nothing is copied. Falls back to from_bytes on big-endian hosts.
+        """
+        if sys.byteorder == 'big':
+            return cls.from_bytes(bytes(buffer))
+        view = memoryview(buffer)
+        magic, n, vertex_count, edge_count, loop_count = _HEADER.unpack_from(view)
+        if magic != RECORD_MAGIC:
+            raise ValueError("Not a graph record")
+        offset = _HEADER.size
+        arrays = []
+        for count in (vertex_count, 2 * edge_count, loop_count):
+            arrays.append(view[offset:offset + 4 * count].cast('I'))
+            offset += 4 * count
+        return cls(n, *arrays)
+
+    def to_compact(self):
+        """
+        The ?format=compact wire encoding: delta-encoded base64 uint32 arrays.
+        vertices/self_loops: sorted, each value stored as the gap from the previous one.
+        edges: sorted (a, b) pairs with a <= b, stored as (a - previous a, b - a).
+        """
+        edges = sorted(self.iter_edges())
+
+        def edge_deltas():
+            previous = 0
+            for a, b in edges:
+                yield a - previous
+                yield b - a
+                previous = a
+
+        return {
+            'encoding': 'delta-u32-base64',
+            'vertex_count': len(self.vertices),
+            'edge_count': len(edges),
+            'self_loop_count': len(self.self_loops),
+            'vertices': _pack_u32(_deltas(sorted(self.vertices))),
+            'edges': _pack_u32(edge_deltas()),
+            'self_loops': _pack_u32(_deltas(sorted(self.self_loops))),
+        }
@@ -0,0 +1,128 @@
+# instrumentation.py
+"""
+Per-stage timing and memory instrumentation for database population.
+
+populate_db.py records, for every n, the time (and optionally the peak traced memory) of:
+    pairs       iter_zero_divisors -> GraphRecord (n <= 6150 only)
+    exact       iter_exact_zero_divisors -> GraphRecord (n <= 6150 only)
+    components  SignatureCache.components (factorization + memoized skeleton)
+    invariants  graph_invariants.compute_invariants (diameter, girth, clique number, ...)
+    serialize   assembling graph_data
+    db_write    ZeroDivisorDatabase.insert_number_data (JSON is written from the records here)
+One JSON object per n is appended to a JSONL file; `summary` shows which stage dominates.
+
+    python populate_db.py 2 2000 --metrics populate_metrics.jsonl [--trace-memory]
+    python instrumentation.py summary populate_metrics.jsonl [bucket_size]
+"""
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+STAGES = ('pairs', 'exact', 'components', 'invariants', 'serialize', 'db_write')
+
+class StageRecorder:
+    """Collects per-stage wall time (and peak memory when trace_memory is on) for one n"""
+
+    def __init__(self, n, trace_memory=False):
+        self.n = n
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {'seconds': 0.0})
+            entry['seconds'] += time.perf_counter() - start
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+                entry['peak_bytes'] = max(entry.get('peak_bytes', 0), peak)
+
+    def as_record(self):
+        return {
+            'n': self.n,
+            'total_seconds': sum(entry['seconds'] for entry in self.stages.values()),
+            'stages': self.stages,
+        }
+
+def stage(recorder, name):
+    """recorder.stage(name), or a no-op context when instrumentation is off"""
+    return recorder.stage(name) if recorder is not None else nullcontext()
+
+class MetricsWriter:
+    """Appends one JSON line per recorded n"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a')
+
+    def write(self, recorder):
+        self.file.write(json.dumps(recorder.as_record()) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def load_metrics(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def summarize(records, bucket_size=1000):
+    """Aggregate records into n buckets: total seconds and peak memory per stage"""
+    buckets = {}
+    for record in records:
+        key = (record['n'] // bucket_size) * bucket_size
+        bucket = buckets.setdefault(key, {'count': 0, 'seconds': {}, 'peak_bytes': {}})
+        bucket['count'] += 1
+        for name, entry in record['stages'].items():
+            bucket['seconds'][name] = bucket['seconds'].get(name, 0.0) + entry['seconds']
+            if 'peak_bytes' in entry:
+                bucket['peak_bytes'][name] = max(bucket['peak_bytes'].get(name, 0), entry['peak_bytes'])
+    return dict(sorted(buckets.items()))
+
+def print_summary(path, bucket_size=1000):
+    records = load_metrics(path)
+    if not records:
+        print(f"No metrics in {path}")
+        return
+
+    buckets = summarize(records, bucket_size)
+    print(f"STAGE SUMMARY for {len(records)} entries ({path})")
+    print("Share of time per stage; dominant stage marked with *")
+    header = f"{'n range':<17} {'count':>6} {'total s':>10} " + ' '.join(f"{name:>11}" for name in STAGES)
+    print(header)
+    print("-" * len(header))
+    for start, bucket in buckets.items():
+        total = sum(bucket['seconds'].values())
+        dominant = max(bucket['seconds'], key=bucket['seconds'].get)
+        shares = []
+        for name in STAGES:
+            share = bucket['seconds'].get(name, 0.0) / total * 100 if total else 0.0
+            shares.append(f"{share:>9.1f}%{'*' if name == dominant else ' '}")
+        print(f"{start:>7}-{start + bucket_size - 1:<9} {bucket['count']:>6} {total:>10.2f} " + ' '.join(shares))
+
+    traced = [bucket for bucket in buckets.values() if bucket['peak_bytes']]
+    if traced:
+        print("\nPeak traced memory per stage (MiB, max over bucket)")
+        print(f"{'n range':<17} " + ' '.join(f"{name:>11}" for name in STAGES))
+        for start, bucket in buckets.items():
+            if not bucket['peak_bytes']:
+                continue
+            peaks = [f"{bucket['peak_bytes'].get(name, 0) / 2**20:>11.1f}" for name in STAGES]
+            print(f"{start:>7}-{start + bucket_size - 1:<9} " + ' '.join(peaks))
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "summary":
+        print_summary(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 1000)
+    else:
+        print("Usage: python instrumentation.py summary <metrics.jsonl> [bucket_size]")
+        sys.exit(1)
@@ -0,0 +1,94 @@
+# load_test.py
+"""
+Local load test: measures /api/entries latency while /api/graph/<n> downloads are in flight.
+
+Start the server first (python server_app.py or python server_app.py --asgi), then run:
+    python load_test.py [base_url] [graph_n] [graph_workers] [seconds]
+"""
+import math
+import sys
+import time
+import threading
+import urllib.error
+import urllib.request
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+def timed_get(url, headers=None):
+    """GET a URL and return (elapsed seconds, status code, bytes received)"""
+    req = urllib.request.Request(url, headers=headers or {})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=300) as response:
+            body = response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        body = e.read()
+        status = e.code
+    return time.perf_counter() - start, status, len(body)
+
+def measure_entries(base_url, seconds):
+    """Hit /api/entries back to back for the given duration, return latencies"""
+    latencies = []
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        elapsed, status, _ = timed_get(f"{base_url}/api/entries?start_n=1&end_n=100")
+        if status == 200:
+            latencies.append(elapsed)
+    return latencies
+
+def graph_downloader(base_url, n, stop_event, results):
+    """Download /api/graph/<n> repeatedly until told to stop"""
+    while not stop_event.is_set():
+        elapsed, status, size = timed_get(f"{base_url}/api/graph/{n}", {'Accept-Encoding': 'gzip'})
+        results.append((elapsed, status, size))
+
+def report(label, latencies):
+    print(f"  {label:<28} requests={len(latencies):<6} "
+          f"p50={percentile(latencies, 50) * 1000:8.1f} ms  "
+          f"p99={percentile(latencies, 99) * 1000:8.1f} ms")
+
+def run_load_test(base_url="http://127.0.0.1:5000", graph_n=5000, graph_workers=4, seconds=10):
+    print(f"Load test against {base_url}")
+    print(f"  {graph_workers} concurrent /api/graph/{graph_n} downloaders, {seconds}s per phase\n")
+
+    idle = measure_entries(base_url, seconds)
+
+    stop_event = threading.Event()
+    graph_results = []
+    workers = [
+        threading.Thread(target=graph_downloader, args=(base_url, graph_n, stop_event, graph_results), daemon=True)
+        for _ in range(graph_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    loaded = measure_entries(base_url, seconds)
+    stop_event.set()
+    for worker in workers:
+        worker.join()
+
+    print("/api/entries latency:")
+    report("idle", idle)
+    report("during graph downloads", loaded)
+
+    statuses = {}
+    for _, status, _ in graph_results:
+        statuses[status] = statuses.get(status, 0) + 1
+    completed = [elapsed for elapsed, status, _ in graph_results if status == 200]
+    print(f"\n/api/graph/{graph_n}: status counts {statuses}")
+    report("graph downloads (200 only)", completed)
+
+    return {'idle': idle, 'loaded': loaded, 'graph': graph_results}
+
+if __name__ == "__main__":
+    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:5000"
+    graph_n = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    graph_workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    seconds = float(sys.argv[4]) if len(sys.argv) > 4 else 10
+    run_load_test(base_url.rstrip('/'), graph_n, graph_workers, seconds)
@@ -0,0 +1,167 @@
+# number_sieve.py
+"""
+Smallest-prime-factor sieve with cached factorization, divisor and totient lookups.
+
+The engines call factorize / divisors / totient; the module keeps one shared sieve and
+grows it on demand (ensure(limit) builds it up front for a whole range). The table is a
+flat uint32 array, so it can be saved once and memory-mapped read-only by worker processes:
+
+    python number_sieve.py build 10000000 sieve.bin
+    ZDG_SIEVE_PATH=sieve.bin python populate_db.py ...     # workers map the file, no rebuild
+"""
+import math
+import mmap
+import os
+import sys
+import time
+from array import array
+from functools import lru_cache
+
+SIEVE_MAGIC = b'ZDGSPF1\0'
+
+class NumberSieve:
+    """spf[m] is the smallest prime factor of m, or 0 when m is prime (or m < 2)"""
+
+    def __init__(self, limit, spf):
+        self.limit = limit
+        self.spf = spf
+        self._mmap = None
+
+    @classmethod
+    def build(cls, limit):
+        """
+        Sieve 0..limit. Multiples of each prime p <= sqrt(limit) are written with one slice
+        assignment, largest p first, so the value left in spf[m] is its smallest prime factor.
+        """
+        spf = array('I', bytes(4 * (limit + 1)))
+        root = math.isqrt(limit)
+        small = bytearray([1]) * (root + 1)
+        primes = []
+        for p in range(2, root + 1):
+            if small[p]:
+                primes.append(p)
+                small[p * p::p] = bytes(len(range(p * p, root + 1, p)))
+        for p in reversed(primes):
+            start = p * p
+            spf[start::p] = array('I', [p]) * len(range(start, limit + 1, p))
+        return cls(limit, spf)
+
+    def smallest_prime_factor(self, m):
+        return self.spf[m] or m
+
+    def factorize(self, m):
+        """((p, k), ...) with primes ascending"""
+        if m > self.limit:
+            raise ValueError(f"{m} is beyond the sieve limit {self.limit}")
+        factors = []
+        spf = self.spf
+        while m > 1:
+            p = spf[m] or m
+            k = 0
+            while m % p == 0:
+                m //= p
+                k += 1
+            factors.append((p, k))
+        return tuple(factors)
+
+    def save(self, path):
+        """Write the table as header + raw uint32 values (native byte order)"""
+        with open(path, 'wb') as f:
+            f.write(SIEVE_MAGIC)
+            f.write(self.limit.to_bytes(8, 'little'))
+            self.spf.tofile(f)
+
+    @classmethod
+    def open(cls, path):
+        """Map a saved table read-only; pages are shared between processes mapping the same file"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:8] != SIEVE_MAGIC:
+            mapped.close()
+            raise ValueError(f"{path} is not a saved sieve")
+        limit = int.from_bytes(mapped[8:16], 'little')
+        sieve = cls(limit, memoryview(mapped)[16:16 + 4 * (limit + 1)].cast('I'))
+        sieve._mmap = mapped
+        return sieve
+
+_sieve = None
+
+def use(sieve):
+    """Install a sieve (e.g. NumberSieve.open(path) in a worker) as the shared one"""
+    global _sieve
+    _sieve = sieve
+    factorize.cache_clear()
+    divisors.cache_clear()
+    totient.cache_clear()
+
+def ensure(limit):
+    """Return the shared sieve, building (or growing) it to cover limit"""
+    if _sieve is None or _sieve.limit < limit:
+        path = os.environ.get('ZDG_SIEVE_PATH')
+        if _sieve is None and path and os.path.exists(path):
+            use(NumberSieve.open(path))
+            if _sieve.limit >= limit:
+                return _sieve
+        current = _sieve.limit if _sieve else 0
+        use(NumberSieve.build(max(limit, 2 * current, 1 << 16)))
+    return _sieve
+
+@lru_cache(maxsize=1 << 16)
+def factorize(n):
+    """((p, k), ...) with primes ascending, e.g. factorize(360) == ((2, 3), (3, 2), (5, 1))"""
+    return ensure(n).factorize(n)
+
+@lru_cache(maxsize=1 << 14)
+def divisors(n):
+    """All divisors of n, ascending"""
+    result = [1]
+    for p, k in factorize(n):
+        result = [d * p ** i for d in result for i in range(k + 1)]
+    return tuple(sorted(result))
+
+@lru_cache(maxsize=1 << 16)
+def totient(n):
+    """Euler's φ(n)"""
+    result = n
+    for p, _ in factorize(n):
+        result -= result // p
+    return result
+
+def factorize_any(m):
+    """
+    factorize() for one-off m of any size: the shared sieve when it already covers m,
+    otherwise trial division (about √m steps) rather than growing the sieve to m
+    """
+    if _sieve is not None and m <= _sieve.limit:
+        return factorize(m)
+    factors = []
+    p = 2
+    while p * p <= m:
+        if m % p == 0:
+            k = 0
+            while m % p == 0:
+                m //= p
+                k += 1
+            factors.append((p, k))
+        p += 1 if p == 2 else 2
+    if m > 1:
+        factors.append((m, 1))
+    return tuple(factors)
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == 'build':
+        limit = int(sys.argv[2])
+        start = time.perf_counter()
+        sieve = NumberSieve.build(limit)
+        print(f"Sieved 1..{limit} in {time.perf_counter() - start:.2f}s")
+        if len(sys.argv) > 3:
+            sieve.save(sys.argv[3])
+            print(f"Saved to {sys.argv[3]} ({os.path.getsize(sys.argv[3]) / 1024 ** 2:.1f} MiB)")
+    elif len(sys.argv) == 2:
+        n = int(sys.argv[1])
+        print(f"n={n} factors={factorize(n)} divisors={len(divisors(n))} φ={totient(n)}")
+    else:
+        print("Usage:")
+        print("  python number_sieve.py <n>")
+        print("  python number_sieve.py build <limit> [path]")
+        sys.exit(1)
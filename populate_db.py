@@ -1,145 +1,135 @@
 # populate_db.py
 from database import ZeroDivisorDatabase
-from catalog import get_zero_divisors, get_exact_zero_divisors, get_exact_components
+from catalog import iter_zero_divisors
+from graph_record import GraphRecord
+from edge_store import EdgeStore
+from shards import shard_path
+from instrumentation import MetricsWriter, StageRecorder, stage
+from signature_cache import SignatureCache
+from graph_invariants import compute_invariants
+from crt_engine import exact_graph_record
+import number_sieve
 import sys
 import json
 
-def calculate_graph_data(n):
-    """Calculate graph data, but store "0" for vertex/edge lists when n > 6150"""
-    zero_divisors = get_zero_divisors(n)
-    exact_zero_divisors = get_exact_zero_divisors(n, zero_divisors)
-    comps = get_exact_components(n, exact_zero_divisors)
-
-    # For n > 6150, store "0" for all the list data
+# In-process memo used when the caller does not pass its own cache
+_signature_cache = SignatureCache()
+
+def calculate_graph_data(n, recorder=None, cache=None):
+    """
+    Calculate graph data, but store "0" for vertex/edge lists when n > 6150.
+    recorder: optional instrumentation.StageRecorder that times each stage.
+    cache: signature_cache.SignatureCache; components come from n's factorization, so
+    pairs are only enumerated when the vertex/edge lists are stored (n <= 6150).
+    Pairs are streamed in chunks into GraphRecords, so memory follows the number of edges
+    (8 bytes each) rather than n².
+    """
+    with stage(recorder, 'components'):
+        comps = (cache or _signature_cache).components(n)
+    with stage(recorder, 'invariants'):
+        invariants = compute_invariants(n)
     if n > 6150:
-        # Calculate component counts only (minimal computation)
-        complete_count = sum(1 for comp in comps if len(comp) == 1)
-        bipartite_count = sum(1 for comp in comps if len(comp) == 2)
-
-        # Component description string
-        comp_desc = ','.join(
-            str(comp[0]) if len(comp) == 1 else f'({comp[0]},{comp[1]})'
-            for comp in comps
-        )
-
-        graph_data = {
-            # Store "0" for all list data to save space
-            'zvertices': '0',
-            'zedges': '0',
-            'zself_loops': '0',
-            'zvertices_count': 0,
-            'zedges_count': 0,
-            'z_structure': '0',
-
-            'ez_vertices': '0',
-            'ez_edges': '0',
-            'ez_self_loops': '0',
-            'ez_vertices_count': 0,
-            'ez_edges_count': 0,
-            'ez_structure': '0',
-
-            # Component analysis
-            'complete': complete_count,
-            'complete_bipartite': bipartite_count,
-            'exact_components': comps,
-            'partition_count': len(comps),
-            'comp_desc': comp_desc
-        }
-
-        return graph_data
-
-    else:
-        # For n <= 6150, use the original logic
-
-        z_vertices = set()
-        z_edges = set()
-        z_self_loops = set()
-
-        for x, y in zero_divisors:
-            if x == 0 or y == 0:
-                continue
-
-            z_vertices.add(x)
-            z_vertices.add(y)
-
-            if x == y:
-                z_self_loops.add(x)
-                z_edges.add((x, x))
-            else:
-                z_edges.add(tuple(sorted((x, y))))
-
-        ez_vertices = set()
-        ez_edges = set()
-        ez_self_loops = set()
-        ezd_pairs = set(exact_zero_divisors)
-
-        for x, y in exact_zero_divisors:
-            if x == 0 or y == 0:
-                continue
-
-            if x == y:
-                ez_self_loops.add(x)
-                ez_edges.add((x, x))
-            elif (y, x) in ezd_pairs:
-                ez_vertices.add(x)
-                ez_vertices.add(y)
-                ez_edges.add(tuple(sorted((x, y))))
-
-        z_vertices.update(z_self_loops)
-        ez_vertices.update(ez_self_loops)
-
-        complete_count = sum(1 for comp in comps if len(comp) == 1)
-        bipartite_count = sum(1 for comp in comps if len(comp) == 2)
-
-        comp_desc = ','.join(
-            str(comp[0]) if len(comp) == 1 else f'({comp[0]},{comp[1]})'
-            for comp in comps
-        )
-
-        graph_data = {
-            'zvertices': json.dumps(list(z_vertices)),
-            'zedges': json.dumps([list(pair) for pair in z_edges]),
-            'zself_loops': json.dumps(list(z_self_loops)),
-            'zvertices_count': len(z_vertices),
-            'zedges_count': len(z_edges),
-            'z_structure': json.dumps({
-                'vertices': list(z_vertices),
-                'edges': [list(pair) for pair in z_edges],
-                'self_loops': list(z_self_loops)
-            }),
-
-            'ez_vertices': json.dumps(list(ez_vertices)),
-            'ez_edges': json.dumps([list(pair) for pair in ez_edges]),
-            'ez_self_loops': json.dumps(list(ez_self_loops)),
-            'ez_vertices_count': len(ez_vertices),
-            'ez_edges_count': len(ez_edges),
-            'ez_structure': json.dumps({
-                'vertices': list(ez_vertices),
-                'edges': [list(pair) for pair in ez_edges],
-                'self_loops': list(ez_self_loops)
-            }),
-
-            'complete': complete_count,
-            'complete_bipartite': bipartite_count,
-            'exact_components': comps,
-            'partition_count': len(comps),
-            'comp_desc': comp_desc
-        }
-
+        with stage(recorder, 'serialize'):
+            return _build_graph_data(n, None, None, comps, invariants)
+
+    with stage(recorder, 'pairs'):
+        z_graph = GraphRecord.from_pairs(n, iter_zero_divisors(n))
+    with stage(recorder, 'exact'):
+        ez_graph = exact_graph_record(n)
+    
+    with stage(recorder, 'serialize'):
+        return _build_graph_data(n, z_graph, ez_graph, comps, invariants)
+
+def _build_graph_data(n, z_graph, ez_graph, comps, invariants=None):
+    """
+    Assemble the graph_data dict for insert_number_data.
+    z_graph / ez_graph: GraphRecords, unused when n > 6150.
+    invariants: graph_invariants.compute_invariants(n), kept for every n.
+    """
+    complete_count = sum(1 for comp in comps if len(comp) == 1)
+    bipartite_count = sum(1 for comp in comps if len(comp) == 2)
+
+    # Component description string
+    comp_desc = ','.join(
+        str(comp[0]) if len(comp) == 1 else f'({comp[0]},{comp[1]})'
+        for comp in comps
+    )
+
+    graph_data = {
+        # Component analysis
+        'complete': complete_count,
+        'complete_bipartite': bipartite_count,
+        'exact_components': comps,
+        'partition_count': len(comps),
+        'comp_desc': comp_desc,
+        'invariants': invariants or {}
+    }
+
+    # For n > 6150, store "0" for all the list data to save space
+    if n > 6150:
+        for prefix in ('z', 'ez_'):
+            graph_data.update({
+                f'{prefix}vertices': '0',
+                f'{prefix}edges': '0',
+                f'{prefix}self_loops': '0',
+                f'{prefix}vertices_count': 0,
+                f'{prefix}edges_count': 0,
+            })
+        graph_data['z_structure'] = '0'
+        graph_data['ez_structure'] = '0'
         return graph_data
 
-def populate_database(start_n=6151, end_n=10000):
-    """Populate database with data from start_n to end_n (storage optimized for n > 6150)"""
-    db = ZeroDivisorDatabase()
-
-    print(f"Populating database from n={start_n} to n={end_n}...")
+    # insert_number_data writes the JSON columns straight from the records
+    graph_data.update({
+        'z_graph': z_graph,
+        'zvertices_count': z_graph.vertex_count,
+        'zedges_count': z_graph.edge_count,
+        'ez_graph': ez_graph,
+        'ez_vertices_count': ez_graph.vertex_count,
+        'ez_edges_count': ez_graph.edge_count,
+    })
+    return graph_data
+
+def _move_to_edge_store(store, graph_data):
+    """Append n's graphs to the edge store; SQLite then keeps only their offsets"""
+    z_graph = graph_data.pop('z_graph')
+    ez_graph = graph_data.pop('ez_graph')
+    graph_data['graph_offsets'] = {'z': store.append(z_graph), 'ez': store.append(ez_graph)}
+    # The bytes must be in the file before the offsets are committed
+    store.flush()
+
+def populate_database(start_n=6151, end_n=10000, metrics_path=None, trace_memory=False,
+                      edge_store_path=None, db_path="zero_divisor_catalog.db"):
+    """
+    Populate database with data from start_n to end_n (storage optimized for n > 6150).
+    metrics_path: append per-stage timings (JSONL, see instrumentation.py) for every n.
+    edge_store_path: keep full-storage graphs in this edge store file instead of JSON columns.
+    db_path: database to write, e.g. a shard file from shards.shard_path.
+    """
+    db = ZeroDivisorDatabase(db_path)
+    cache = SignatureCache(db)
+    number_sieve.ensure(end_n)
+    metrics = MetricsWriter(metrics_path) if metrics_path else None
+    store = EdgeStore(edge_store_path) if edge_store_path else None
+
+    print(f"Populating {db_path} from n={start_n} to n={end_n}...")
     print("For n > 6150: storing '0' for vertex/edge lists to save space")
+    if metrics:
+        print(f"Recording per-stage metrics to {metrics_path}")
+    if store:
+        print(f"Storing graphs for n <= 6150 in {edge_store_path}")
 
     for n in range(start_n, end_n + 1):
         try:
             print(f"Processing Z_{n}...")
-            graph_data = calculate_graph_data(n)
-            db.insert_number_data(n, graph_data)
+            recorder = StageRecorder(n, trace_memory) if metrics else None
+            graph_data = calculate_graph_data(n, recorder, cache)
+            with stage(recorder, 'db_write'):
+                if store and 'z_graph' in graph_data:
+                    _move_to_edge_store(store, graph_data)
+                db.insert_number_data(n, graph_data)
+            if metrics:
+                metrics.write(recorder)
 
             comp_desc = graph_data['comp_desc']
             storage_mode = "optimized" if n > 6150 else "full"
@@ -148,15 +138,45 @@ def populate_database(start_n=6151, end_n=10000):
         except Exception as e:
             print(f"  ✗ Error processing Z_{n}: {e}")
 
+    cache.flush()
+    if store:
+        store.close()
+    if metrics:
+        metrics.close()
+    print(f"Signature cache: {cache.hits} hits, {cache.misses} new signatures ({cache.hit_rate():.1%} hit rate)")
     print("Database population complete!")
 
 if __name__ == "__main__":
-    if len(sys.argv) == 3:
-        start_n = int(sys.argv[1])
-        end_n = int(sys.argv[2])
-    elif len(sys.argv) == 2:
-        start_n = int(sys.argv[1])
+    # Optional flags: --metrics <file.jsonl> [--trace-memory] [--edge-store <file>] [--shard <dir>]
+    args = sys.argv[1:]
+    metrics_path = None
+    if '--metrics' in args:
+        index = args.index('--metrics')
+        metrics_path = args[index + 1]
+        del args[index:index + 2]
+    edge_store_path = None
+    if '--edge-store' in args:
+        index = args.index('--edge-store')
+        edge_store_path = args[index + 1]
+        del args[index:index + 2]
+    shard_dir = None
+    if '--shard' in args:
+        index = args.index('--shard')
+        shard_dir = args[index + 1]
+        del args[index:index + 2]
+    trace_memory = '--trace-memory' in args
+    args = [arg for arg in args if arg != '--trace-memory']
+
+    if len(args) == 2:
+        start_n = int(args[0])
+        end_n = int(args[1])
+    elif len(args) == 1:
+        start_n = int(args[0])
         end_n = start_n + 100  # Default to next 100 numbers
     else:
         start_n = 6151
-        end_n = 6250
\ No newline at end of file
+        end_n = 6250
+
+    # Sharded mode: this worker writes its own file for its range (merge with shards.py)
+    db_path = shard_path(shard_dir, start_n, end_n) if shard_dir else "zero_divisor_catalog.db"
+    populate_database(start_n, end_n, metrics_path, trace_memory, edge_store_path, db_path)
\ No newline at end of file
@@ -0,0 +1,132 @@
+# query_log.py
+"""
+Slow-query log for the dynamically built component filters (/api/entries, find_by_components).
+
+Queries slower than ZDG_SLOW_QUERY_SECONDS are appended to ZDG_SLOW_QUERY_LOG (JSON lines)
+with their SQL, parameters, EXPLAIN QUERY PLAN and elapsed time. Replay the log against a
+database to compare plans before and after an index change:
+
+    python query_log.py summary slow_queries.jsonl [k]
+    python query_log.py replay slow_queries.jsonl [db_path]
+"""
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from threading import Lock
+
+SLOW_QUERY_SECONDS = float(os.environ.get('ZDG_SLOW_QUERY_SECONDS', 0.25))
+SLOW_QUERY_LOG = os.environ.get('ZDG_SLOW_QUERY_LOG', 'slow_queries.jsonl')
+
+_log_lock = Lock()
+
+def normalize_sql(sql):
+    """Collapse whitespace so the same query logs (and compares) the same way"""
+    return re.sub(r'\s+', ' ', sql).strip()
+
+def explain(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN as a list of indented detail lines"""
+    rows = conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+    depth = {0: -1}
+    plan = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        plan.append('  ' * depth[node_id] + detail)
+    return plan
+
+def full_scans(plan):
+    """Plan lines that read a whole table or index instead of searching it"""
+    return [line.strip() for line in plan if line.strip().startswith('SCAN ')]
+
+def execute_logged(conn, sql, params=(), label='query', threshold=None, log_path=None):
+    """Run a query and return all rows, logging it if it took at least threshold seconds"""
+    threshold = SLOW_QUERY_SECONDS if threshold is None else threshold
+    start = time.perf_counter()
+    rows = conn.execute(sql, params).fetchall()
+    elapsed = time.perf_counter() - start
+
+    if elapsed >= threshold:
+        plan = explain(conn, sql, params)
+        record = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'label': label,
+            'elapsed_s': round(elapsed, 6),
+            'rows': len(rows),
+            'sql': normalize_sql(sql),
+            'params': list(params),
+            'plan': plan,
+            'full_scans': full_scans(plan),
+        }
+        with _log_lock:
+            with open(log_path or SLOW_QUERY_LOG, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+    return rows
+
+def load_log(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def summarize_log(path, k=10):
+    """Print the k slowest distinct queries and how often each was logged"""
+    by_sql = {}
+    for record in load_log(path):
+        entry = by_sql.setdefault(record['sql'], {'count': 0, 'worst': record})
+        entry['count'] += 1
+        if record['elapsed_s'] > entry['worst']['elapsed_s']:
+            entry['worst'] = record
+
+    ranked = sorted(by_sql.values(), key=lambda e: e['worst']['elapsed_s'], reverse=True)
+    print(f"{len(by_sql)} distinct slow queries in {path}")
+    for entry in ranked[:k]:
+        worst = entry['worst']
+        print(f"\n[{worst['label']}] logged {entry['count']}x, worst {worst['elapsed_s'] * 1000:.1f} ms, {worst['rows']} rows")
+        print(f"  {worst['sql']}")
+        print(f"  params: {worst['params']}")
+        for line in worst['full_scans']:
+            print(f"  FULL SCAN: {line}")
+
+def replay_log(path, db_path='zero_divisor_catalog.db'):
+    """Re-run each distinct logged query and show where its plan or time changed"""
+    records = {}
+    for record in load_log(path):
+        records.setdefault((record['sql'], json.dumps(record['params'])), record)
+
+    conn = sqlite3.connect(db_path)
+    changed = 0
+    for record in records.values():
+        plan = explain(conn, record['sql'], record['params'])
+        start = time.perf_counter()
+        conn.execute(record['sql'], record['params']).fetchall()
+        elapsed = time.perf_counter() - start
+
+        same_plan = plan == record['plan']
+        changed += not same_plan
+        print(f"\n[{record['label']}] {record['elapsed_s'] * 1000:.1f} ms -> {elapsed * 1000:.1f} ms"
+              f"{'' if same_plan else '  (plan changed)'}")
+        print(f"  {record['sql']}")
+        if same_plan:
+            for line in full_scans(plan):
+                print(f"  FULL SCAN: {line}")
+        else:
+            print("  before:")
+            for line in record['plan']:
+                print(f"    {line}")
+            print("  after:")
+            for line in plan:
+                print(f"    {line}")
+    conn.close()
+    print(f"\nReplayed {len(records)} queries against {db_path}; {changed} plan(s) changed")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ('summary', 'replay'):
+        print("Usage:")
+        print("  python query_log.py summary <log> [k]")
+        print("  python query_log.py replay <log> [db_path]")
+        sys.exit(1)
+
+    if sys.argv[1] == 'summary':
+        summarize_log(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 10)
+    else:
+        replay_log(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else 'zero_divisor_catalog.db')
@@ -1,5 +1,6 @@
 # query_structures.py
 from database import ZeroDivisorDatabase
+from edge_store import open_default_store
 import json
 
 # def display_available_entries():
@@ -20,32 +21,49 @@ import json
 #         print("\nNo entries found in database. Please run populate_db.py first.")
 #         return []
 
-def query_structure_values(n_values):
-    """Query and display the actual structure attribute values for specified n values"""
+def query_structure_values(n_values, report_missing=True):
+    """Query and display the actual structure attribute values for specified n values (None = all)"""
     db = ZeroDivisorDatabase()
     
-    print(f"\n=== STRUCTURE ATTRIBUTE VALUES FOR n = {n_values} ===\n")
+    if n_values is None:
+        print(f"\n=== STRUCTURE ATTRIBUTE VALUES FOR ALL n ===\n")
+    elif isinstance(n_values, range):
+        print(f"\n=== STRUCTURE ATTRIBUTE VALUES FOR n = {n_values.start}..{n_values.stop - 1} ===\n")
+    else:
+        print(f"\n=== STRUCTURE ATTRIBUTE VALUES FOR n = {n_values} ===\n")
     
-    for n in n_values:
-        data = db.get_by_n(n)
-        if data:
-            print(f"Z_{n}:")
-            print(f"  Zero Divisor Graph:")
-            print(f"    Vertices: {sorted(data['z_structure']['vertices'])}")
-            print(f"    Edges: {sorted(data['z_structure']['edges'])}")
-            print(f"    Vertex count: {data['zvertices_count']}")
-            print(f"    Edge count: {data['zedges_count']}")
-            print(f"  Exact Zero Divisor Graph:")
-            print(f"    Vertices: {sorted(data['ez_structure']['vertices'])}")
-            print(f"    Edges: {sorted(data['ez_structure']['edges'])}")
-            print(f"    Vertex count: {data['ezvertices_count']}")
-            print(f"    Edge count: {data['ezedges_count']}")
-            print(f"  Components: {data['exact_components_desc']}")
-            print(f"  Partition count: {data['partition_count']}")
-            print("-" * 60)
-        else:
-            print(f"Z_{n}: No data found")
+    # Entries are streamed in chunks from one connection, so ranges use constant memory
+    found = 0
+    expected = iter(n_values) if (report_missing and n_values is not None) else None
+    # Graphs populated with --edge-store are read from the store (ZDG_EDGE_STORE)
+    for data in db.iter_structures(n_values, edge_store=open_default_store()):
+        n = data['nvalue']
+        if expected is not None:
+            for missing in expected:
+                if missing == n:
+                    break
+                print(f"Z_{missing}: No data found")
+                print("-" * 60)
+        found += 1
+        print(f"Z_{n}:")
+        print(f"  Zero Divisor Graph:")
+        print(f"    Vertices: {sorted(data['z_structure']['vertices'])}")
+        print(f"    Edges: {sorted(data['z_structure']['edges'])}")
+        print(f"    Vertex count: {data['zvertices_count']}")
+        print(f"    Edge count: {data['zedges_count']}")
+        print(f"  Exact Zero Divisor Graph:")
+        print(f"    Vertices: {sorted(data['ez_structure']['vertices'])}")
+        print(f"    Edges: {sorted(data['ez_structure']['edges'])}")
+        print(f"    Vertex count: {data['ezvertices_count']}")
+        print(f"    Edge count: {data['ezedges_count']}")
+        print(f"  Components: {data['exact_components_desc']}")
+        print(f"  Partition count: {data['partition_count']}")
+        print("-" * 60)
+    if expected is not None:
+        for missing in expected:
+            print(f"Z_{missing}: No data found")
             print("-" * 60)
+    return found
 
 def query_raw_structure_json(n):
     """Query and display the raw JSON structure for a specific n"""
@@ -69,10 +87,25 @@ def query_raw_structure_json(n):
         print(f"Exact Zero Divisor Structure JSON: {ez_struct}")
         print(f"Components Description: {comp_desc}")
         
+        if z_struct == '0':
+            # No JSON for this n: either its graphs are in the edge store, or it is summary-only
+            offsets = db.get_graph_offsets(nval)
+            store = open_default_store()
+            if not offsets:
+                print("(Graphs are not stored for this n, only its summary)")
+                return
+            if store is None:
+                print(f"(Graphs are kept in the edge store at {offsets}, but no store file was found; set ZDG_EDGE_STORE)")
+                return
+            print("(Graphs are kept in the edge store; shown from there)")
+            z_parsed = store.read(*offsets['z']).to_structure()
+            ez_parsed = store.read(*offsets['ez']).to_structure()
+        else:
+            z_parsed = json.loads(z_struct)
+            ez_parsed = json.loads(ez_struct)
+        
         # Parse and display formatted
         print(f"\nFORMATTED STRUCTURE for Z_{nval}:")
-        z_parsed = json.loads(z_struct)
-        ez_parsed = json.loads(ez_struct)
         
         print(f"Zero Divisor Graph:")
         print(f"  Vertices: {sorted(z_parsed['vertices'])}")
@@ -128,7 +161,7 @@ def get_range_values():
             end = input("Enter end n: ").strip()
             if end.lower() == 'back':
                 return None
-            return list(range(int(start), int(end) + 1))
+            return range(int(start), int(end) + 1)
         except ValueError:
             print("Invalid input. Please enter numbers.")
         except KeyboardInterrupt:
@@ -169,22 +202,20 @@ def main():
                 query_structure_values(n_values)
                 
         elif choice == '2':  # Query all available
-            query_structure_values(available_entries)
+            if not query_structure_values(None):
+                print("No entries found in database. Please run populate_db.py first.")
             
         elif choice == '3':  # Query range
             n_values = get_range_values()
             if n_values is not None:
-                # Filter to only available entries in range
-                available_in_range = [n for n in n_values if n in available_entries]
-                if available_in_range:
-                    query_structure_values(available_in_range)
-                else:
+                # Only entries present in the range are shown
+                if not query_structure_values(n_values, report_missing=False):
                     print("No data available for the specified range.")
                     
         elif choice == '4':  # Raw JSON for specific n
             n = get_single_n()
             if n is not None:
-                if n in available_entries:
+                if ZeroDivisorDatabase().get_by_n(n):
                     query_raw_structure_json(n)
                 else:
                     print(f"No data available for Z_{n}")
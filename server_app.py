@@ -1,17 +1,178 @@
 # server_app.py
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, copy_current_request_context, g, jsonify, request
 from flask_cors import CORS
-from database import ZeroDivisorDatabase
+from bitmap_index import ComponentIndex
+from database import INVARIANT_FILTERS, ZeroDivisorDatabase
+from server_metrics import InstrumentedLock, MetricsRegistry, profile_request
+from shards import CatalogGeneration, ShardedCatalog
+from spectrum import GRAPHS, MATRICES, ON_DEMAND_LIMIT, spectrum_rows
+from vertex_query import DEFAULT_LIMIT, vertex_query
+from graph_record import GraphRecord
+from edge_store import EDGE_STORE_PATH, EdgeStore
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import wraps
+import gzip
 import json
 import csv
 import io
-from threading import Lock
+import os
+import sys
+import time
+from threading import BoundedSemaphore, Lock
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
 
 app = Flask(__name__)
 CORS(app)
 
-db = ZeroDivisorDatabase()
-db_lock = Lock()
+# ZDG_SHARDS (a glob such as 'shards/*.db') serves a set of shard files read-only instead
+SHARD_PATTERN = os.environ.get('ZDG_SHARDS')
+if SHARD_PATTERN:
+    db = ShardedCatalog(SHARD_PATTERN)
+else:
+    db = ZeroDivisorDatabase(os.environ.get('ZDG_DB_PATH', 'zero_divisor_catalog.db'))
+metrics = MetricsRegistry()
+db_lock = InstrumentedLock('db_lock', metrics)
+
+# Changes whenever another process commits to the catalog (population, delete_entry.py, ...)
+catalog_generation = CatalogGeneration(db)
+
+# Bitmaps over n for the /api/entries component filters, loaded in the background at start
+# and again whenever the catalog changes; until then searches run in SQL (ZDG_COMPONENT_INDEX=0
+# turns the index off)
+component_index = ComponentIndex(db, generation=catalog_generation) if os.environ.get('ZDG_COMPONENT_INDEX', '1') != '0' else None
+if component_index:
+    component_index.refresh()
+
+# Recently served graph payloads, keyed by (n, format); emptied when the catalog generation changes
+GRAPH_CACHE_SIZE = int(os.environ.get('ZDG_GRAPH_CACHE_SIZE', 8))
+graph_cache = OrderedDict()
+graph_cache_generation = None
+graph_cache_lock = Lock()
+
+# Graphs populated with --edge-store are read from this file (ZDG_EDGE_STORE)
+edge_store = EdgeStore(EDGE_STORE_PATH)
+
+# Heavy endpoints run in a bounded executor so they cannot starve cheap ones
+# (/api/health, /api/entries). Limits are per endpoint; requests over the
+# limit get 503 immediately instead of queueing behind a slow download.
+HEAVY_ENDPOINT_LIMITS = {
+    'graph': int(os.environ.get('ZDG_GRAPH_CONCURRENCY', 2)),
+    'export_csv': int(os.environ.get('ZDG_EXPORT_CONCURRENCY', 1)),
+}
+HEAVY_REQUEST_TIMEOUT = float(os.environ.get('ZDG_HEAVY_TIMEOUT', 120))
+
+heavy_executor = ThreadPoolExecutor(
+    max_workers=sum(HEAVY_ENDPOINT_LIMITS.values()),
+    thread_name_prefix='heavy'
+)
+heavy_slots = {name: BoundedSemaphore(limit) for name, limit in HEAVY_ENDPOINT_LIMITS.items()}
+
+def heavy_endpoint(name):
+    """Run a view in the heavy executor with a per-endpoint concurrency limit and timeout"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            slot = heavy_slots[name]
+            if not slot.acquire(blocking=False):
+                response = jsonify({'success': False, 'error': f'Too many concurrent {name} requests, retry shortly'})
+                response.headers['Retry-After'] = '5'
+                return response, 503
+
+            @copy_current_request_context
+            def run():
+                # The slot is held until the work actually finishes, even if the client timed out
+                try:
+                    with profile_request(request):
+                        return view(*args, **kwargs)
+                finally:
+                    slot.release()
+
+            try:
+                future = heavy_executor.submit(run)
+            except Exception:
+                slot.release()
+                raise
+            try:
+                return future.result(timeout=HEAVY_REQUEST_TIMEOUT)
+            except FutureTimeoutError:
+                return jsonify({'success': False, 'error': f'{name} request timed out after {HEAVY_REQUEST_TIMEOUT:g}s'}), 504
+        return wrapper
+    return decorator
+
+def profiled(view):
+    """Profile the view with cProfile when the request asks for it (X-Profile: 1 or ?profile=1)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with profile_request(request):
+            return view(*args, **kwargs)
+    return wrapper
+
+def phase(name):
+    """Time a phase (sql, serialize, ...) of the current request"""
+    return metrics.phase(request.endpoint or 'unmatched', name)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+# Registered before compress_response so that it runs after it (Flask runs
+# after_request hooks in reverse order) and sees the final, compressed size
+@app.after_request
+def record_request_metrics(response):
+    start = g.get('request_start')
+    if start is not None:
+        size = 0 if response.direct_passthrough else len(response.get_data())
+        metrics.observe_request(request.endpoint or 'unmatched', response.status_code,
+                                time.perf_counter() - start, size)
+    return response
+
+# Responses smaller than this are not worth compressing
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/csv')
+
+def choose_content_encoding(accept_encoding):
+    """Pick the best encoding the client accepts: br if available, then gzip"""
+    accepted = set()
+    for item in accept_encoding.split(','):
+        token, _, params = item.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0'):
+            continue
+        accepted.add(token.strip().lower())
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+@app.after_request
+def compress_response(response):
+    """Compress JSON/CSV responses according to the client's Accept-Encoding"""
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_content_encoding(request.headers.get('Accept-Encoding', ''))
+    if encoding is None:
+        return response
+
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return response
+
+    if encoding == 'br':
+        body = brotli.compress(body, quality=5)
+    else:
+        body = gzip.compress(body, compresslevel=6)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
 
 def parse_component_filter(component_filter):
     """Parse component filter with wildcard support"""
@@ -64,7 +225,12 @@ def parse_component_filter(component_filter):
 def health_check():
     return jsonify({'status': 'healthy', 'message': 'Server running'})
 
+@app.route('/api/metrics')
+def get_metrics():
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/entries')
+@profiled
 def get_entries():
     try:
         start_n = request.args.get('start_n', 1, type=int)
@@ -73,76 +239,135 @@ def get_entries():
         exact_match = request.args.get('exact_match', 'false') == 'true'
         component_type = request.args.get('component_type', '')
 
-        query = '''
-            SELECT mn.nvalue, mn.exact_components_desc, mn.partition_count,
-                   mn.zvertices_count, mn.zedges_count, mn.ezvertices_count, mn.ezedges_count,
-                   mn.complete, mn.complete_bipartite
-            FROM MyNumber mn
-            WHERE mn.nvalue BETWEEN ? AND ?
-        '''
-        params = [start_n, end_n]
-
-        if component_filter:
-            components = parse_component_filter(component_filter)
-            conditions = []
-            cparams = []
-            for comp in components:
-                if comp['type'] == 'bipartite':
-                    if comp['p1'] is None and comp['p2'] is None:
-                        conditions.append("EXISTS (SELECT 1 FROM ExactConnection ec WHERE ec.entry_id = mn.entry_id AND ec.component_type = 'bipartite')")
-                    elif comp['p1'] is None:
-                        conditions.append("EXISTS (SELECT 1 FROM ExactConnection ec WHERE ec.entry_id = mn.entry_id AND ec.component_type = 'bipartite' AND ec.p2 = ?)")
-                        cparams.append(comp['p2'])
-                    elif comp['p2'] is None:
-                        conditions.append("EXISTS (SELECT 1 FROM ExactConnection ec WHERE ec.entry_id = mn.entry_id AND ec.component_type = 'bipartite' AND ec.p1 = ?)")
-                        cparams.append(comp['p1'])
-                    else:
-                        conditions.append("EXISTS (SELECT 1 FROM ExactConnection ec WHERE ec.entry_id = mn.entry_id AND ec.component_type = 'bipartite' AND ec.p1 = ? AND ec.p2 = ?)")
-                        cparams.extend([comp['p1'], comp['p2']])
-                elif comp['type'] == 'complete':
-                    conditions.append("EXISTS (SELECT 1 FROM ExactConnection ec WHERE ec.entry_id = mn.entry_id AND ec.component_type = 'complete' AND ec.p1 = ? AND ec.p2 IS NULL)")
-                    cparams.append(comp['p1'])
-            if conditions:
-                query += ' AND ' + ' AND '.join(conditions)
-                params.extend(cparams)
-                if exact_match:
-                    query += f' AND mn.partition_count = {len(components)}'
-
-        if component_type == 'complete':
-            query += ' AND mn.complete > 0'
-        elif component_type == 'bipartite':
-            query += ' AND mn.complete_bipartite > 0'
-
-        query += ' ORDER BY mn.nvalue'
-
-        with db_lock:
-            conn = db._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            conn.close()
-
-        entries = []
-        for row in results:
-            entry = {
-                'n': row[0],
-                'exact_components': row[1] if row[1] else 'None',
-                'partition_count': row[2],
-                'zvertices_count': row[3],
-                'zedges_count': row[4],
-                'ezvertices_count': row[5],
-                'ezedges_count': row[6],
-                'has_complete': row[7] > 0,
-                'has_bipartite': row[8] > 0,
-                'can_generate_graph': row[0] <= 5500
-            }
-            entries.append(entry)
-
-        return jsonify({'success': True, 'entries': entries, 'total': len(entries)})
+        components = parse_component_filter(component_filter) if component_filter else []
+        # min_<invariant> / max_<invariant>, e.g. min_clique_number=5&max_diameter=2
+        invariants = {}
+        for column in INVARIANT_FILTERS:
+            bounds = (request.args.get(f'min_{column}', type=int), request.args.get(f'max_{column}', type=int))
+            if bounds != (None, None):
+                invariants[column] = bounds
+
+        with phase('index'):
+            ns = component_index.search(start_n, end_n, components, exact_match, component_type) if component_index else None
+        with db_lock, phase('sql'):
+            if ns is None:
+                results = db.search_entries(start_n, end_n, components, exact_match, component_type, invariants)
+            else:
+                # Only the matching rows are read
+                results = db.get_entries(ns, invariants)
+
+        with phase('serialize'):
+            return jsonify({'success': True, 'entries': _entry_rows(results), 'total': len(results)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def _entry_rows(results):
+    """Shape /api/entries rows for JSON"""
+    entries = []
+    for row in results:
+        entry = {
+            'n': row[0],
+            'exact_components': row[1] if row[1] else 'None',
+            'partition_count': row[2],
+            'zvertices_count': row[3],
+            'zedges_count': row[4],
+            'ezvertices_count': row[5],
+            'ezedges_count': row[6],
+            'has_complete': row[7] > 0,
+            'has_bipartite': row[8] > 0,
+            'can_generate_graph': row[0] <= 5500,
+            **dict(zip(INVARIANT_FILTERS, row[9:]))
+        }
+        entries.append(entry)
+    return entries
+
+@app.route('/api/stats')
+@profiled
+def get_stats():
+    try:
+        limit = request.args.get('limit', 10, type=int)
+        shape_limit = request.args.get('shapes', 25, type=int)
+        with phase('sql'):
+            stats = db.get_component_stats(limit=limit, shape_limit=shape_limit)
+        return jsonify({'success': True, 'stats': stats})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/components/search')
+@profiled
+def search_components():
+    try:
+        component_type = request.args.get('type') or None
+        limit = min(request.args.get('limit', 1000, type=int), 10000)
+        offset = request.args.get('offset', 0, type=int)
+        with phase('sql'):
+            results = db.search_components(
+                component_type=component_type,
+                min_size=request.args.get('min_size', type=int),
+                max_size=request.args.get('max_size', type=int),
+                min_edges=request.args.get('min_edges', type=int),
+                max_edges=request.args.get('max_edges', type=int),
+                shape=request.args.get('shape') or None,
+                start_n=request.args.get('start_n', type=int),
+                end_n=request.args.get('end_n', type=int),
+                order_by=request.args.get('order', 'n'),
+                limit=limit,
+                offset=offset
+            )
+        return jsonify({'success': True, 'components': results, 'total': len(results),
+                        'limit': limit, 'offset': offset})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/spectrum/<int:n>')
+@profiled
+def get_spectrum(n):
+    try:
+        graph = request.args.get('graph') or None
+        matrix = request.args.get('matrix') or None
+        if graph not in (None, *GRAPHS) or matrix not in (None, *MATRICES):
+            return jsonify({'success': False, 'error': f'graph must be one of {GRAPHS}, matrix one of {MATRICES}'}), 400
+
+        with db_lock, phase('sql'):
+            spectra = db.get_spectrum(n, graph, matrix)
+        stored = bool(spectra)
+        if not stored:
+            # Not filled in yet (spectrum.py fill): the quotient matrices are small enough to do now
+            if n > ON_DEMAND_LIMIT:
+                return jsonify({'success': False, 'error': f'No spectrum stored for Z_{n}'}), 404
+            with phase('encode'):
+                spectra = [{'graph': g, 'matrix': m, 'eigenvalues': json.loads(eigenvalues), 'spectral_radius': radius}
+                           for _, g, m, eigenvalues, radius in spectrum_rows(n)
+                           if graph in (None, g) and matrix in (None, m)]
+        return jsonify({'success': True, 'data': {'n': n, 'stored': stored, 'spectra': spectra}})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/vertex/<int:n>/<int:x>')
+@profiled
+def get_vertex(n, x):
+    try:
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        limit = min(max(request.args.get('limit', DEFAULT_LIMIT, type=int), 0), 10000)
+        # Computed from gcd(x, n): no database access, any n up to MAX_N (larger is a 400)
+        with phase('encode'):
+            result = vertex_query(n, x, offset, limit)
+        return jsonify({'success': True, 'data': result})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+EXPORT_COLUMNS = (
+    'nvalue', 'exact_components_desc', 'partition_count',
+    'zvertices_count', 'zedges_count', 'ezvertices_count', 'ezedges_count',
+    'complete', 'complete_bipartite'
+)
+
 @app.route('/api/export/csv')
+@heavy_endpoint('export_csv')
 def export_csv():
     try:
         output = io.StringIO()
@@ -154,55 +379,112 @@ def export_csv():
             'complete_components', 'bipartite_components'
         ])
 
-        with db_lock:
-            conn = db._get_connection()
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT nvalue, exact_components_desc, partition_count,
-                       zvertices_count, zedges_count, ezvertices_count, ezedges_count,
-                       complete, complete_bipartite
-                FROM MyNumber ORDER BY nvalue
-            ''')
-            results = cursor.fetchall()
-            conn.close()
-
-        for row in results:
-            writer.writerow([row[0], row[1] or '', row[2], row[3], row[4], row[5], row[6], row[7], row[8]])
-
-        output.seek(0)
-        return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
+        # Own connection, no db_lock: a full export must not block searches
+        with phase('sql'):
+            results = [tuple(row.values()) for row in db.iter_range(columns=EXPORT_COLUMNS)]
+        
+        with phase('serialize'):
+            for row in results:
+                writer.writerow([row[0], row[1] or '', row[2], row[3], row[4], row[5], row[6], row[7], row[8]])
+
+        # Built as a plain Response (not send_file) so compress_response can gzip it
+        return Response(
+            output.getvalue(),
             mimetype='text/csv',
-            as_attachment=True,
-            download_name='zero_divisor_catalog.csv'
+            headers={'Content-Disposition': 'attachment; filename=zero_divisor_catalog.csv'}
         )
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/graph/<int:n>')
+@heavy_endpoint('graph')
 def get_graph(n):
     try:
         if n > 5500:
             return jsonify({'success': False, 'error': f'Graph generation not available for n > 5500'}), 400
 
-        data = db.get_by_n(n)
-        if not data:
-            return jsonify({'success': False, 'error': f'No data found for Z_{n}'}), 404
-
-        if data.get('z_structure') in ('0', None) or data.get('ez_structure') in ('0', None):
-            return jsonify({'success': False, 'error': 'Structure data not available'}), 404
-
-        return jsonify({
-            'success': True,
-            'data': {
-                'n': n,
-                'zero_divisor_graph': data['z_structure'],
-                'exact_zero_divisor_graph': data['ez_structure'],
-                'components': data['exact_components_desc']
-            }
-        })
+        wire_format = request.args.get('format', 'json')
+        if wire_format not in ('json', 'compact'):
+            return jsonify({'success': False, 'error': f'Unknown format: {wire_format}'}), 400
+
+        global graph_cache_generation
+        generation = catalog_generation.current() if GRAPH_CACHE_SIZE > 0 else None
+        with graph_cache_lock:
+            if generation != graph_cache_generation:
+                # Repopulated or deleted since these payloads were built
+                graph_cache.clear()
+                graph_cache_generation = generation
+            payload = graph_cache.get((n, wire_format))
+            if payload is not None:
+                graph_cache.move_to_end((n, wire_format))
+        metrics.record_cache('graph', payload is not None)
+
+        if payload is None:
+            with phase('sql'):
+                row = db.get_structure_json(n)
+                offsets = db.get_graph_offsets(n) if row else None
+            if not row:
+                return jsonify({'success': False, 'error': f'No data found for Z_{n}'}), 404
+
+            z_structure, ez_structure, components = row
+            z_graph = ez_graph = None
+            if offsets:
+                # Kept in the edge store: slice the records out of the mapped file
+                with phase('store'):
+                    z_graph = edge_store.read(*offsets['z'])
+                    ez_graph = edge_store.read(*offsets['ez'])
+            elif z_structure in ('0', None) or ez_structure in ('0', None):
+                return jsonify({'success': False, 'error': 'Structure data not available'}), 404
+
+            if wire_format == 'compact':
+                with phase('encode'):
+                    z_compact = (z_graph or GraphRecord.from_structure(n, z_structure)).to_compact()
+                    ez_compact = (ez_graph or GraphRecord.from_structure(n, ez_structure)).to_compact()
+                with phase('serialize'):
+                    payload = json.dumps({'success': True, 'data': {
+                        'n': n,
+                        'format': wire_format,
+                        'zero_divisor_graph': z_compact,
+                        'exact_zero_divisor_graph': ez_compact,
+                        'components': components
+                    }})
+            else:
+                # The stored structure JSON is sent as-is, without a decode/encode round trip
+                with phase('serialize'):
+                    if z_graph is not None:
+                        z_structure, ez_structure = z_graph.to_json(), ez_graph.to_json()
+                    payload = ('{"success": true, "data": {"n": %d, "format": "json", '
+                               '"zero_divisor_graph": %s, "exact_zero_divisor_graph": %s, '
+                               '"components": %s}}' % (n, z_structure, ez_structure, json.dumps(components)))
+
+            if GRAPH_CACHE_SIZE > 0:
+                with graph_cache_lock:
+                    graph_cache[(n, wire_format)] = payload
+                    while len(graph_cache) > GRAPH_CACHE_SIZE:
+                        graph_cache.popitem(last=False)
+
+        return Response(payload, mimetype='application/json')
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def create_asgi_app():
+    """Wrap the Flask app for an ASGI server (requires asgiref)"""
+    try:
+        from asgiref.wsgi import WsgiToAsgi
+    except ImportError:
+        raise RuntimeError("ASGI mode requires asgiref: pip install asgiref uvicorn")
+    return WsgiToAsgi(app)
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
\ No newline at end of file
+    port = int(os.environ.get('ZDG_PORT', 5000))
+    if '--asgi' in sys.argv:
+        # Async mode: uvicorn's event loop owns the sockets, so slow clients on
+        # heavy endpoints no longer pin a dev-server thread each
+        try:
+            import uvicorn
+        except ImportError:
+            print("ASGI mode requires uvicorn: pip install asgiref uvicorn")
+            sys.exit(1)
+        uvicorn.run(create_asgi_app(), host='0.0.0.0', port=port)
+    else:
+        app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
\ No newline at end of file
@@ -0,0 +1,169 @@
+# server_metrics.py
+"""
+Request metrics (Prometheus text format) and opt-in per-request profiling for server_app.py.
+
+Metrics are process-local and thread-safe. Profiling is requested per call with the
+`X-Profile: 1` header or `?profile=1`; the cProfile dump is written to ZDG_PROFILE_DIR
+when the request took at least ZDG_PROFILE_MIN_SECONDS.
+"""
+import cProfile
+import os
+import re
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2, 100 * 1024 ** 2)
+LOCK_WAIT_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+PROFILE_DIR = os.environ.get('ZDG_PROFILE_DIR', 'profiles')
+PROFILE_MIN_SECONDS = float(os.environ.get('ZDG_PROFILE_MIN_SECONDS', 1))
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+def _labels(**labels):
+    return ','.join(f'{key}="{value}"' for key, value in labels.items())
+
+class MetricsRegistry:
+    """All server metrics; every update takes one short lock"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.requests = {}        # (endpoint, status) -> count
+        self.latency = {}         # endpoint -> Histogram
+        self.response_size = {}   # endpoint -> Histogram
+        self.phase_seconds = {}   # (endpoint, phase) -> seconds
+        self.cache = {}           # (cache, 'hit'/'miss') -> count
+        self.lock_wait = {}       # lock name -> Histogram
+
+    def observe_request(self, endpoint, status, seconds, size):
+        with self._lock:
+            key = (endpoint, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault(endpoint, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.response_size.setdefault(endpoint, Histogram(SIZE_BUCKETS)).observe(size)
+
+    def add_phase(self, endpoint, phase, seconds):
+        with self._lock:
+            key = (endpoint, phase)
+            self.phase_seconds[key] = self.phase_seconds.get(key, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, endpoint, phase):
+        """Time a phase of request handling, e.g. 'sql' or 'serialize'"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(endpoint, phase, time.perf_counter() - start)
+
+    def record_cache(self, cache, hit):
+        with self._lock:
+            key = (cache, 'hit' if hit else 'miss')
+            self.cache[key] = self.cache.get(key, 0) + 1
+
+    def observe_lock_wait(self, name, seconds):
+        with self._lock:
+            self.lock_wait.setdefault(name, Histogram(LOCK_WAIT_BUCKETS)).observe(seconds)
+
+    def render_prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+
+        def histogram(name, help_text, label_name, histograms):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for label_value, hist in sorted(histograms.items()):
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(f'{name}_bucket{{{_labels(**{label_name: label_value, "le": f"{bound:g}"})}}} {count}')
+                lines.append(f'{name}_bucket{{{_labels(**{label_name: label_value, "le": "+Inf"})}}} {hist.count}')
+                lines.append(f'{name}_sum{{{_labels(**{label_name: label_value})}}} {hist.total:.6f}')
+                lines.append(f'{name}_count{{{_labels(**{label_name: label_value})}}} {hist.count}')
+
+        with self._lock:
+            lines.append('# HELP zdg_http_requests_total HTTP requests by endpoint and status')
+            lines.append('# TYPE zdg_http_requests_total counter')
+            for (endpoint, status), count in sorted(self.requests.items()):
+                lines.append(f'zdg_http_requests_total{{{_labels(endpoint=endpoint, status=status)}}} {count}')
+
+            histogram('zdg_http_request_duration_seconds', 'Request latency',
+                      'endpoint', self.latency)
+            histogram('zdg_http_response_size_bytes', 'Response body size after compression',
+                      'endpoint', self.response_size)
+
+            lines.append('# HELP zdg_request_phase_seconds_total Time spent per request phase (sql, serialize, ...)')
+            lines.append('# TYPE zdg_request_phase_seconds_total counter')
+            for (endpoint, phase), seconds in sorted(self.phase_seconds.items()):
+                lines.append(f'zdg_request_phase_seconds_total{{{_labels(endpoint=endpoint, phase=phase)}}} {seconds:.6f}')
+
+            lines.append('# HELP zdg_cache_requests_total Cache lookups by result')
+            lines.append('# TYPE zdg_cache_requests_total counter')
+            for (cache, result), count in sorted(self.cache.items()):
+                lines.append(f'zdg_cache_requests_total{{{_labels(cache=cache, result=result)}}} {count}')
+
+            histogram('zdg_lock_wait_seconds', 'Time spent waiting to acquire a lock',
+                      'lock', self.lock_wait)
+
+        return '\n'.join(lines) + '\n'
+
+class InstrumentedLock:
+    """Lock wrapper that records how long callers waited to acquire it"""
+
+    def __init__(self, name, registry, lock=None):
+        self.name = name
+        self.registry = registry
+        self._lock = lock or Lock()
+
+    def __enter__(self):
+        start = time.perf_counter()
+        self._lock.acquire()
+        self.registry.observe_lock_wait(self.name, time.perf_counter() - start)
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+        return False
+
+def profiling_requested(request):
+    """True when the request opted in with X-Profile: 1 or ?profile=1"""
+    return request.headers.get('X-Profile') == '1' or request.args.get('profile') == '1'
+
+@contextmanager
+def profile_request(request):
+    """
+    Run the enclosed code under cProfile if the request asked for it, and dump the
+    stats to PROFILE_DIR when it took at least PROFILE_MIN_SECONDS.
+    cProfile is per thread, so enter this in the thread that does the work.
+    """
+    if not profiling_requested(request):
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        if elapsed >= PROFILE_MIN_SECONDS:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', request.path.strip('/')) or 'root'
+            filename = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{slug}_{elapsed * 1000:.0f}ms.prof")
+            profiler.dump_stats(filename)
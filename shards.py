@@ -0,0 +1,374 @@
+# shards.py
+"""
+Sharded population: each worker (or machine) writes its own SQLite file for a range of n,
+so populate_db.py processes never share a writer lock. merge_shards() then ATTACHes the
+shard files to the master catalog and bulk-copies them, renumbering entry_ids.
+
+ShardedCatalog serves a set of shard files read-only without merging them (ZDG_SHARDS in
+server_app.py).
+
+    python shards.py plan 6151 1000000 8                  # one populate command per worker
+    python populate_db.py 6151 130000 --shard shards      # -> shards/zdg_000006151_000130000.db
+    python shards.py merge zero_divisor_catalog.db shards/*.db
+    python shards.py list 'shards/*.db'
+"""
+import glob
+import heapq
+import os
+import sqlite3
+import sys
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from database import ZeroDivisorDatabase
+
+SHARD_PATTERN = 'zdg_{start:09d}_{end:09d}.db'
+
+def shard_path(directory, start_n, end_n):
+    """Shard file for start_n..end_n inside directory (created if needed)"""
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, SHARD_PATTERN.format(start=start_n, end=end_n))
+
+def split_range(start_n, end_n, parts):
+    """start_n..end_n cut into at most `parts` contiguous (start, end) ranges"""
+    size = -(-(end_n - start_n + 1) // parts)
+    return [(start, min(start + size - 1, end_n)) for start in range(start_n, end_n + 1, size)]
+
+def _table_columns(conn, schema, table):
+    # table_info leaves out generated columns, which cannot be inserted into
+    return [row[1] for row in conn.execute(f'PRAGMA {schema}.table_info({table})')]
+
+def _copy_shard(conn, alias, path):
+    """Copy one attached shard into main; returns the number of entries copied"""
+    if conn.execute(f'SELECT EXISTS (SELECT 1 FROM {alias}.GraphStore)').fetchone()[0]:
+        raise ValueError(f"{path} keeps graphs in an edge store; populate shards without --edge-store")
+
+    # n present in both: the shard's row wins, as with insert_number_data
+    shard_n = f'SELECT nvalue FROM {alias}.MyNumber'
+    replaced = f'SELECT entry_id FROM main.MyNumber WHERE nvalue IN ({shard_n})'
+    conn.execute(f'DELETE FROM main.ExactConnection WHERE entry_id IN ({replaced})')
+    conn.execute(f'DELETE FROM main.EntryStats WHERE entry_id IN ({replaced})')
+    conn.execute(f'DELETE FROM main.GraphStore WHERE nvalue IN ({shard_n})')
+    conn.execute(f'DELETE FROM main.MyNumber WHERE nvalue IN ({shard_n})')
+
+    # Shard entry_ids are shifted past every id the master has handed out
+    base = conn.execute('''
+        SELECT MAX(
+            COALESCE((SELECT MAX(entry_id) FROM main.MyNumber), 0),
+            COALESCE((SELECT seq FROM main.sqlite_sequence WHERE name = 'MyNumber'), 0)
+        )
+    ''').fetchone()[0]
+
+    columns = [c for c in _table_columns(conn, 'main', 'MyNumber') if c != 'entry_id']
+    missing = set(columns) - set(_table_columns(conn, alias, 'MyNumber'))
+    if missing:
+        raise ValueError(f"{path} is missing MyNumber columns: {sorted(missing)}")
+    column_list = ', '.join(columns)
+    copied = conn.execute(f'''
+        INSERT INTO main.MyNumber (entry_id, {column_list})
+        SELECT entry_id + ?, {column_list} FROM {alias}.MyNumber
+    ''', (base,)).rowcount
+
+    # Connections whose entry no longer exists in the shard are left behind
+    conn.execute(f'''
+        INSERT INTO main.ExactConnection (entry_id, component_type, p1, p2)
+        SELECT ec.entry_id + ?, ec.component_type, ec.p1, ec.p2
+        FROM {alias}.ExactConnection ec
+        JOIN {alias}.MyNumber mn ON mn.entry_id = ec.entry_id
+        ORDER BY ec.connection_id
+    ''', (base,))
+
+    stats_columns = ', '.join(c for c in _table_columns(conn, 'main', 'EntryStats') if c != 'entry_id')
+    conn.execute(f'''
+        INSERT INTO main.EntryStats (entry_id, {stats_columns})
+        SELECT es.entry_id + ?, {', '.join('es.' + c for c in stats_columns.split(', '))}
+        FROM {alias}.EntryStats es
+        JOIN {alias}.MyNumber mn ON mn.entry_id = es.entry_id
+    ''', (base,))
+
+    conn.execute(f'''
+        INSERT OR IGNORE INTO main.SignatureSkeleton (signature, skeleton)
+        SELECT signature, skeleton FROM {alias}.SignatureSkeleton
+    ''')
+    # Shards written before the Spectrum table existed have none to copy
+    if conn.execute(f"SELECT 1 FROM {alias}.sqlite_master WHERE name = 'Spectrum'").fetchone():
+        conn.execute(f'INSERT OR REPLACE INTO main.Spectrum SELECT * FROM {alias}.Spectrum')
+    return copied
+
+def merge_shards(master_path, shard_paths):
+    """
+    Bulk-copy shard databases into the master catalog and return the number of entries
+    copied. Shards are attached in batches of up to SQLite's attach limit (10 by default),
+    and each batch is copied in one transaction, so a failed batch leaves the master as it
+    was before that batch.
+    """
+    ZeroDivisorDatabase(master_path)
+    for path in shard_paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        ZeroDivisorDatabase(path)  # bring older shards up to the current schema
+
+    conn = sqlite3.connect(master_path, isolation_level=None)
+    batch_size = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    copied = 0
+    try:
+        for i in range(0, len(shard_paths), batch_size):
+            batch = shard_paths[i:i + batch_size]
+            aliases = [f'shard{j}' for j in range(len(batch))]
+            for alias, path in zip(aliases, batch):
+                conn.execute(f'ATTACH DATABASE ? AS {alias}', (path,))
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    batch_copied = sum(_copy_shard(conn, alias, path) for alias, path in zip(aliases, batch))
+                    # Shape totals span shards, so they are recounted from the merged connections
+                    conn.execute('DELETE FROM main.ShapeFrequency')
+                    conn.execute('''
+                        INSERT INTO main.ShapeFrequency (shape_key, component_type, p1, p2, entry_count, occurrences)
+                        SELECT shape_key, component_type, p1, p2, COUNT(DISTINCT entry_id), COUNT(*)
+                        FROM main.ExactConnection
+                        WHERE entry_id IN (SELECT entry_id FROM main.MyNumber)
+                        GROUP BY shape_key
+                    ''')
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+                copied += batch_copied
+                for path in batch:
+                    print(f"  ✓ Merged {path}")
+            finally:
+                for alias in aliases:
+                    conn.execute(f'DETACH DATABASE {alias}')
+    finally:
+        conn.close()
+    return copied
+
+class CatalogGeneration:
+    """
+    A value that changes whenever the catalog's data does: (path, PRAGMA data_version) for each
+    file of a ZeroDivisorDatabase or ShardedCatalog. data_version moves when another connection
+    commits, so it is read on read-only connections kept open for the purpose.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._connections = {}
+        self._lock = Lock()
+
+    def current(self):
+        if isinstance(self.db, ShardedCatalog):
+            paths = [shard.db_path for _, _, shard in self.db.refresh()]
+        else:
+            paths = [self.db.db_path]
+        with self._lock:  # the connections are shared by request threads
+            generation = []
+            for path in paths:
+                conn = self._connections.get(path)
+                if conn is None:
+                    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+                    self._connections[path] = conn
+                generation.append((path, conn.execute('PRAGMA data_version').fetchone()[0]))
+            return tuple(generation)
+
+class ShardedCatalog:
+    """
+    Read-only view over shard files (e.g. one per 100k range of n) with the read methods of
+    ZeroDivisorDatabase that the API uses. Each shard's n range is read when it is first seen;
+    lookups and range queries go only to the shards that overlap, and searches fan out across
+    shards in parallel with the results merged in n order. Files that start matching the
+    pattern are picked up on the next query. Shards are expected to cover disjoint ranges.
+    """
+
+    def __init__(self, pattern, max_workers=8):
+        self.pattern = pattern
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='shard')
+        self.shards = []  # (start_n, end_n, ZeroDivisorDatabase), by start_n
+        self._paths = ()
+        self._lock = Lock()
+        self.refresh()
+
+    def refresh(self):
+        """Re-list the shard files; returns the current (start_n, end_n, db) list"""
+        paths = tuple(sorted(glob.glob(self.pattern)))
+        with self._lock:
+            if paths != self._paths:
+                known = {db.db_path: (start_n, end_n, db) for start_n, end_n, db in self.shards}
+                shards = []
+                for path in paths:
+                    if path in known:
+                        shards.append(known[path])
+                        continue
+                    db = ZeroDivisorDatabase(path, read_only=True)
+                    n_range = db.get_n_range()
+                    if n_range:
+                        shards.append((n_range[0], n_range[1], db))
+                self.shards = sorted(shards, key=lambda shard: shard[0])
+                self._paths = paths
+            return self.shards
+
+    def _overlapping(self, start_n=None, end_n=None):
+        return [db for first, last, db in self.refresh()
+                if (start_n is None or last >= start_n) and (end_n is None or first <= end_n)]
+
+    def _shard_for(self, n):
+        for first, last, db in self.refresh():
+            if first <= n <= last:
+                return db
+        return None
+
+    def _fan_out(self, shards, method, *args, **kwargs):
+        """Call method on every shard (in parallel when there are several); results in shard order"""
+        if len(shards) == 1:
+            return [getattr(shards[0], method)(*args, **kwargs)]
+        return list(self.executor.map(lambda db: getattr(db, method)(*args, **kwargs), shards))
+
+    # Single n: the shard that holds it
+
+    def get_by_n(self, n, edge_store=None):
+        db = self._shard_for(n)
+        return db.get_by_n(n, edge_store) if db else None
+
+    def get_structure_json(self, n):
+        db = self._shard_for(n)
+        return db.get_structure_json(n) if db else None
+
+    def get_graph_offsets(self, n):
+        db = self._shard_for(n)
+        return db.get_graph_offsets(n) if db else None
+
+    def get_graph_records(self, n, edge_store=None):
+        db = self._shard_for(n)
+        return db.get_graph_records(n, edge_store) if db else None
+
+    def get_spectrum(self, n, graph=None, matrix=None):
+        db = self._shard_for(n)
+        return db.get_spectrum(n, graph, matrix) if db else []
+
+    # Ranges and searches: overlapping shards, merged in n order
+
+    def get_n_range(self):
+        shards = self.refresh()
+        return (shards[0][0], max(last for _, last, _ in shards)) if shards else None
+
+    def iter_range(self, start_n=1, end_n=None, columns=('nvalue', 'exact_components_desc'), chunk_size=1000):
+        streams = [db.iter_range(start_n, end_n, columns, chunk_size) for db in self._overlapping(start_n, end_n)]
+        if 'nvalue' not in columns:
+            for stream in streams:
+                yield from stream
+            return
+        yield from heapq.merge(*streams, key=lambda row: row['nvalue'])
+
+    def iter_components(self, start_n=1, end_n=None, chunk_size=1000):
+        streams = [db.iter_components(start_n, end_n, chunk_size) for db in self._overlapping(start_n, end_n)]
+        yield from heapq.merge(*streams, key=lambda row: row[0])
+
+    def search_entries(self, start_n=1, end_n=100, components=(), exact_match=False, component_type='',
+                       invariants=None):
+        results = self._fan_out(self._overlapping(start_n, end_n), 'search_entries',
+                                start_n, end_n, components, exact_match, component_type, invariants)
+        return list(heapq.merge(*results, key=lambda row: row[0]))
+
+    def get_entries(self, ns, invariants=None):
+        """ns ascending: each shard gets the slice of ns in its range"""
+        groups = []
+        for first, last, db in self.refresh():
+            chunk = ns[bisect_left(ns, first):bisect_right(ns, last)]
+            if chunk:
+                groups.append((db, chunk))
+        if len(groups) == 1:
+            return groups[0][0].get_entries(groups[0][1], invariants)
+        results = self.executor.map(lambda group: group[0].get_entries(group[1], invariants), groups)
+        # Shards cover disjoint ranges and are in start_n order
+        return [row for rows in results for row in rows]
+
+    def find_by_components(self, required_components):
+        results = self._fan_out(self._overlapping(), 'find_by_components', required_components)
+        return sorted((row for rows in results for row in rows), key=lambda row: row['n'])
+
+    def find_by_exact_components(self, required_components):
+        return self.find_by_components(required_components)
+
+    def search_components(self, component_type=None, min_size=None, max_size=None,
+                          min_edges=None, max_edges=None, shape=None,
+                          start_n=None, end_n=None, order_by='n', limit=None, offset=0):
+        orderings = {
+            'n': lambda row: (row['n'], row['size']),
+            'size': lambda row: (-row['size'], row['n']),
+            'edges': lambda row: (-row['edges'], row['n'])
+        }
+        if order_by not in orderings:
+            raise ValueError(f"Unknown ordering: {order_by}")
+        # Each shard returns its first offset + limit rows; the page is cut after merging
+        shard_limit = None if limit is None else offset + limit
+        results = self._fan_out(
+            self._overlapping(start_n, end_n), 'search_components',
+            component_type, min_size, max_size, min_edges, max_edges, shape,
+            start_n, end_n, order_by, shard_limit, 0
+        )
+        merged = list(heapq.merge(*results, key=orderings[order_by]))
+        return merged[offset:] if limit is None else merged[offset:offset + limit]
+
+    def get_component_stats(self, limit=10, shape_limit=25):
+        """get_component_stats over every shard: top lists re-ranked, shape counts summed"""
+        # shape_limit=-1: every shape, so the histogram totals are exact
+        results = self._fan_out(self._overlapping(), 'get_component_stats', limit, -1)
+        rankings = {
+            'most_components': lambda e: -e['partition_count'],
+            'largest_bipartite': lambda e: -e['max_bipartite_sum'],
+            'largest_cliques': lambda e: -e['max_clique'],
+            'diverse_components': lambda e: (-e['type_count'], -e['partition_count']),
+        }
+        stats = {}
+        for name, key in rankings.items():
+            entries = [entry for result in results for entry in result[name]]
+            stats[name] = sorted(entries, key=lambda e: (key(e), e['n']))[:limit]
+        stats['entry_count'] = sum(result['entry_count'] for result in results)
+
+        shapes = {}
+        for result in results:
+            for shape in result['shape_histogram']:
+                merged = shapes.setdefault(shape['shape'], dict(shape, entry_count=0, occurrences=0))
+                merged['entry_count'] += shape['entry_count']
+                merged['occurrences'] += shape['occurrences']
+        component_types = {}
+        for shape in shapes.values():
+            totals = component_types.setdefault(
+                shape['component_type'], {'components': 0, 'entry_occurrences': 0, 'distinct_shapes': 0})
+            totals['components'] += shape['occurrences']
+            totals['entry_occurrences'] += shape['entry_count']
+            totals['distinct_shapes'] += 1
+        stats['component_types'] = component_types
+        histogram = sorted(shapes.values(), key=lambda shape: (-shape['entry_count'], shape['shape']))
+        stats['shape_histogram'] = histogram if shape_limit < 0 else histogram[:shape_limit]
+        return stats
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ('plan', 'merge', 'list'):
+        print("Usage:")
+        print("  python shards.py plan <start_n> <end_n> <workers> [shard_dir]")
+        print("  python shards.py merge <master.db> <shard.db> [<shard.db> ...]")
+        print("  python shards.py list '<shard glob>'")
+        sys.exit(1)
+
+    if sys.argv[1] == 'list':
+        catalog = ShardedCatalog(sys.argv[2] if len(sys.argv) > 2 else 'shards/*.db')
+        for start_n, end_n, db in catalog.shards:
+            print(f"{db.db_path}: n = {start_n}..{end_n}")
+        catalog.executor.shutdown()
+        sys.exit(0)
+
+    if sys.argv[1] == 'plan':
+        start_n, end_n, workers = map(int, sys.argv[2:5])
+        directory = sys.argv[5] if len(sys.argv) > 5 else 'shards'
+        for start, end in split_range(start_n, end_n, workers):
+            print(f"python populate_db.py {start} {end} --shard {directory}")
+    else:
+        if len(sys.argv) < 4:
+            print("Error: Provide the master database and at least one shard.")
+            sys.exit(1)
+        master_path, shard_paths = sys.argv[2], sys.argv[3:]
+        print(f"Merging {len(shard_paths)} shards into {master_path}...")
+        copied = merge_shards(master_path, shard_paths)
+        print(f"Merged {copied} entries")
@@ -0,0 +1,131 @@
+# signature_cache.py
+"""
+Exact components of Γ_E(Z_n) from the factorization of n, memoized by exponent signature.
+
+x, y are an exact pair iff gcd(x,n) * gcd(y,n) = n, so each component joins the class of
+elements with gcd d to the class with gcd n/d, and the class with gcd d has φ(n/d) elements.
+Which divisors pair up depends only on the multiset of exponents of n (its signature), e.g.
+12 = 2²·3 and 45 = 3²·5 share signature (2, 1). The pairing ("skeleton") is computed once
+per signature and instantiated for each n with its own primes.
+
+    python signature_cache.py verify 2 500     # compare against the brute-force pipeline
+"""
+import json
+import sys
+from itertools import product
+
+from number_sieve import factorize
+
+def signature_of(factors):
+    """Canonical signature: exponents in descending order, and the primes in that order"""
+    ordered = sorted(factors, key=lambda pk: (-pk[1], pk[0]))
+    return tuple(k for _, k in ordered), [p for p, _ in ordered]
+
+def build_skeleton(signature):
+    """
+    Divisor pairing for a signature, as exponent vectors: 'pairs' are {e, a-e} with e != a-e,
+    'squares' are e with 2e = a (only when every exponent is even). d = 1 and d = n are
+    excluded: units and zero are not in the graph.
+    """
+    pairs, squares = [], []
+    for e in product(*(range(k + 1) for k in signature)):
+        f = tuple(k - i for k, i in zip(signature, e))
+        if not any(e) or not any(f):
+            continue
+        if e == f:
+            squares.append(list(e))
+        elif e < f:
+            pairs.append([list(e), list(f)])
+    return {'pairs': pairs, 'squares': squares}
+
+def _phi(primes, exponents):
+    result = 1
+    for p, k in zip(primes, exponents):
+        if k:
+            result *= p ** (k - 1) * (p - 1)
+    return result
+
+def instantiate(skeleton, primes):
+    """Component tuples for n from its signature's skeleton, in get_exact_components order"""
+    comps = []
+    for e, f in skeleton['pairs']:
+        # Class with gcd p^e has φ(p^f) elements and vice versa
+        a, b = _phi(primes, f), _phi(primes, e)
+        comps.append((2,) if a == b == 1 else (min(a, b), max(a, b)))
+    for e in skeleton['squares']:
+        size = _phi(primes, e)
+        if size > 1:
+            comps.append((size,))
+    comps.sort(key=lambda t: (len(t), t))
+    return comps
+
+class SignatureCache:
+    """
+    Memo of skeletons keyed by signature. With a database, skeletons seen in earlier runs
+    are loaded up front and new ones are written back by flush().
+    """
+
+    def __init__(self, db=None):
+        self.db = db
+        self.skeletons = db.load_signature_skeletons() if db else {}
+        self.new = {}
+        self.hits = 0
+        self.misses = 0
+
+    def skeleton(self, signature):
+        key = ','.join(map(str, signature))
+        skeleton = self.skeletons.get(key)
+        if skeleton is None:
+            self.misses += 1
+            skeleton = build_skeleton(signature)
+            self.skeletons[key] = skeleton
+            self.new[key] = skeleton
+        else:
+            self.hits += 1
+        return skeleton
+
+    def components(self, n, factors=None):
+        """Exact components of Z_n, e.g. [(2,), (1,2)]"""
+        signature, primes = signature_of(factors if factors is not None else factorize(n))
+        return instantiate(self.skeleton(signature), primes)
+
+    def flush(self):
+        """Persist skeletons first seen in this run"""
+        if self.db and self.new:
+            self.db.save_signature_skeletons(self.new)
+        self.new = {}
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+def verify(start_n, end_n):
+    """Compare against catalog.get_exact_components over a range; returns the mismatching n"""
+    from catalog import get_zero_divisors, get_exact_zero_divisors, get_exact_components
+
+    cache = SignatureCache()
+    mismatches = []
+    for n in range(start_n, end_n + 1):
+        expected = get_exact_components(n, get_exact_zero_divisors(n, get_zero_divisors(n)))
+        if cache.components(n) != expected:
+            mismatches.append(n)
+            print(f"  n={n}: signature {cache.components(n)} != brute force {expected}")
+    print(f"Checked n={start_n}..{end_n}: {len(mismatches)} mismatches, "
+          f"{len(cache.skeletons)} signatures, hit rate {cache.hit_rate():.1%}")
+    return mismatches
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == 'verify':
+        sys.exit(1 if verify(int(sys.argv[2]), int(sys.argv[3])) else 0)
+    elif len(sys.argv) == 2:
+        n = int(sys.argv[1])
+        cache = SignatureCache()
+        signature, primes = signature_of(factorize(n))
+        print(f"n={n} signature={signature} primes={primes}")
+        print(json.dumps(cache.skeleton(signature)))
+        print(cache.components(n))
+    else:
+        print("Usage:")
+        print("  python signature_cache.py <n>")
+        print("  python signature_cache.py verify <start_n> <end_n>")
+        sys.exit(1)
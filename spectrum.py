@@ -0,0 +1,151 @@
+# spectrum.py
+"""
+Adjacency and Laplacian spectra of Γ(Z_n) and of the exact graph Γ_E(Z_n) (simple graphs on
+the nonzero zero divisors, self-loops left out, as in graph_invariants.py).
+
+The gcd classes (gcd(x, n) = d, φ(n/d) elements each) are an equitable partition of both
+graphs: every vertex of class d has the same number of neighbours in class e, namely
+|class e| when d*e is 0 (Γ) or n (Γ_E) modulo n, less one when e = d. So the spectrum is
+    the eigenvalues of the quotient matrix B (one row per class, d(n) - 2 rows), plus
+    for each class of size s > 1, s - 1 eigenvalues whose eigenvectors sum to zero on the
+    class and vanish elsewhere: -1 (adjacency) / degree + 1 (Laplacian) when the class is a
+    clique, 0 / degree when it is an independent set.
+B is symmetrized as D^½ B D^-½ (D = class sizes) so numpy's symmetric solver applies.
+
+    python spectrum.py 360 [zero|exact] [adjacency|laplacian]
+    python spectrum.py fill 2 100000 [db_path]    # batch job for the Spectrum table
+    python spectrum.py verify 2 200               # compare against the full dense matrices
+"""
+import json
+import sys
+import time
+
+import numpy as np
+
+import number_sieve
+from graph_invariants import divisor_classes
+
+GRAPHS = ('zero', 'exact')
+MATRICES = ('adjacency', 'laplacian')
+
+# Spectra are computed on request (rather than only read from the table) up to this n.
+# Requests factor n with number_sieve.factorize_any, trial division when n is beyond the
+# shared sieve, so they never grow it; the limit bounds the work one request can ask for
+ON_DEMAND_LIMIT = 10_000_000
+
+# Eigenvalues closer than this are merged into one (value, multiplicity)
+TOLERANCE = 1e-8
+
+def _quotient(n, graph, classes):
+    """(symmetrized adjacency quotient, degree per class, clique flag per class)"""
+    ds = np.array([d for d, _ in classes], dtype=np.int64)
+    sizes = np.array([size for _, size in classes], dtype=np.float64)
+    products = np.outer(ds, ds)
+    adjacent = products % n == 0 if graph == 'zero' else products == n
+    quotient = adjacent * np.sqrt(np.outer(sizes, sizes))
+    cliques = np.diag(adjacent).copy()
+    # A vertex is not its own neighbour
+    quotient[np.diag_indices_from(quotient)] = np.where(cliques, sizes - 1, 0)
+    degrees = adjacent @ sizes - cliques
+    return quotient, degrees, cliques
+
+def _group(values, multiplicities):
+    """[(eigenvalue, multiplicity)] ascending, with near-equal eigenvalues merged"""
+    order = np.argsort(values, kind='stable')
+    values, multiplicities = values[order], multiplicities[order]
+    gaps = np.diff(values) > TOLERANCE * np.maximum(1.0, np.abs(values[1:]))
+    starts = np.flatnonzero(np.concatenate([[True], gaps]))
+    counts = np.add.reduceat(multiplicities, starts)
+    # rounded for storage; + 0.0 turns -0.0 into 0.0
+    return list(zip((np.round(values[starts], 9) + 0.0).tolist(), counts.tolist()))
+
+def compute_spectrum(n, graph='zero', matrix='adjacency'):
+    """[(eigenvalue, multiplicity)] of Γ(Z_n) (graph='zero') or Γ_E(Z_n) ('exact'), ascending"""
+    if graph not in GRAPHS:
+        raise ValueError(f"Unknown graph: {graph}")
+    if matrix not in MATRICES:
+        raise ValueError(f"Unknown matrix: {matrix}")
+    classes = divisor_classes(n, number_sieve.factorize_any(n))
+    if not classes:
+        return []
+    quotient, degrees, cliques = _quotient(n, graph, classes)
+    if matrix == 'laplacian':
+        quotient = np.diag(degrees) - quotient
+        within = degrees + cliques
+    else:
+        within = -cliques.astype(np.float64)
+    sizes = np.array([size for _, size in classes])
+    values = np.concatenate([np.linalg.eigvalsh(quotient), within])
+    multiplicities = np.concatenate([np.ones(len(classes), dtype=np.int64), sizes - 1])
+    keep = multiplicities > 0
+    return _group(values[keep], multiplicities[keep])
+
+def spectrum_rows(n):
+    """Spectrum table rows for n: (nvalue, graph, matrix, eigenvalues JSON, spectral_radius)"""
+    rows = []
+    for graph in GRAPHS:
+        for matrix in MATRICES:
+            spectrum = compute_spectrum(n, graph, matrix)
+            radius = max((abs(value) for value, _ in spectrum), default=None)
+            rows.append((n, graph, matrix, json.dumps(spectrum), radius))
+    return rows
+
+def fill_spectra(db, start_n, end_n, chunk_size=5000, overwrite=False):
+    """
+    Batch job: store the four spectra of every n in start_n..end_n (catalogued or not),
+    one transaction per chunk. n already in the table are skipped unless overwrite.
+    Returns the number of n computed.
+    """
+    number_sieve.ensure(end_n)
+    stored = set() if overwrite else db.get_spectrum_ns(start_n, end_n)
+    pending = [n for n in range(start_n, end_n + 1) if n not in stored]
+    for i in range(0, len(pending), chunk_size):
+        chunk = pending[i:i + chunk_size]
+        db.insert_spectra([row for n in chunk for row in spectrum_rows(n)])
+        print(f"  ✓ n = {chunk[0]}..{chunk[-1]}")
+    return len(pending)
+
+def verify(start_n, end_n):
+    """Compare against numpy on the full adjacency/Laplacian matrices; returns the mismatching n"""
+    from math import gcd
+
+    mismatches = []
+    for n in range(start_n, end_n + 1):
+        vertices = [x for x in range(1, n) if gcd(x, n) > 1]
+        for graph in GRAPHS:
+            if graph == 'zero':
+                adjacency = np.array([[x != y and x * y % n == 0 for y in vertices] for x in vertices], float)
+            else:
+                adjacency = np.array([[x != y and gcd(x, n) * gcd(y, n) == n for y in vertices] for x in vertices], float)
+            adjacency = adjacency.reshape(len(vertices), len(vertices))
+            for matrix in MATRICES:
+                full = adjacency if matrix == 'adjacency' else np.diag(adjacency.sum(axis=1)) - adjacency
+                expected = np.sort(np.linalg.eigvalsh(full)) if len(vertices) else np.array([])
+                actual = np.array([value for value, count in compute_spectrum(n, graph, matrix) for _ in range(count)])
+                if len(actual) != len(expected) or not np.allclose(actual, expected, atol=1e-6):
+                    mismatches.append((n, graph, matrix))
+                    print(f"  n={n} {graph} {matrix}: mismatch")
+    print(f"Checked n={start_n}..{end_n}: {len(mismatches)} mismatches")
+    return mismatches
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == 'verify':
+        sys.exit(1 if verify(int(sys.argv[2]), int(sys.argv[3])) else 0)
+    elif len(sys.argv) >= 4 and sys.argv[1] == 'fill':
+        from database import ZeroDivisorDatabase
+        db = ZeroDivisorDatabase(sys.argv[4]) if len(sys.argv) > 4 else ZeroDivisorDatabase()
+        start = time.perf_counter()
+        count = fill_spectra(db, int(sys.argv[2]), int(sys.argv[3]))
+        print(f"Stored spectra for {count} n in {time.perf_counter() - start:.1f}s")
+    elif len(sys.argv) >= 2 and sys.argv[1].isdigit():
+        n = int(sys.argv[1])
+        graph = sys.argv[2] if len(sys.argv) > 2 else 'zero'
+        matrix = sys.argv[3] if len(sys.argv) > 3 else 'adjacency'
+        for value, count in compute_spectrum(n, graph, matrix):
+            print(f"  {value:>14.6f}  × {count}")
+    else:
+        print("Usage:")
+        print("  python spectrum.py <n> [zero|exact] [adjacency|laplacian]")
+        print("  python spectrum.py fill <start_n> <end_n> [db_path]")
+        print("  python spectrum.py verify <start_n> <end_n>")
+        sys.exit(1)
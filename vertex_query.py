@@ -0,0 +1,117 @@
+# vertex_query.py
+"""
+Point queries on one element x of Z_n, computed from g = gcd(x, n) alone, so they need no
+stored graph and work for any n up to MAX_N:
+
+    ann(x)          the multiples of n/g: g elements, 0 included
+    neighbours      ann(x) without 0 and x itself: x's neighbours in Γ(Z_n) (nonzero zero
+                    divisors, as in graph_invariants.py)
+    exact partners  y with gcd(x,n) * gcd(y,n) = n, i.e. (n/g)*u for 1 <= u < g with
+                    gcd(u, g) = 1: φ(g) of them, less x itself when g² = n, so that both
+                    lists leave out x
+
+Each list is paged with offset/limit and every item is computed from its position, so a page
+costs O(limit) whatever n is. Exact partners also need the primes of g (trial division when g
+is beyond the sieve) and a binary search over inclusion-exclusion counts of the u coprime to g.
+Trial division takes about √g steps, so n is capped at MAX_N = 10^12 (well under a second) and
+larger n raise ValueError.
+
+    python vertex_query.py 1000000000 250000000 [offset] [limit]
+"""
+import json
+import math
+import sys
+from itertools import combinations
+
+from number_sieve import factorize_any
+
+DEFAULT_LIMIT = 1000
+MAX_N = 10 ** 12
+
+def _coprime_terms(primes):
+    """(sign, product) for each subset of primes, for inclusion-exclusion"""
+    return [((-1) ** r, math.prod(subset)) for r in range(len(primes) + 1)
+            for subset in combinations(primes, r)]
+
+def _coprime_count(m, terms):
+    """How many of 1..m are divisible by none of the primes"""
+    return sum(sign * (m // product) for sign, product in terms)
+
+def _exact_partner_page(step, g, offset, limit, exclude=None):
+    """
+    step*u for the coprime u < g at positions offset.. (0-based) of the ascending list, with
+    u = exclude (itself coprime to g) left out of both the list and the total
+    """
+    primes = [p for p, _ in factorize_any(g)]
+    terms = _coprime_terms(primes)
+    total = _coprime_count(g - 1, terms) - (exclude is not None)
+    if offset >= total:
+        return total, []
+    # Positions at or past the excluded u shift up by one in the full list
+    position = offset
+    if exclude is not None and offset >= _coprime_count(exclude - 1, terms):
+        position += 1
+    # Smallest u with position + 1 coprime values in 1..u
+    low, high = 1, g - 1
+    while low < high:
+        middle = (low + high) // 2
+        if _coprime_count(middle, terms) > position:
+            high = middle
+        else:
+            low = middle + 1
+    items = []
+    u = low
+    while len(items) < limit and u < g:
+        if u != exclude and all(u % p for p in primes):
+            items.append(step * u)
+        u += 1
+    return total, items
+
+def vertex_query(n, x, offset=0, limit=DEFAULT_LIMIT):
+    """
+    ann(x), the neighbours of x and the exact partners of x in Z_n (x is taken mod n), each as
+    {'total': ..., 'items': [...]} holding items offset .. offset + limit - 1 in ascending order
+    """
+    if n < 2:
+        raise ValueError("n must be at least 2")
+    if n > MAX_N:
+        raise ValueError(f"n must be at most {MAX_N}")
+    x %= n
+    g = math.gcd(x, n)  # n when x = 0
+    step = n // g
+    is_zero_divisor = x != 0 and g > 1
+    # x*x = 0 also holds for x = 0, which is not a vertex
+    self_loop = is_zero_divisor and x * x % n == 0
+    end = offset + limit
+
+    annihilator = [step * k for k in range(offset, min(end, g))]
+
+    neighbours_total = g - 1 - self_loop if is_zero_divisor else 0
+    # Position of x itself among the nonzero multiples of step, which is skipped
+    skip = x // step - 1 if self_loop else neighbours_total
+    neighbours = [step * (i + 1 + (i >= skip)) for i in range(offset, min(end, neighbours_total))]
+
+    # x is its own exact partner exactly when g * g = n; leave it out as neighbours do
+    exclude = x // step if g * g == n else None
+    exact_total, exact = (_exact_partner_page(step, g, offset, limit, exclude) if is_zero_divisor
+                          else (0, []))
+
+    return {
+        'n': n,
+        'x': x,
+        'gcd': g,
+        'is_zero_divisor': is_zero_divisor,
+        'self_loop': self_loop,
+        'offset': offset,
+        'limit': limit,
+        'annihilator': {'generator': step, 'total': g, 'items': annihilator},
+        'neighbours': {'total': neighbours_total, 'items': neighbours},
+        'exact_partners': {'gcd': step if is_zero_divisor else None, 'total': exact_total, 'items': exact},
+    }
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python vertex_query.py <n> <x> [offset] [limit]")
+        sys.exit(1)
+    args = [int(arg) for arg in sys.argv[1:5]]
+    print(json.dumps(vertex_query(*args[:2], *args[2:]), indent=2))